@@ -7,192 +7,303 @@ Use:
     st.plotly_chart(fig, use_container_width=True)
 """
 from __future__ import annotations
-import re
+from dataclasses import dataclass
+from functools import partial
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import parallel
+from cache import frame_cache, peek_frame_cache
+from chart_theme import make_figure
+from heatmap_index import cached_heatmap_index
+from perf import timed
+from query import StoreIndex, mask
+from topk import top_k, top_k_among, build_sorted_index
 
 
-def _build_business_mix(df: pd.DataFrame) -> pd.DataFrame:
+def _unwrap(data: pd.DataFrame | StoreIndex) -> tuple[pd.DataFrame, StoreIndex | None]:
+    """Chart builders take a DataFrame or a StoreIndex over one."""
+    if isinstance(data, StoreIndex):
+        return data.frame, data
+    return data, None
+
+
+def _mix_aggs(key: str) -> dict:
+    """Named aggregations for one business-mix group (all mergeable)."""
+    return dict(
+        Total=(key, "count"),
+        Reviews=("total_reviews", "sum"),
+        RatingSum=("rating", "sum"),
+        RatingCount=("rating", "count"),
+        RatingMin=("rating", "min"),
+        RatingMax=("rating", "max"),
+    )
+
+
+def _finish_mix(mixed: pd.DataFrame) -> pd.DataFrame:
+    mixed["Rating"] = mixed["RatingSum"] / mixed["RatingCount"].where(mixed["RatingCount"] > 0)
+    return mixed.reset_index(drop=True)
+
+
+# (column, Source) of the two business-mix groupings
+_MIX_SOURCES = (("business_type_ar", 0), ("other_type_name", 1))
+
+
+def _mix_groups(df: pd.DataFrame, key: str, source: int) -> pd.DataFrame:
+    """Business-mix rows of one grouping (see _build_business_mix)."""
+    if source == 0:
+        # 1. mainstream types
+        return (
+            df.groupby(key, as_index=False, observed=True)
+            .agg(**_mix_aggs(key))
+            .rename(columns={key: "Type"})
+            .query("Type != 'أخرى'")  # drop 'others' placeholder
+            .assign(Source=0)
+        )
+    # 2. free-text types (only the aggregated columns: dropna copies what it keeps)
+    return (
+        df[[key, "total_reviews", "rating"]].dropna(subset=[key])
+        .groupby(key, as_index=False, observed=True)
+        .agg(**_mix_aggs(key))
+        .rename(columns={key: "Type"})
+        .assign(Source=1)
+    )
+
+
+def _mix_groups_in(df: pd.DataFrame, buckets: np.ndarray | None, part: int, key: str,
+                   source: int) -> pd.DataFrame:
+    # the row selection runs inside the pool task too
+    if buckets is not None:
+        df = df.iloc[np.flatnonzero(buckets == part)]
+    return _mix_groups(df, key, source)
+
+
+@timed
+def _build_business_mix(df: pd.DataFrame, workers: int | None = None) -> pd.DataFrame:
     """
     Internal helper:
     - Groups by 'business_type_ar' and 'other_type_name'
     - Drops 'أخرى' and empty/whitespace-only labels
-    - Returns unified frame with columns: Type | Total | Reviews
-    """
-    # 1. mainstream types
-    wdf = (
-        df.groupby("business_type_ar", as_index=False)
-        .agg(Total=("business_type_ar", "count"), Reviews=("total_reviews", "sum"))
-        .rename(columns={"business_type_ar": "Type"})
-        .query("Type != 'أخرى'")  # drop 'others' placeholder
-    )
+    - Returns unified frame with columns: Source | Type | Total | Reviews
+      | RatingSum | RatingCount | RatingMin | RatingMax | Rating
+      (Source 0 = business_type_ar group, 1 = other_type_name group)
 
-    # 2. free-text types
-    wdf2 = (
-        df.dropna(subset=["other_type_name"])
-        .groupby("other_type_name", as_index=False)
-        .agg(Total=("other_type_name", "count"), Reviews=("total_reviews", "sum"))
-        .rename(columns={"other_type_name": "Type"})
-    )
+    With several *workers* (default parallel.WORKERS) each grouping runs
+    on the thread pool over disjoint sets of whole groups, so every
+    group's sums add the same values in the same order as the serial path.
+    """
+    n = parallel.workers(len(df), workers)
+    tasks = []
+    for key, source in _MIX_SOURCES:
+        cols = df[[key, "total_reviews", "rating"]]
+        buckets = parallel.group_buckets(df[key], n) if n > 1 else None
+        tasks += [partial(_mix_groups_in, cols, buckets, part, key, source) for part in range(n)]
 
-    mixed = pd.concat([wdf, wdf2], ignore_index=True)
+    mixed = pd.concat(parallel.run(tasks, n), ignore_index=True)
+    mixed["Type"] = mixed["Type"].astype(object)
+    mixed = mixed[["Source", *mixed.columns.drop("Source")]]
 
     # drop purely whitespace labels
     mask = mixed["Type"].str.contains(r"^\s*$", regex=True, na=False)
-    return mixed.loc[~mask]
+    return _finish_mix(mixed.loc[~mask].sort_values(["Source", "Type"], kind="stable"))
 
 
-def _bus_type(row: pd.Series) -> str:
-    """Unified business-type logic with proper NaN handling."""
-    # Try business_type_ar first
-    bus_type = row.get("business_type_ar")
-    if pd.notna(bus_type):
-        bus_str = str(bus_type).strip()
-        if bus_str and bus_str not in {"أخرى", "nan", "NaN", "None", ""}:
-            return bus_str
-    
-    # Try other_type_name next
-    other_type = row.get("other_type_name")
-    if pd.notna(other_type):
-        other_str = str(other_type).strip()
-        if other_str and other_str not in {"nan", "NaN", "None", ""}:
-            return other_str
-    
-    return "لم يتم التحديد"
+@timed
+def business_mix_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Business-mix aggregate for *df*, built once per dataset and memoised.
 
+    One row per (Source, Type) with store count, review sum and rating
+    stats; see _build_business_mix for the columns. Treat it as read-only.
+    """
+    store = frame_cache(df)
+    if "business_mix" not in store:
+        cube = _build_business_mix(df)
+        build_sorted_index(cube, "Total")
+        build_sorted_index(cube, "Reviews")
+        store["business_mix"] = cube
+    return store["business_mix"]
 
-def _hover_text(row: pd.Series) -> str:
-    """Unified hover text with proper Arabic formatting and NaN handling."""
-    # Get business type
-    bus_type = _bus_type(row)
-    
-    # Handle description safely
-    desc = row.get("description")
-    if pd.isna(desc):
-        desc_text = "لا يوجد وصف متاح"
-    else:
-        desc_str = str(desc).strip()
-        desc_text = (desc_str[:197] + "...") if len(desc_str) > 200 else desc_str
-    
-    # Handle rating and reviews
-    rating_val = row.get('rating')
-    reviews_val = row.get('total_reviews')
-    
-    # Format rating
-    if pd.isna(rating_val):
-        rating_text = "غير متاح"
-    else:
-        rating_text = f"{float(rating_val):.2f}"
-    
-    # Format reviews
-    if pd.isna(reviews_val):
-        reviews_text = "غير متاح"
-    else:
-        reviews_num = int(reviews_val)
-        reviews_text = f"{reviews_num:,}"
-    
-    # Get name
-    name_val = row.get('name_ar', 'N/A')
-    name_text = str(name_val) if pd.notna(name_val) else "غير متاح"
-    
-    # Create Arabic hover text with theme-matching colors
-    hover_text = (
-        f"<b style='color:#202020;'>{name_text}</b><br>"
-        f"<b style='color:#202020;'>النوع:</b> <span style='color:#202020;'>{bus_type}</span><br>"
-        f"<b style='color:#202020;'>التقييم:</b> <span style='color:#202020;'>{rating_text}</span><br>"
-        f"<b style='color:#202020;'>عدد التقييمات:</b> <span style='color:#202020;'>{reviews_text}</span><br>"
-        f"<b style='color:#202020;'>الوصف:</b> <span style='color:#202020;'>{desc_text}</span>"
+
+@timed
+def update_business_mix(cube: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return *cube* adjusted for appended store rows, without a full rebuild.
+
+    Cost is one aggregation over *new_rows* plus a merge over the cube's
+    rows (one per business type), independent of the original dataset size.
+    """
+    merged = (
+        pd.concat([cube, _build_business_mix(new_rows)], ignore_index=True)
+        .groupby(["Source", "Type"], as_index=False, sort=True)
+        .agg(
+            Total=("Total", "sum"),
+            Reviews=("Reviews", "sum"),
+            RatingSum=("RatingSum", "sum"),
+            RatingCount=("RatingCount", "sum"),
+            RatingMin=("RatingMin", "min"),
+            RatingMax=("RatingMax", "max"),
+        )
     )
-    
-    return hover_text
+    return _finish_mix(merged)
 
 
-def business_mix_chart(
-    df: pd.DataFrame,
-    *,
-    top_n: int = 10,
-    sort_by: str = "Total",
-) -> go.Figure:
+@timed
+def append_stores(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
     """
-    Return a horizontal bar chart (Plotly) of the top-N business types.
+    Return *df* with *new_rows* appended, carrying the business-mix cube
+    forward incrementally (if one was built for *df*).
     """
-    if sort_by not in {"Total", "Reviews"}:
-        raise ValueError("sort_by must be 'Total' or 'Reviews'")
+    combined = pd.concat([df, new_rows], ignore_index=True)
+    old = peek_frame_cache(df)
+    if old is not None and "business_mix" in old:
+        cube = update_business_mix(old["business_mix"], new_rows)
+        build_sorted_index(cube, "Total")
+        build_sorted_index(cube, "Reviews")
+        frame_cache(combined)["business_mix"] = cube
+    return combined
 
-    data = _build_business_mix(df).sort_values(sort_by, ascending=True).tail(top_n)
 
-    fig = go.Figure()
+_MISSING_LABELS = ["nan", "NaN", "None", ""]
 
-    # Determine Arabic labels
-    if sort_by == "Total":
-        sort_text = "عدد المتاجر"
-        total_label = "عدد المتاجر"
-        reviews_label = "عدد التقييمات"
-    else:
-        sort_text = "عدد التقييمات"
-        total_label = "عدد التقييمات"
-        reviews_label = "عدد المتاجر"
 
-    # --- Total bar ---
-    fig.add_bar(
-        y=data["Type"],
-        x=data["Total"],
-        name=total_label,
-        orientation="h",
-        marker_color="#2C7D8B",  # Specified accent color
-        text=data["Total"],
-        textposition="outside",
-        hovertemplate="%{y}<br>%{x} متجر<extra></extra>",
-        width=0.3,
-    )
+def _clean_labels(df: pd.DataFrame, col: str, drop: list[str]) -> pd.Series:
+    """Stripped string labels of *col*, with NaN where the label is unusable."""
+    if col not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    s = df[col].astype("string").str.strip()
+    return s.mask(s.isin(drop))
+
+
+def _bus_type(df: pd.DataFrame) -> pd.Series:
+    """Unified business-type column: business_type_ar, else other_type_name."""
+    main = _clean_labels(df, "business_type_ar", ["أخرى", *_MISSING_LABELS])
+    other = _clean_labels(df, "other_type_name", _MISSING_LABELS)
+    return main.fillna(other).fillna("لم يتم التحديد")
+
+
+# One hover template per trace; the per-row values travel as customdata.
+# Text colour comes from layout.hoverlabel, so no inline styles are needed.
+_BAR_HOVER = (
+    "<b>%{y}</b><br>"
+    "<b>النوع:</b> %{customdata[0]}<br>"
+    "<b>التقييم:</b> %{customdata[1]}<br>"
+    "<b>عدد التقييمات:</b> %{customdata[2]}<br>"
+    "<b>الوصف:</b> %{customdata[3]}"
+    "<extra></extra>"
+)
+
+
+def _hover_customdata(df: pd.DataFrame) -> np.ndarray:
+    """Per-row [type, rating, reviews, description] strings for _BAR_HOVER.
+
+    Call it on the rows that are actually plotted, not the full frame.
+    """
+    bus_type = _bus_type(df)
+
+    desc = df["description"].astype("string").str.strip() if "description" in df.columns \
+        else pd.Series(pd.NA, index=df.index, dtype="string")
+    desc = desc.where((desc.str.len() <= 200).fillna(True), desc.str[:197] + "...")
+    desc_text = desc.fillna("لا يوجد وصف متاح")
 
-    # --- Reviews bar ---
-    fig.add_bar(
-        y=data["Type"],
-        x=data["Reviews"],
-        name=reviews_label,
+    rating = pd.to_numeric(df["rating"], errors="coerce").astype("float64")
+    rating_text = pd.Series(np.char.mod("%.2f", rating.to_numpy()), index=df.index)
+    rating_text = rating_text.where(rating.notna(), "غير متاح")
+
+    reviews = pd.to_numeric(df["total_reviews"], errors="coerce")
+    reviews_text = reviews.dropna().astype("int64").map("{:,}".format).reindex(df.index)
+    reviews_text = reviews_text.astype("string").fillna("غير متاح")
+
+    return np.column_stack([
+        bus_type.astype(object), rating_text.astype(object),
+        reviews_text.astype(object), desc_text.astype(object),
+    ])
+
+
+def _bar(y, x, name: str, color: str, text, hovertemplate: str, customdata=None) -> dict:
+    """One horizontal bar trace in the dashboard style."""
+    trace = dict(
+        type="bar",
+        y=y,
+        x=x,
+        name=name,
         orientation="h",
-        marker_color="#2A927A",  # Specified accent color
-        text=data["Reviews"],
+        marker=dict(color=color),
+        text=text,
         textposition="outside",
-        hovertemplate="%{y}<br>%{x} تقييم<extra></extra>",
+        hovertemplate=hovertemplate,
         width=0.3,
     )
+    if customdata is not None:
+        trace["customdata"] = customdata
+    return trace
 
-    fig.update_layout(
-        title=dict(
-            text=f"أعلى {top_n} نوع متجر حسب {sort_text}",
-            font=dict(size=16, family='Noto Sans Arabic')  # Reduced size
-        ),
+
+def _bar_layout(title: str, xaxis_title: str, top_n: int) -> dict:
+    """Layout shared by the top-N bar charts (fonts come from chart_theme)."""
+    return dict(
+        title=dict(text=title),
         barmode="group",
-        xaxis_title="العدد",
-        yaxis_title=None,
-        yaxis_categoryorder="total ascending",
+        xaxis=dict(title=dict(text=xaxis_title)),
+        yaxis=dict(title=dict(text=None), categoryorder="total ascending"),
         height=max(400, top_n * 35),  # Reduced height per item
         margin=dict(l=10, r=10, t=50, b=10),
         legend=dict(
-            title="المؤشرات",
+            title=dict(text="المؤشرات"),
             orientation="h",
             yanchor="bottom",
             y=1.02,
             xanchor="center",
             x=0.5
         ),
-        hoverlabel=dict(
-            bgcolor="#C9D2BA",  # Specified hover background
-            font_size=12,  # Reduced size
-            font_family="Noto Sans Arabic",
-            align="right",
-            font_color="#202020"  # Specified hover text color
-        ),
-        font=dict(family='Noto Sans Arabic')
+        hoverlabel=dict(align="right"),
     )
-    return fig
 
 
-def create_ratings_analysis_chart(df: pd.DataFrame, *, min_rating: float = 4.5, top_n: int = 10) -> go.Figure:
+@timed
+def business_mix_chart(
+    df: pd.DataFrame | StoreIndex,
+    *,
+    top_n: int = 10,
+    sort_by: str = "Total",
+) -> go.Figure:
+    """
+    Return a horizontal bar chart (Plotly) of the top-N business types.
+    """
+    if sort_by not in {"Total", "Reviews"}:
+        raise ValueError("sort_by must be 'Total' or 'Reviews'")
+
+    df, _ = _unwrap(df)
+    data = top_k(business_mix_cube(df), sort_by, top_n).iloc[::-1]
+
+    # Determine Arabic labels
+    if sort_by == "Total":
+        sort_text = "عدد المتاجر"
+        total_label = "عدد المتاجر"
+        reviews_label = "عدد التقييمات"
+    else:
+        sort_text = "عدد التقييمات"
+        total_label = "عدد التقييمات"
+        reviews_label = "عدد المتاجر"
+
+    return make_figure(
+        [
+            _bar(data["Type"], data["Total"], total_label, "#2C7D8B",  # Specified accent color
+                 data["Total"], "%{y}<br>%{x} متجر<extra></extra>"),
+            _bar(data["Type"], data["Reviews"], reviews_label, "#2A927A",  # Specified accent color
+                 data["Reviews"], "%{y}<br>%{x} تقييم<extra></extra>"),
+        ],
+        _bar_layout(f"أعلى {top_n} نوع متجر حسب {sort_text}", "العدد", top_n),
+    )
+
+
+@timed
+def create_ratings_analysis_chart(df: pd.DataFrame | StoreIndex, *, min_rating: float = 4.5, top_n: int = 10) -> go.Figure:
     """Horizontal bar chart: highest-rated businesses."""
-    d = df[df["rating"] >= min_rating].copy()
+    df, _ = _unwrap(df)  # an index's sorted rating order is reused by top_k
+    # the top-N of the whole frame, cut at min_rating, is the top-N of the subset
+    d = top_k(df, "rating", top_n)
+    d = d[d["rating"] >= min_rating].iloc[::-1]
     if d.empty:
         return go.Figure().add_annotation(
             text=f"لا توجد متاجر بتقييم ≥ {min_rating}",
@@ -200,141 +311,79 @@ def create_ratings_analysis_chart(df: pd.DataFrame, *, min_rating: float = 4.5,
             font=dict(size=14, family='Noto Sans Arabic')  # Reduced size
         )
 
-    d = (
-        d.assign(hover=lambda x: x.apply(_hover_text, axis=1))
-        .sort_values("rating", ascending=True)
-        .tail(top_n)
-    )
-
-    fig = go.Figure(
+    hover = _hover_customdata(d)
+    rating_text = d["rating"].astype("float64").round(2)  # float32 4.1 would print as 4.0999999
+    return make_figure(
         [
-            go.Bar(
-                y=d["name_ar"],
-                x=d["rating"],
-                name="التقييم",
-                orientation="h",
-                marker_color="#2C7D8B",  # Specified accent color
-                text=d["rating"].round(2),
-                textposition="outside",
-                hovertemplate="%{hovertext}<extra></extra>",
-                hovertext=d["hover"],
-                width=0.3,
-            ),
-            go.Bar(
-                y=d["name_ar"],
-                x=d["total_reviews"],
-                name="عدد التقييمات",
-                orientation="h",
-                marker_color="#2A927A",  # Specified accent color
-                text=d["total_reviews"],
-                textposition="outside",
-                hovertemplate="%{hovertext}<extra></extra>",
-                hovertext=d["hover"],
-                width=0.3,
-            ),
-        ]
-    )
-
-    fig.update_layout(
-        title=dict(
-            text=f"أعلى {top_n} متجر بتقييم ≥ {min_rating}",
-            font=dict(size=16, family='Noto Sans Arabic')  # Reduced size
-        ),
-        barmode='group',
-        xaxis_title="التقييم / العدد",
-        yaxis_title=None,
-        yaxis_categoryorder="total ascending",
-        height=max(400, top_n * 35),  # Reduced height per item
-        margin=dict(l=10, r=10, t=50, b=10),
-        legend=dict(
-            title="المؤشرات",
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="center",
-            x=0.5
-        ),
-        hoverlabel=dict(
-            bgcolor="#C9D2BA",  # Specified hover background
-            font_size=12,  # Reduced size
-            font_family="Noto Sans Arabic",
-            align="right",
-            font_color="#202020"  # Specified hover text color
-        ),
-        font=dict(family='Noto Sans Arabic')
+            _bar(d["name_ar"], d["rating"], "التقييم", "#2C7D8B", rating_text, _BAR_HOVER, hover),
+            _bar(d["name_ar"], d["total_reviews"], "عدد التقييمات", "#2A927A", d["total_reviews"], _BAR_HOVER, hover),
+        ],
+        _bar_layout(f"أعلى {top_n} متجر بتقييم ≥ {min_rating}", "التقييم / العدد", top_n),
     )
-    return fig
 
 
-def create_reviews_analysis_chart(df: pd.DataFrame, *, top_n: int = 10) -> go.Figure:
+@timed
+def create_reviews_analysis_chart(df: pd.DataFrame | StoreIndex, *, top_n: int = 10) -> go.Figure:
     """Horizontal bar chart: most-reviewed businesses."""
-    d = (
-        df.assign(hover=lambda x: x.apply(_hover_text, axis=1))
-        .sort_values("total_reviews", ascending=True)
-        .tail(top_n)
-    )
-
-    fig = go.Figure(
+    df, _ = _unwrap(df)
+    d = top_k(df, "total_reviews", top_n).iloc[::-1]
+    hover = _hover_customdata(d)
+    rating_text = d["rating"].astype("float64").round(2)  # float32 4.1 would print as 4.0999999
+    return make_figure(
         [
-            go.Bar(
-                y=d["name_ar"],
-                x=d["total_reviews"],
-                name="عدد التقييمات",
-                orientation="h",
-                marker_color="#2C7D8B",  # Specified accent color
-                text=d["total_reviews"],
-                textposition="outside",
-                hovertemplate="%{hovertext}<extra></extra>",
-                hovertext=d["hover"],
-                width=0.3,
-            ),
-            go.Bar(
-                y=d["name_ar"],
-                x=d["rating"],
-                name="التقييم",
-                orientation="h",
-                marker_color="#2A927A",  # Specified accent color
-                text=d["rating"].round(2),
-                textposition="outside",
-                hovertemplate="%{hovertext}<extra></extra>",
-                hovertext=d["hover"],
-                width=0.3,
-            ),
-        ]
+            _bar(d["name_ar"], d["total_reviews"], "عدد التقييمات", "#2C7D8B", d["total_reviews"], _BAR_HOVER, hover),
+            _bar(d["name_ar"], d["rating"], "التقييم", "#2A927A", rating_text, _BAR_HOVER, hover),
+        ],
+        _bar_layout(f"أعلى {top_n} متجر حسب عدد التقييمات", "العدد / التقييم", top_n),
     )
 
-    fig.update_layout(
-        title=dict(
-            text=f"أعلى {top_n} متجر حسب عدد التقييمات",
-            font=dict(size=16, family='Noto Sans Arabic')  # Reduced size
-        ),
-        barmode='group',
-        xaxis_title="العدد / التقييم",
-        yaxis_title=None,
-        yaxis_categoryorder="total ascending",
-        height=max(400, top_n * 35),  # Reduced height per item
-        margin=dict(l=10, r=10, t=50, b=10),
-        legend=dict(
-            title="المؤشرات",
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="center",
-            x=0.5
-        ),
-        hoverlabel=dict(
-            bgcolor="#C9D2BA",  # Specified hover background
-            font_size=12,  # Reduced size
-            font_family="Noto Sans Arabic",
-            align="right",
-            font_color="#202020"  # Specified hover text color
+# ================================================================
+def _heatmap_hover(x_edges: np.ndarray, y_edges: np.ndarray, hist: np.ndarray) -> tuple[np.ndarray, str]:
+    """
+    Hover data for a (y, x) histogram without building per-cell strings.
+
+    Returns a (ny, nx, 5) customdata array of
+    [x_start, x_end, y_start, y_end, count] and the matching hovertemplate.
+    """
+    ny, nx = hist.shape
+    x_start = np.trunc(x_edges[:-1])
+    x_end = np.trunc(x_edges[1:])
+    customdata = np.stack(
+        np.broadcast_arrays(
+            x_start[None, :], x_end[None, :],
+            y_edges[:-1, None], y_edges[1:, None],
+            hist,
         ),
-        font=dict(family='Noto Sans Arabic')
+        axis=-1,
+    ).astype(np.float32)  # counts, edges and 0.25-step ratings are exact in float32
+
+    # Integer-wide bins show a single review count, wider bins a range
+    if np.all(x_end - x_start <= 1):
+        x_range = "%{customdata[0]:d}"
+    else:
+        x_range = "%{customdata[0]:d}–%{customdata[1]:d}"
+    hovertemplate = (
+        f"مراجعات: {x_range}<br>"
+        "تقييم: %{customdata[2]:.2f}–%{customdata[3]:.2f}<br>"
+        "عدد المتاجر: %{customdata[4]:d}"
+        "<extra></extra>"
     )
-    return fig
+    return customdata, hovertemplate
 
-# ================================================================
-def rating_reviews_heatmap(df: pd.DataFrame, *, 
+
+def _histogram2d(x: np.ndarray, y: np.ndarray, x_edges: np.ndarray, y_edges: np.ndarray,
+                 workers: int | None = None) -> np.ndarray:
+    """np.histogram2d counts, summed over row chunks on the thread pool (exact)."""
+    n = parallel.workers(len(x), workers)
+    parts = parallel.run([
+        partial(np.histogram2d, x[c], y[c], bins=[x_edges, y_edges])
+        for c in parallel.row_chunks(len(x), n)
+    ], n)
+    return np.sum([hist for hist, _, _ in parts], axis=0)
+
+
+@timed
+def rating_reviews_heatmap(df: pd.DataFrame | StoreIndex, *, 
                           reviews_range: tuple = (0, 100),
                           title: str = "كثافة التقييمات مقابل المراجعات") -> go.Figure:
     """
@@ -342,28 +391,43 @@ def rating_reviews_heatmap(df: pd.DataFrame, *,
     
     Parameters:
     -----------
-    df : pd.DataFrame
-        The dataframe containing the data
+    df : pd.DataFrame | StoreIndex
+        The dataframe containing the data (or a StoreIndex over it)
     reviews_range : tuple
         Range of total_reviews to display (min, max)
     title : str
         Title of the plot
     """
-    import numpy as np
-    import plotly.graph_objects as go
-    
-    # Filter out rows with NaN values
-    filtered_df = df.dropna(subset=["total_reviews", "rating"])
-    
-    # Apply reviews range filter
+    df, store_idx = _unwrap(df)
     min_reviews, max_reviews = reviews_range
-    filtered_df = filtered_df[
-        (filtered_df["total_reviews"] >= min_reviews) & 
-        (filtered_df["total_reviews"] <= max_reviews)
-    ]
+
+    def _range_rows() -> pd.DataFrame:
+        # Rows with a rating and reviews inside the range (NaN never matches);
+        # only the two plotted columns, so the text columns are never copied
+        plotted = ["total_reviews", "rating"]
+        if store_idx is not None:
+            positions = np.sort(store_idx.positions("total_reviews", min_reviews, max_reviews))
+            sub = df[plotted].iloc[positions]
+            return sub[sub["rating"].notna()]
+        # the range mask is shared with the dashboard's range stats
+        return df.loc[mask(
+            df,
+            ("total_reviews", "between", (min_reviews, max_reviews)),
+            ("rating", "notna", None),
+        ), plotted]
+
+    # Pre-built indexes answer counts and histograms without touching rows
+    index = cached_heatmap_index(df)
+    filtered_df = None
+    n_rows = index.count(min_reviews, max_reviews) if index is not None else None
+    if n_rows is None and store_idx is not None:
+        n_rows = store_idx.count("total_reviews", min_reviews, max_reviews, of="rating")
+    if n_rows is None:
+        filtered_df = _range_rows()
+        n_rows = len(filtered_df)
     
     # Ensure we have data to plot
-    if len(filtered_df) == 0:
+    if n_rows == 0:
         fig = go.Figure()
         fig.add_annotation(
             text=f"لا توجد بيانات في نطاق {min_reviews}-{max_reviews} مراجعة",
@@ -373,10 +437,6 @@ def rating_reviews_heatmap(df: pd.DataFrame, *,
         )
         return fig
     
-    # Get data
-    reviews = filtered_df["total_reviews"]
-    ratings = filtered_df["rating"]
-    
     # Use the provided range for x-axis
     x_min, x_max = min_reviews, max_reviews
     if x_max <= x_min:
@@ -394,36 +454,29 @@ def rating_reviews_heatmap(df: pd.DataFrame, *,
     elif range_width <= 200:
         x_bins = min(50, int(range_width / 5))  # Bins of size ~5
     else:
-        x_bins = min(100, int(np.sqrt(len(filtered_df)) * 2))
+        x_bins = min(100, int(np.sqrt(n_rows) * 2))
     
     y_bins = 20  # Fixed for ratings 0-5
     
-    # Create 2D histogram for density
-    hist, x_edges, y_edges = np.histogram2d(
-        x=reviews,
-        y=ratings,
-        bins=[x_bins, y_bins],
-        range=[[x_min, x_max], [y_min, y_max]]
-    )
+    # Same edges np.histogram2d derives from bins + range
+    x_edges = np.linspace(x_min, x_max, int(x_bins) + 1)
+    y_edges = np.linspace(y_min, y_max, y_bins + 1)
+    hist = index.histogram(x_edges, y_edges, min_reviews, max_reviews) if index is not None else None
+    if hist is None:
+        if filtered_df is None:
+            filtered_df = _range_rows()
+        # Create 2D histogram for density
+        hist = _histogram2d(
+            filtered_df["total_reviews"].to_numpy(),
+            filtered_df["rating"].to_numpy(),
+            x_edges, y_edges,
+        )
     
     # Transpose histogram for correct orientation
     hist = hist.T
     
-    # Create hover text
-    hover_texts = []
-    for i in range(len(y_edges) - 1):
-        row_texts = []
-        for j in range(len(x_edges) - 1):
-            # Format x range based on bin width
-            x_start = int(x_edges[j])
-            x_end = int(x_edges[j+1])
-            x_range_str = f"{x_start}" if x_end - x_start <= 1 else f"{x_start}–{x_end}"
-            
-            text = (f"مراجعات: {x_range_str}<br>"
-                    f"تقييم: {y_edges[i]:.2f}–{y_edges[i+1]:.2f}<br>"
-                    f"عدد المتاجر: {int(hist[i, j])}")
-            row_texts.append(text)
-        hover_texts.append(row_texts)
+    # Hover data: per-cell numbers in customdata, formatted by the template
+    customdata, hovertemplate = _heatmap_hover(x_edges, y_edges, hist)
     
     # Calculate color scale normalization
     hist_nonzero = hist[hist > 0]
@@ -447,12 +500,14 @@ def rating_reviews_heatmap(df: pd.DataFrame, *,
         z_min, z_max = 0, 1
     
     # Create heatmap
-    fig = go.Figure(go.Heatmap(
-        z=z_data,
-        x=[(x_edges[i] + x_edges[i+1])/2 for i in range(len(x_edges)-1)],
-        y=[(y_edges[i] + y_edges[i+1])/2 for i in range(len(y_edges)-1)],
-        text=hover_texts,
-        hovertemplate="%{text}<extra></extra>",
+    # float32 halves the payload; only colour and axis placement depend on these
+    heatmap = dict(
+        type="heatmap",
+        z=z_data.astype(np.float32),
+        x=((x_edges[:-1] + x_edges[1:]) / 2).astype(np.float32),
+        y=((y_edges[:-1] + y_edges[1:]) / 2).astype(np.float32),
+        customdata=customdata,
+        hovertemplate=hovertemplate,
         colorscale = [
             [0.0, 'rgba(255, 255, 255, 0)'],   # Transparent for zero
             [0.001, "#6B2F1D"],                # Dark gray
@@ -461,34 +516,121 @@ def rating_reviews_heatmap(df: pd.DataFrame, *,
             [1.0, "#1CC741"]                   # Green teal
         ],
         
-        colorbar=dict(title=colorbar_title, tickformat=",d"),
+        colorbar=dict(title=dict(text=colorbar_title), tickformat=",d"),
         zmin=z_min,
         zmax=z_max,
         showscale=True,
-    ))
+    )
     
-    # Update layout with Arabic titles only
-    fig.update_layout(
+    # Arabic titles only; fonts and hover colours come from chart_theme
+    return make_figure([heatmap], dict(
         title=dict(
             text=f"{title}<br><span style='font-size:12px;'>نطاق المراجعات: {min_reviews}–{max_reviews}</span>",
-            font=dict(size=16, family="Noto Sans Arabic")
-        ),
-        xaxis_title="عدد التقييمات",
-        yaxis_title="التقييم",
-        font=dict(family="Noto Sans Arabic", size=12),
-        hoverlabel=dict(
-            bgcolor="#C9D2BA",
-            font_color="#202020",
-            font_family="Noto Sans Arabic",
-            font_size=12
         ),
+        font=dict(size=12),
         margin=dict(l=10, r=10, t=70, b=50),  # Increased top margin for subtitle
         height=500,
-        xaxis=dict(tickformat=",d"),
-        yaxis=dict(tickformat=".1f"),
-            # أضف هذين السطرين لتغيير الخلفية إلى رمادية:
-    plot_bgcolor='rgba(255, 255, 255, 0)',  # خلفية منطقة الرسم
+        xaxis=dict(title=dict(text="عدد التقييمات"), tickformat=",d"),
+        yaxis=dict(title=dict(text="التقييم"), tickformat=".1f"),
+        plot_bgcolor='rgba(255, 255, 255, 0)',  # خلفية منطقة الرسم (شفافة)
+    ))
+# ================================================================
+@dataclass(frozen=True)
+class StoreCard:
+    """One store as listed in a stat card."""
+    name: str               # name_ar, cut to name_width characters + "..."
+    rating: float
+    total_reviews: int
 
+
+@dataclass(frozen=True)
+class RangeSummary:
+    """Statistics and top lists of the stores with lo <= total_reviews <= hi."""
+    lo: float
+    hi: float
+    count: int
+    share: float                            # percent of all stores
+    avg_rating: float                       # NaN ratings skipped; NaN if none
+    avg_reviews: float                      # NaN if the range is empty
+    best: tuple[StoreCard, ...]             # by rating, then reviews
+    opportunities: tuple[StoreCard, ...]    # high rating, reviews <= avg_reviews
+
+
+def _column(df: pd.DataFrame, col: str, positions: np.ndarray) -> np.ndarray:
+    """*col* at *positions* as a float array, float32 kept as float32 (see query._values)."""
+    s = df[col]
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "fiu":
+        values = s.to_numpy()[positions]
+    else:
+        values = s.iloc[positions].to_numpy(dtype="float64", na_value=np.nan)
+    return values if values.dtype == np.float32 else values.astype("float64")
+
+
+def _truncate(names: pd.Series, width: int) -> pd.Series:
+    """Names longer than *width* characters cut to *width* + "..."."""
+    return names.where(names.str.len() <= width, names.str.slice(0, width) + "...")
+
+
+def _cards(df: pd.DataFrame, positions: np.ndarray, rating: np.ndarray,
+           reviews: np.ndarray, width: int) -> tuple[StoreCard, ...]:
+    names = _truncate(df["name_ar"].iloc[positions], width)
+    return tuple(
+        StoreCard(name, float(r), int(n))
+        for name, r, n in zip(names.tolist(), rating.tolist(), reviews.tolist())
+    )
+
+
+@timed
+def range_summary(data: pd.DataFrame | StoreIndex, reviews_range: tuple, *,
+                  top_n: int = 3, opportunity_rating: float = 4.5,
+                  name_width: int = 30) -> RangeSummary:
+    """
+    Everything the dashboard's range cards show, from one range mask.
+
+    The mask (shared with rating_reviews_heatmap through query.mask)
+    selects the range once; counts, means and both top lists are then
+    computed on the range's rating and total_reviews values only, and
+    store names are read for the listed stores alone.
+
+    Parameters:
+    -----------
+    data : pd.DataFrame | StoreIndex
+        The stores (or a StoreIndex over them)
+    reviews_range : tuple
+        (lo, hi) bounds on total_reviews, both inclusive
+    top_n : int
+        Stores per list
+    opportunity_rating : float
+        Minimum rating of an "opportunity": rated at least this, with no
+        more reviews than the range's average
+    name_width : int
+        Characters of name_ar kept before "..."
+
+    "best" follows top_k()'s rules on (rating, total_reviews): ties keep
+    row order, and stores without a rating are never listed.
+    "opportunities" are the first matches in row order.
+    """
+    df, _ = _unwrap(data)
+    lo, hi = reviews_range
+    rows = np.flatnonzero(mask(df, ("total_reviews", "between", (lo, hi))))
+    rating = _column(df, "rating", rows)
+    reviews = _column(df, "total_reviews", rows)
+
+    count = int(rows.size)
+    rated = ~np.isnan(rating)
+    avg_rating = float(rating[rated].mean(dtype="float64")) if rated.any() else float("nan")
+    avg_reviews = float(reviews.mean(dtype="float64")) if count else float("nan")
+
+    best = top_k_among([rating.astype("float64"), reviews], top_n)
+    opportunities = np.flatnonzero((rating >= opportunity_rating) & (reviews <= avg_reviews))[:top_n]
+    return RangeSummary(
+        lo=lo,
+        hi=hi,
+        count=count,
+        share=count / len(df) * 100 if len(df) else 0.0,
+        avg_rating=avg_rating,
+        avg_reviews=avg_reviews,
+        best=_cards(df, rows[best], rating[best], reviews[best], name_width),
+        opportunities=_cards(df, rows[opportunities], rating[opportunities],
+                             reviews[opportunities], name_width),
     )
-    
-    return fig
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""Benchmarks for the stores dashboard. Run from the repo root, e.g.
+    python -m benchmarks.bench_ingest --rows 70000
+"""
@@ -0,0 +1,200 @@
+# benchmarks/bench_analysis.py
+"""
+Time and peak memory of every public analysis.py function, against stored baselines.
+Use:
+    python -m benchmarks.bench_analysis                       # 70k, 1M and 10M rows
+    python -m benchmarks.bench_analysis --rows 70000 --check  # exit 1 on a regression
+    python -m benchmarks.bench_analysis --update              # rewrite the baselines
+
+Frames come from benchmarks.synthetic.make_compact_stores, so they carry
+the loader's dtypes. "cold" cases clear the frame's memo (business-mix
+cube, sorted indexes, heatmap index, masks) before every call; the others
+run after refresh.warm(), against the memo a dashboard rerun sees. Time
+is the best of --repeat calls; peak MB is the tracemalloc high-water mark
+of one more call (NumPy and Python allocations; Arrow buffers are not
+traced).
+
+Baselines live in bench_analysis.json, per row count. A case regresses
+when it is TIME_TOLERANCE slower or MEMORY_TOLERANCE bigger than its
+baseline, ignoring differences under the noise floors. Baselines are only
+comparable on the machine that recorded them: re-run --update after a
+hardware change, and commit the file with the change that moves them.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import inspect
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+import pandas as pd
+
+import analysis
+from benchmarks.synthetic import make_compact_stores
+from cache import frame_cache
+from query import store_index
+from refresh import warm
+from topk import top_k
+
+BASELINES = Path(__file__).with_suffix(".json")
+SIZES = [70_000, 1_000_000, 10_000_000]
+TIME_TOLERANCE = 0.5      # 50% slower than baseline
+MEMORY_TOLERANCE = 0.25   # 25% more peak memory than baseline
+NOISE_FLOOR_MS = 2.0      # smaller absolute changes are never regressions
+NOISE_FLOOR_MB = 1.0
+NEW_ROWS_RATIO = 0.01     # appended batch for the incremental cases
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    run: Callable[[pd.DataFrame, dict], Any]
+    covers: str | None = None          # public analysis function exercised
+    cold: bool = False                 # clear the frame memo before each call, else warm() it
+    max_rows: int | None = None        # skip above this size
+
+
+CASES = [
+    Case("_build_business_mix", lambda df, ctx: analysis._build_business_mix(df)),
+    Case("business_mix_cube (cold)", lambda df, ctx: analysis.business_mix_cube(df),
+         "business_mix_cube", cold=True),
+    Case("update_business_mix", lambda df, ctx: analysis.update_business_mix(ctx["cube"], ctx["new_rows"]),
+         "update_business_mix"),
+    # the combined frame is a full copy: 10M rows would need twice the frame's memory
+    Case("append_stores", lambda df, ctx: analysis.append_stores(df, ctx["new_rows"]),
+         "append_stores", max_rows=1_000_000),
+    Case("top_k rating (cold)", lambda df, ctx: top_k(df, "rating", 10), cold=True),
+    Case("top_k rating", lambda df, ctx: top_k(df, "rating", 10)),
+    Case("top_k total_reviews (cold)", lambda df, ctx: top_k(df, "total_reviews", 10), cold=True),
+    Case("_hover_customdata (top 10)", lambda df, ctx: analysis._hover_customdata(ctx["top_rows"])),
+    Case("business_mix_chart (cold)", lambda df, ctx: analysis.business_mix_chart(df), cold=True),
+    Case("business_mix_chart", lambda df, ctx: analysis.business_mix_chart(store_index(df), top_n=25, sort_by="Reviews"),
+         "business_mix_chart"),
+    Case("create_ratings_analysis_chart (cold)",
+         lambda df, ctx: analysis.create_ratings_analysis_chart(df, min_rating=4.0), cold=True),
+    Case("create_ratings_analysis_chart",
+         lambda df, ctx: analysis.create_ratings_analysis_chart(store_index(df), min_rating=4.0),
+         "create_ratings_analysis_chart"),
+    Case("create_reviews_analysis_chart",
+         lambda df, ctx: analysis.create_reviews_analysis_chart(store_index(df)),
+         "create_reviews_analysis_chart"),
+    Case("rating_reviews_heatmap (scan)",
+         lambda df, ctx: analysis.rating_reviews_heatmap(df, reviews_range=(0, 1000)), cold=True),
+    Case("rating_reviews_heatmap (index)",
+         lambda df, ctx: analysis.rating_reviews_heatmap(store_index(df), reviews_range=(0, 1000)),
+         "rating_reviews_heatmap"),
+    Case("range_summary (cold)",
+         lambda df, ctx: analysis.range_summary(df, reviews_range=(0, 1000)), cold=True),
+    Case("range_summary",
+         lambda df, ctx: analysis.range_summary(store_index(df), reviews_range=(0, 1000)),
+         "range_summary"),
+]
+
+
+def _check_coverage() -> None:
+    public = {
+        name for name, fn in inspect.getmembers(analysis, inspect.isfunction)
+        if fn.__module__ == analysis.__name__ and not name.startswith("_")
+    }
+    missing = public - {case.covers for case in CASES}
+    if missing:
+        raise SystemExit(f"no benchmark case for analysis.{', analysis.'.join(sorted(missing))}")
+
+
+def _measure(case: Case, df: pd.DataFrame, ctx: dict, repeat: int) -> dict:
+    def prepare() -> None:
+        if case.cold:
+            frame_cache(df).clear()
+        else:
+            warm(df)
+
+    prepare()
+    case.run(df, ctx)  # warm-up: lazy imports, per-key memo entries
+    best = float("inf")
+    for _ in range(repeat):
+        prepare()
+        t = time.perf_counter()
+        case.run(df, ctx)
+        best = min(best, time.perf_counter() - t)
+
+    prepare()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run(df, ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"ms": round(best * 1000, 2), "peak_mb": round(peak / 1e6, 2)}
+
+
+def _regressions(result: dict, baseline: dict | None) -> list[str]:
+    if baseline is None:
+        return []
+    found = []
+    if result["ms"] - baseline["ms"] > max(NOISE_FLOOR_MS, baseline["ms"] * TIME_TOLERANCE):
+        found.append(f"time {baseline['ms']:.1f} -> {result['ms']:.1f} ms")
+    if result["peak_mb"] - baseline["peak_mb"] > max(NOISE_FLOOR_MB, baseline["peak_mb"] * MEMORY_TOLERANCE):
+        found.append(f"memory {baseline['peak_mb']:.1f} -> {result['peak_mb']:.1f} MB")
+    return found
+
+
+def _context(df: pd.DataFrame, rows: int) -> dict:
+    new_rows = make_compact_stores(max(1, int(rows * NEW_ROWS_RATIO)), seed=rows)
+    return {
+        "cube": analysis.business_mix_cube(df),
+        "new_rows": new_rows,
+        "top_rows": top_k(df, "total_reviews", 10),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, action="append", help="dataset sizes (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="exit 1 if any case regressed")
+    parser.add_argument("--update", action="store_true", help="store these results as the baselines")
+    args = parser.parse_args()
+    _check_coverage()
+
+    stored = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {}
+    failures = []
+    print(f"{'rows':>10} {'case':>38} {'ms':>10} {'peak MB':>9} {'base ms':>9} {'base MB':>8}  status")
+    for rows in args.rows or SIZES:
+        df = make_compact_stores(rows)
+        ctx = _context(df, rows)
+        measured = {}
+        for case in CASES:
+            if case.max_rows is not None and rows > case.max_rows:
+                print(f"{rows:>10,} {case.name:>38} {'skipped':>10}")
+                continue
+            result = measured[case.name] = _measure(case, df, ctx, args.repeat)
+            baseline = stored.get("results", {}).get(str(rows), {}).get(case.name)
+            problems = _regressions(result, baseline)
+            failures += [f"{rows:,} rows, {case.name}: {p}" for p in problems]
+            base_ms, base_mb = (f"{baseline['ms']:.1f}", f"{baseline['peak_mb']:.1f}") if baseline else ("-", "-")
+            status = "REGRESSED" if problems else ("ok" if baseline else "new")
+            print(f"{rows:>10,} {case.name:>38} {result['ms']:>10.1f} {result['peak_mb']:>9.1f} "
+                  f"{base_ms:>9} {base_mb:>8}  {status}")
+        if args.update:  # per size, so a later size running out of memory keeps these
+            machine = f"{platform.machine()} {platform.processor() or platform.system()}, " \
+                      f"Python {platform.python_version()}, pandas {pd.__version__}"
+            stored = {"machine": machine, "results": {**stored.get("results", {}), str(rows): measured}}
+            BASELINES.write_text(json.dumps(stored, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            print(f"{rows:>10,} baselines written to {BASELINES.name}")
+        del df, ctx
+        gc.collect()
+
+    if failures:
+        print("\nregressions:\n  " + "\n  ".join(failures))
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_download.py
+"""
+download.fetch against a local stand-in server: 304, resume, retries, gzip.
+Use:
+    python -m benchmarks.bench_download --rows 200000
+
+The stand-in serves strong ETags, Last-Modified, Range / If-Range and gzip,
+and can be told to fail: "?fail=N" answers 503 to the first N requests,
+"?drop=F" cuts the first response after fraction F of the body. Every
+scenario checks the parsed frame against the source and prints the body
+bytes the server actually sent.
+"""
+from __future__ import annotations
+import argparse
+import email.utils
+import gzip
+import hashlib
+import http.server
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import pandas as pd
+import requests
+
+import download
+from benchmarks.synthetic import make_stores
+from dataset import read_stores_csv
+from download import fetch, open_body
+
+
+class _StandIn(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, so the session pool is used
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        srv = self.server
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with srv.lock:
+            srv.requests += 1
+            failing = srv.requests <= int(query.get("fail", 0))
+            dropping = srv.requests == 1 and "drop" in query
+        if failing:
+            return self._send(503, {}, b"")
+
+        plain = srv.body
+        gz = "gzip" in query and "gzip" in self.headers.get("Accept-Encoding", "")
+        body = srv.gzipped if gz else plain
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        headers = {"ETag": etag, "Last-Modified": srv.modified, "Accept-Ranges": "bytes"}
+        if gz:
+            headers["Content-Encoding"] = "gzip"
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers, b"")
+
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") in (etag, srv.modified):
+            start = int(rng.split("=")[1].rstrip("-"))
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            return self._send(206, headers, body[start:])
+        if dropping:
+            return self._send(200, headers, body, cut=int(len(body) * float(query["drop"])))
+        self._send(200, headers, body)
+
+    def _send(self, status: int, headers: dict, body: bytes, cut: int | None = None) -> None:
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        sent = body if cut is None else body[:cut]
+        self.wfile.write(sent)
+        with self.server.lock:
+            self.server.bytes_sent += len(sent)
+        if cut is not None:
+            self.close_connection = True
+
+
+def _serve(body: bytes) -> tuple[http.server.ThreadingHTTPServer, str]:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    server.body, server.gzipped = body, gzip.compress(body)
+    server.modified = email.utils.formatdate(usegmt=True)
+    server.lock = threading.Lock()
+    server.requests = server.bytes_sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/stores.csv"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    download.BACKOFF_S = 0.05   # keep the retry scenario short
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = Path(tmp, "stores.csv")
+        make_stores(args.rows).to_csv(csv, index=False)
+        expected = read_stores_csv(csv)
+        server, url = _serve(csv.read_bytes())
+        dest = Path(tmp, "body")
+
+        def run(name: str, query: str = "", **validators) -> download.FetchResult:
+            server.requests = server.bytes_sent = 0
+            t = time.perf_counter()
+            res = fetch(url + query, dest, **validators)
+            ms = (time.perf_counter() - t) * 1000
+            if not res.not_modified:
+                with open_body(res.path) as fh:
+                    pd.testing.assert_frame_equal(read_stores_csv(fh), expected)
+            print(f"{name:>16} {res.status:>6} {res.attempts:>8} {res.resumed_from / 1e6:>11.2f} "
+                  f"{server.bytes_sent / 1e6:>9.2f} {ms:>8.0f}")
+            return res
+
+        print(f"{'scenario':>16} {'status':>6} {'attempts':>8} {'resumed MB':>11} {'sent MB':>9} {'ms':>8}")
+        first = run("cold")
+        assert run("unchanged", **first.validators).status == 304
+        assert run("dropped at 40%", "?drop=0.4").resumed_from > 0
+        assert run("503 x2", "?fail=2").attempts == 3
+        run("gzip", "?gzip=1")
+        try:
+            run("503 forever", "?fail=99")
+        except requests.RequestException as exc:
+            print(f"{'503 forever':>16} raised {type(exc).__name__} after {server.requests} requests")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_figures.py
+"""
+Figure build time: one-shot chart_theme.make_figure() vs add_trace() + update_layout().
+Use:
+    python -m benchmarks.bench_figures --rows 70000
+
+Each chart builder is run once with make_figure() wrapped, to capture the
+exact traces and layout it asks for. Those are then built both ways: the
+factory's single go.Figure(dict) call, and the add_trace() /
+update_layout() sequence the builders used before. The dashboard's layout
+overrides are applied the same two ways (dict merge in cached_figure vs
+update_layout). Payloads must match; "builder ms" is the full builder,
+data work included.
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import analysis
+from benchmarks.synthetic import make_stores
+from chart_theme import TEMPLATE, make_figure, merge_layout
+from heatmap_index import build_heatmap_index
+from query import store_index
+
+BAR_OVERRIDES = dict(margin=dict(l=120, r=50, t=50, b=50),
+                     yaxis=dict(tickfont=dict(size=12), automargin=True, title_standoff=20))
+HEATMAP_OVERRIDES = dict(height=500, margin=dict(l=50, r=50, t=80, b=50))
+
+CHARTS = {
+    "business_mix": (analysis.business_mix_chart, {}, BAR_OVERRIDES),
+    "ratings": (analysis.create_ratings_analysis_chart, {"min_rating": 4.0}, BAR_OVERRIDES),
+    "reviews": (analysis.create_reviews_analysis_chart, {}, BAR_OVERRIDES),
+    "heatmap": (analysis.rating_reviews_heatmap, {"reviews_range": (0, 1000)}, HEATMAP_OVERRIDES),
+}
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def _capture(builder, idx, kwargs) -> tuple[list[dict], dict]:
+    seen = []
+    def recorder(traces, layout, **kw):
+        seen.append((traces, layout))
+        return make_figure(traces, layout, **kw)
+    analysis.make_figure = recorder
+    try:
+        builder(idx, **kwargs)
+    finally:
+        analysis.make_figure = make_figure
+    return seen[0]
+
+
+def _legacy(traces: list[dict], layout: dict, overrides: dict) -> dict:
+    fig = go.Figure()
+    for trace in traces:
+        fig.add_trace(trace)
+    fig.update_layout(merge_layout(pio.templates[TEMPLATE].layout.to_plotly_json(), layout))
+    fig.update_layout(**overrides)
+    return fig.to_dict()
+
+
+def _factory(traces: list[dict], layout: dict, overrides: dict) -> dict:
+    payload = make_figure(traces, layout).to_dict()
+    payload["layout"] = merge_layout(payload["layout"], go.Layout(overrides).to_plotly_json())
+    return payload
+
+
+def _normalised(payload: dict):
+    # update_layout leaves empty dicts behind (e.g. yaxis.title={}) and orders keys differently
+    def prune(o):
+        if isinstance(o, dict):
+            o = {k: prune(v) for k, v in o.items()}
+            return {k: v for k, v in o.items() if v != {}}
+        if isinstance(o, list):
+            return [prune(v) for v in o]
+        return o
+    return prune(json.loads(pio.to_json(payload, validate=False)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=70_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_stores(args.rows)
+    idx = store_index(df)
+    build_heatmap_index(df)
+
+    print(f"{'chart':>13} {'builder ms':>11} {'legacy ms':>10} {'factory ms':>11} {'speedup':>8}")
+    for name, (builder, kwargs, overrides) in CHARTS.items():
+        traces, layout = _capture(builder, idx, kwargs)
+        assert _normalised(_legacy(traces, layout, overrides)) == \
+            _normalised(_factory(traces, layout, overrides)), name
+        builder_ms = _best_ms(lambda: builder(idx, **kwargs), args.repeat)
+        legacy_ms = _best_ms(lambda: _legacy(traces, layout, overrides), args.repeat)
+        factory_ms = _best_ms(lambda: _factory(traces, layout, overrides), args.repeat)
+        print(f"{name:>13} {builder_ms:>11.1f} {legacy_ms:>10.1f} {factory_ms:>11.1f} "
+              f"{legacy_ms / factory_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_heatmap.py
+"""
+rating_reviews_heatmap latency: row scan vs pre-binned heatmap index.
+Use:
+    python -m benchmarks.bench_heatmap --rows 70000 --rows 1000000
+
+Indexed latency should stay flat as rows grow; the scan grows linearly.
+Every indexed figure is checked against the scanned one.
+"""
+from __future__ import annotations
+import argparse
+import time
+import numpy as np
+
+from analysis import rating_reviews_heatmap
+from benchmarks.synthetic import make_stores
+from heatmap_index import build_heatmap_index
+
+RANGES = [(0, 100), (100, 500), (500, 1000), (1000, 5000), (0, 20_000)]
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, action="append", help="dataset sizes (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'range':>14} {'scan ms':>9} {'index ms':>9} {'build ms':>9}")
+    for rows in args.rows or [70_000, 1_000_000]:
+        scanned = make_stores(rows)
+        indexed = scanned.copy()
+        t = time.perf_counter()
+        build_heatmap_index(indexed)
+        build_ms = (time.perf_counter() - t) * 1000
+
+        for lo, hi in RANGES:
+            a = rating_reviews_heatmap(scanned, reviews_range=(lo, hi))
+            b = rating_reviews_heatmap(indexed, reviews_range=(lo, hi))
+            assert np.array_equal(np.asarray(a.data[0].z), np.asarray(b.data[0].z)), (lo, hi)
+
+            scan_ms = _best_ms(lambda: rating_reviews_heatmap(scanned, reviews_range=(lo, hi)), args.repeat)
+            index_ms = _best_ms(lambda: rating_reviews_heatmap(indexed, reviews_range=(lo, hi)), args.repeat)
+            print(f"{rows:>10,} {f'{lo}-{hi}':>14} {scan_ms:>9.1f} {index_ms:>9.1f} {build_ms:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_ingest.py
+"""
+Peak RSS and wall time of a cold CSV load: buffered vs streaming ingestion.
+Use:
+    python -m benchmarks.bench_ingest --rows 70000 --rows 1000000
+
+Each measurement runs in a fresh interpreter (peak RSS never goes down) and
+downloads from a local HTTP server, with an empty snapshot cache.
+"""
+from __future__ import annotations
+import argparse
+import functools
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_stores
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss survives fork+exec on Linux (it would report the parent's
+    # peak), so prefer the per-address-space high-water mark
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _child(mode: str, url: str) -> None:
+    import pandas as pd  # noqa: F401  (baseline RSS includes pandas)
+    from dataset import load_stores_data
+
+    base = _peak_rss_mb()
+    t = time.perf_counter()
+    df = load_stores_data(url, stream=(mode == "stream"))
+    elapsed = time.perf_counter() - t
+    print(json.dumps({
+        "rows": len(df),
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "delta_rss_mb": round(_peak_rss_mb() - base, 1),
+    }))
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _serve(directory: str) -> tuple[http.server.ThreadingHTTPServer, str]:
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, action="append", help="dataset sizes (repeatable)")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base_url = _serve(tmp)
+        print(f"{'rows':>10} {'mode':>8} {'csv MB':>8} {'seconds':>8} {'peak MB':>8} {'delta MB':>9}")
+        for rows in args.rows or [70_000]:
+            csv = Path(tmp, f"stores-{rows}.csv")
+            make_stores(rows).to_csv(csv, index=False)
+            size_mb = csv.stat().st_size / 1e6
+            for mode in ("buffered", "stream"):
+                env = dict(os.environ, MAROOF_CACHE_DIR=tempfile.mkdtemp(dir=tmp))
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ingest", "--child", mode, f"{base_url}/{csv.name}"],
+                    env=env, capture_output=True, text=True, check=True,
+                )
+                res = json.loads(out.stdout)
+                print(f"{rows:>10,} {mode:>8} {size_mb:>8.1f} {res['seconds']:>8.2f} "
+                      f"{res['peak_rss_mb']:>8.1f} {res['delta_rss_mb']:>9.1f}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_kpis.py
+"""
+Dashboard header and tab metrics: kpis.store_kpis() vs per-rerun aggregates.
+Use:
+    python -m benchmarks.bench_kpis --rows 1000000
+
+Per rerun the dashboard needs the store count, mean rating, review sum,
+stores rated >= 4.5 and >= the tab's slider value, mean and max reviews.
+
+    filtered   the original page: len(df[df['rating'] >= 4.5]) copies
+               the matching rows just to count them
+    index      the page before kpis: pandas reductions per rerun, counts
+               from the warm StoreIndex
+    kpis       store_kpis(df) on a built record (every rerun after the first)
+    build      build_kpis(df): the one pass per dataset version
+
+"per type" adds the same metrics for every business_type_ar: a pandas
+groupby per rerun vs the record's by_type. Values must match.
+"""
+from __future__ import annotations
+import argparse
+import math
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_compact_stores
+from kpis import HIGH_RATING, build_kpis, store_kpis
+from query import store_index
+from refresh import warm
+
+SLIDER = 4.2
+
+
+def _filtered(df, idx) -> tuple:
+    return (len(df), df["rating"].mean(), df["total_reviews"].sum(),
+            len(df[df["rating"] >= HIGH_RATING]), len(df[df["rating"] >= SLIDER]),
+            df["total_reviews"].mean(), int(df["total_reviews"].max()))
+
+
+def _index(df, idx) -> tuple:
+    return (len(df), df["rating"].mean(), df["total_reviews"].sum(),
+            idx.count("rating", HIGH_RATING), idx.count("rating", SLIDER),
+            df["total_reviews"].mean(), int(df["total_reviews"].max()))
+
+
+def _kpis(df, idx) -> tuple:
+    k = store_kpis(df)
+    return (k.stores, k.avg_rating, k.total_reviews, k.at_least(HIGH_RATING),
+            k.at_least(SLIDER), k.avg_reviews, k.max_reviews)
+
+
+def _groupby(df, idx):
+    return df.groupby("business_type_ar", observed=True).agg(
+        stores=("rating", "size"), rated=("rating", "count"), avg_rating=("rating", "mean"),
+        total_reviews=("total_reviews", "sum"), avg_reviews=("total_reviews", "mean"),
+    )
+
+
+def _by_type(df, idx):
+    return store_kpis(df).by_type
+
+
+def _same(a: tuple, b: tuple) -> bool:
+    # pandas averages float32 ratings in float32; kpis accumulates in float64
+    return all(math.isclose(x, y, rel_tol=1e-6) for x, y in zip(a, b))
+
+
+def _best_ms(fn, df, idx, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(df, idx)
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_compact_stores(args.rows)
+    warm(df)
+    idx = store_index(df)
+
+    expected = _filtered(df, idx)
+    assert _same(_index(df, idx), expected) and _same(_kpis(df, idx), expected), expected
+    grouped = _groupby(df, idx)
+    by_type = _by_type(df, idx)
+    assert len(by_type) == len(grouped)
+    for t in by_type:
+        row = grouped.loc[t.business_type]
+        assert (t.stores, t.rated, t.total_reviews) == (row.stores, row.rated, row.total_reviews)
+        assert np.isclose(t.avg_rating, row.avg_rating, rtol=1e-6, equal_nan=True)
+        assert math.isclose(t.avg_reviews, row.avg_reviews)
+
+    cases = [("headline", "filtered", _filtered), ("headline", "index", _index),
+             ("headline", "kpis", _kpis), ("per type", "groupby", _groupby),
+             ("per type", "kpis", _by_type)]
+    print(f"{'metrics':>9} {'mode':>9} {'ms per rerun':>13}")
+    for metrics, mode, fn in cases:
+        print(f"{metrics:>9} {mode:>9} {_best_ms(fn, df, idx, args.repeat):>13.3f}")
+    build = _best_ms(lambda df, idx: build_kpis(df), df, idx, args.repeat)
+    print(f"{'both':>9} {'build':>9} {build:>13.3f}  (once per dataset version)")
+
+
+if __name__ == "__main__":
+    main()
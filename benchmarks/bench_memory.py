@@ -0,0 +1,38 @@
+# benchmarks/bench_memory.py
+"""
+Per-column memory of the stores frame: plain read_csv vs the compact load.
+Use:
+    python -m benchmarks.bench_memory --rows 70000
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+from pathlib import Path
+import pandas as pd
+
+from benchmarks.synthetic import make_stores
+from dataset import read_stores_csv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=70_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv = Path(tmp, "stores.csv")
+        make_stores(args.rows).to_csv(csv, index=False)
+        plain = pd.read_csv(csv)
+        compact = read_stores_csv(csv)
+
+    before = plain.memory_usage(deep=True)
+    after = compact.memory_usage(deep=True)
+    print(f"{'column':>18} {'dtype':>10} {'before MB':>10} {'dtype':>10} {'after MB':>9}")
+    for col in plain.columns:
+        print(f"{col:>18} {str(plain[col].dtype):>10} {before[col] / 1e6:>10.2f} "
+              f"{str(compact[col].dtype):>10} {after[col] / 1e6:>9.2f}")
+    print(f"{'total':>18} {'':>10} {before.sum() / 1e6:>10.2f} {'':>10} {after.sum() / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
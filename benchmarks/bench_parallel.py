@@ -0,0 +1,86 @@
+# benchmarks/bench_parallel.py
+"""
+Chunked aggregations on the parallel.py thread pool, by worker count.
+Use:
+    python -m benchmarks.bench_parallel --rows 5000000 --workers 1 --workers 2 --workers 4
+
+Cases are the three chunked paths, called with an explicit worker count:
+
+    business mix   analysis._build_business_mix: both groupbys over
+                   disjoint sets of whole groups
+    heatmap scan   analysis._histogram2d of every rated store with at most
+                   1000 reviews: counts summed over row chunks
+    top-N          topk.top_k_among on (rating, total_reviews), k=10: per-chunk
+                   candidates ranked again
+
+Every result must equal the 1-worker result exactly. Speedup is relative
+to 1 worker and is bounded by the CPUs this machine has (printed first):
+on a single CPU the pool only adds its dispatch cost.
+"""
+from __future__ import annotations
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import analysis
+from benchmarks.synthetic import make_compact_stores
+from topk import top_k_among
+
+X_EDGES = np.linspace(0, 1000, 101)
+Y_EDGES = np.linspace(0, 5, 21)
+
+
+def _cases(df: pd.DataFrame) -> dict:
+    reviews = df["total_reviews"].to_numpy()
+    rating = df["rating"].to_numpy()
+    keep = ~np.isnan(rating) & (reviews <= 1000)
+    x, y = reviews[keep], rating[keep]
+    keys = [df["rating"].to_numpy(dtype="float64", na_value=np.nan),
+            df["total_reviews"].to_numpy(dtype="float64", na_value=np.nan)]
+    return {
+        "business mix": lambda w: analysis._build_business_mix(df, workers=w),
+        "heatmap scan": lambda w: analysis._histogram2d(x, y, X_EDGES, Y_EDGES, workers=w),
+        "top-N": lambda w: top_k_among(keys, 10, w),
+    }
+
+
+def _equal(a, b) -> bool:
+    if isinstance(a, pd.DataFrame):
+        return a.equals(b)
+    return np.array_equal(a, b)
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--workers", type=int, action="append", help="worker counts (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    counts = sorted(set([1, *(args.workers or [2, 4, os.cpu_count() or 1])]))
+
+    print(f"CPUs available: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+    df = make_compact_stores(args.rows)
+    print(f"{'case':>13} {'workers':>8} {'ms':>9} {'speedup':>8}")
+    for name, run in _cases(df).items():
+        serial = run(1)
+        base = _best_ms(lambda: run(1), args.repeat)
+        for w in counts:
+            assert _equal(run(w), serial), (name, w)
+            ms = base if w == 1 else _best_ms(lambda: run(w), args.repeat)
+            print(f"{name:>13} {w:>8} {ms:>9.1f} {base / ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
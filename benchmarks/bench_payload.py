@@ -0,0 +1,75 @@
+# benchmarks/bench_payload.py
+"""
+Per-chart Plotly payload size and serialisation time, plain vs frozen figures.
+Use:
+    python -m benchmarks.bench_payload --rows 70000
+
+"serialise" is what st.plotly_chart does on every rerun: to_dict() then
+plotly.io.to_json(validate=False). A plain go.Figure deep-copies itself
+each time; a cached FrozenFigure hands over its pre-validated payload.
+"""
+from __future__ import annotations
+import argparse
+import gzip
+import time
+import plotly.io as pio
+
+from analysis import (
+    business_mix_chart,
+    create_ratings_analysis_chart,
+    create_reviews_analysis_chart,
+    rating_reviews_heatmap,
+)
+from benchmarks.synthetic import make_stores
+from figure_cache import cached_figure
+from heatmap_index import build_heatmap_index
+from query import store_index
+
+CHARTS = {
+    "business_mix": (business_mix_chart, {}),
+    "ratings": (create_ratings_analysis_chart, {"min_rating": 4.0}),
+    "reviews": (create_reviews_analysis_chart, {}),
+    "heatmap": (rating_reviews_heatmap, {"reviews_range": (0, 1000)}),
+}
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def _serialise(fig) -> str:
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=70_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_stores(args.rows)
+    idx = store_index(df)
+    build_heatmap_index(df)
+
+    print(f"{'chart':>13} {'KB':>7} {'gzip KB':>8} {'build ms':>9} {'plain ms':>9} {'frozen ms':>10}")
+    for name, (builder, kwargs) in CHARTS.items():
+        build_ms = _best_ms(lambda: builder(idx, **kwargs), 3)
+        plain = builder(idx, **kwargs)
+        frozen = cached_figure(builder, idx, **kwargs)
+        payload = _serialise(frozen)
+        assert payload == _serialise(plain), name
+        size = len(payload.encode("utf-8"))
+        packed = len(gzip.compress(payload.encode("utf-8")))
+        plain_ms = _best_ms(lambda: _serialise(plain), args.repeat)
+        frozen_ms = _best_ms(lambda: _serialise(frozen), args.repeat)
+        print(f"{name:>13} {size / 1e3:>7.1f} {packed / 1e3:>8.1f} {build_ms:>9.1f} "
+              f"{plain_ms:>9.2f} {frozen_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_perf.py
+"""
+Cost of perf.py's spans per call, instrumentation off and on.
+Use:
+    python -m benchmarks.bench_perf
+
+"span" is an empty `with span(...)` block and "timed" a call through an
+@timed wrapper, each against a bare call of an empty function. The
+disabled cost per dashboard rerun is the per-span cost times the spans a
+full rerun enters (about RERUN_SPANS, as listed with ?perf=1); the chart
+builders alone take milliseconds per call.
+"""
+from __future__ import annotations
+import argparse
+import time
+
+import perf
+from perf import begin_rerun, end_rerun, span, timed
+
+MAX_DISABLED_NS = 1_000      # per span, instrumentation off
+RERUN_SPANS = 25             # spans a full dashboard rerun enters
+
+
+def _noop() -> None:
+    pass
+
+
+_timed_noop = timed(_noop)
+
+
+def _per_call_ns(fn, n: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        t = time.perf_counter_ns()
+        for _ in range(n):
+            fn()
+        best = min(best, (time.perf_counter_ns() - t) / n)
+    return best
+
+
+def _with_span() -> None:
+    with span("bench"):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    perf.PROM_PATH = None  # never write the exposition file from here
+
+    print(f"{'case':>8} {'state':>9} {'bare ns':>10} {'with ns':>10} {'overhead ns':>12}")
+    costs = {}
+    for state in ("disabled", "enabled"):
+        begin_rerun("bench", enabled=state == "enabled")
+        try:
+            base = _per_call_ns(_noop, args.calls)
+            for case, fn in (("span", _with_span), ("timed", _timed_noop)):
+                cost = _per_call_ns(fn, args.calls)
+                costs[case, state] = cost - base
+                print(f"{case:>8} {state:>9} {base:>10,.0f} {cost:>10,.0f} {cost - base:>12,.0f}")
+        finally:
+            end_rerun()
+
+    per_rerun_us = max(costs["span", "disabled"], costs["timed", "disabled"]) * RERUN_SPANS / 1000
+    print(f"\ndisabled: ~{per_rerun_us:.1f} us per rerun ({RERUN_SPANS} spans)")
+    assert costs["span", "disabled"] < MAX_DISABLED_NS, costs
+    assert costs["timed", "disabled"] < MAX_DISABLED_NS, costs
+
+
+if __name__ == "__main__":
+    main()
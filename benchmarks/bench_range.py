@@ -0,0 +1,111 @@
+# benchmarks/bench_range.py
+"""
+Heatmap-tab range cards: analysis.range_summary() + cards vs the page's old code.
+Use:
+    python -m benchmarks.bench_range --rows 1000000
+
+"before" is the tab's previous sequence on a warm StoreIndex: count,
+materialise the range (idx.rows), two means, sort_values over the whole
+range for the best stores, a boolean filter for the opportunities, then
+iterrows() into inline-styled HTML. "after" is range_summary() and
+cards.range_cards(); "after (cold)" first drops the memoised range
+masks. Values must match (means to float rounding).
+"""
+from __future__ import annotations
+import argparse
+import math
+import time
+
+from analysis import range_summary
+from benchmarks.synthetic import make_compact_stores
+from cache import frame_cache
+from cards import range_cards
+from query import store_index
+from refresh import warm
+
+RANGES = [(0, 100), (100, 500), (500, 1000), (1000, 5000), (5000, 250_000)]
+
+
+def _legacy(idx, lo: int, hi: int):
+    n = idx.count("total_reviews", lo, hi)
+    if n == 0:
+        return None
+    filtered = idx.rows("total_reviews", lo, hi)
+    avg_rating = idx.mean("total_reviews", lo, hi, of="rating")
+    avg_reviews = idx.mean("total_reviews", lo, hi, of="total_reviews")
+    best = filtered.sort_values(["rating", "total_reviews"], ascending=[False, False]).head(3)
+    opportunities = filtered[
+        (filtered["rating"] >= 4.5) & (filtered["total_reviews"] <= avg_reviews)
+    ].head(3)
+    html = ""
+    for stores in (best, opportunities):
+        for _, row in stores.iterrows():
+            name = row["name_ar"][:30] + "..." if len(row["name_ar"]) > 30 else row["name_ar"]
+            html += f"""
+            <li style="margin-bottom: 12px; padding: 14px 16px; background-color: #161b1c;
+                border-left: 3px solid #2C7D8B; list-style-type: none; box-shadow: 0 6px 14px rgba(0,0,0,0.35);">
+                <strong style="color: #C9D2BA;">{name}</strong><br>
+                <span style="color: #2C7D8B;">⭐ {round(float(row['rating']), 2)}/5</span>
+                &nbsp;|&nbsp;
+                <span style="color: #2A927A;">📝 {row['total_reviews']:,}</span>
+            </li>
+            """
+    return n, avg_rating, avg_reviews, best, opportunities, html
+
+
+def _rows(stores) -> list[tuple]:
+    return [(name[:30] + "..." if len(name) > 30 else name, float(r), int(n))
+            for name, r, n in zip(stores["name_ar"], stores["rating"], stores["total_reviews"])]
+
+
+def _check(idx, lo: int, hi: int) -> None:
+    legacy = _legacy(idx, lo, hi)
+    summary = range_summary(idx, (lo, hi))
+    if legacy is None:
+        assert summary.count == 0, (lo, hi)
+        return
+    n, avg_rating, avg_reviews, best, opportunities, _ = legacy
+    assert summary.count == n, (lo, hi)
+    assert math.isclose(summary.avg_rating, avg_rating, rel_tol=1e-9), (lo, hi)
+    assert math.isclose(summary.avg_reviews, avg_reviews, rel_tol=1e-9), (lo, hi)
+    # the old sort listed unrated stores last; only a range with < 3 rated stores differs
+    best = best[best["rating"].notna()]
+    assert [(c.name, c.rating, c.total_reviews) for c in summary.best] == _rows(best), (lo, hi)
+    assert [(c.name, c.rating, c.total_reviews) for c in summary.opportunities] == _rows(opportunities), (lo, hi)
+
+
+def _best_ms(fn, repeat: int, before=None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_compact_stores(args.rows)
+    warm(df)
+    idx = store_index(df)
+    drop_masks = lambda: frame_cache(df).pop("masks", None)
+
+    print(f"{'range':>15} {'stores':>10} {'before ms':>10} {'after ms':>9} {'cold ms':>8} {'speedup':>8}")
+    for lo, hi in RANGES:
+        _check(idx, lo, hi)
+        after = lambda: range_cards(range_summary(idx, (lo, hi)))
+        before_ms = _best_ms(lambda: _legacy(idx, lo, hi), args.repeat)
+        after_ms = _best_ms(after, args.repeat)
+        cold_ms = _best_ms(after, args.repeat, before=drop_masks)
+        print(f"{f'{lo}-{hi}':>15} {idx.count('total_reviews', lo, hi):>10,} {before_ms:>10.1f} "
+              f"{after_ms:>9.1f} {cold_ms:>8.1f} {before_ms / after_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_shared.py
+"""
+Resident memory of N worker processes: private heap copies vs the shared store.
+Use:
+    python -m benchmarks.bench_shared --rows 1000000 --workers 4
+
+Each worker loads the stores frame (heap: load_stores_versioned, shared:
+load_stores_shared), touches every column, then idles while the parent reads
+VmRSS and Pss from /proc. Pss splits shared pages between the processes
+mapping them, so its total is the real host-wide footprint. Linux only.
+"""
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_ingest import _serve
+from benchmarks.synthetic import make_stores
+
+
+def _child(mode: str, url: str) -> None:
+    from dataset import load_stores_shared, load_stores_versioned
+
+    t = time.perf_counter()
+    load = load_stores_shared if mode == "shared" else load_stores_versioned
+    df, _ = load(url)
+    # fault every page in, as a dashboard rerun would
+    df["rating"].sum(), df["total_reviews"].sum(), df["name_ar"].str.len().sum()
+    print(f"ready {time.perf_counter() - t:.3f}", flush=True)
+    sys.stdin.read()
+
+
+def _memory_mb(pid: int) -> tuple[float, float]:
+    """(VmRSS, Pss) of *pid* in MB."""
+    rss = pss = 0
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            if line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base_url = _serve(tmp)
+        make_stores(args.rows).to_csv(Path(tmp, "stores.csv"), index=False)
+        url = f"{base_url}/stores.csv"
+        env = dict(os.environ, MAROOF_CACHE_DIR=str(Path(tmp, "cache")))
+        cmd = [sys.executable, "-m", "benchmarks.bench_shared", "--child"]
+        # warm the snapshot and the shared store so workers measure steady state
+        for mode in ("heap", "shared"):
+            subprocess.run(cmd + [mode, url], env=env, input="", capture_output=True, check=True)
+
+        print(f"{'mode':>8} {'workers':>8} {'load s':>8} {'RSS MB':>9} {'PSS MB':>9}")
+        for mode in ("heap", "shared"):
+            procs = [subprocess.Popen(cmd + [mode, url], env=env, text=True,
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                     for _ in range(args.workers)]
+            seconds = max(float(p.stdout.readline().split()[1]) for p in procs)
+            usage = [_memory_mb(p.pid) for p in procs]
+            for p in procs:
+                p.communicate("")
+            print(f"{mode:>8} {args.workers:>8} {seconds:>8.2f} "
+                  f"{sum(u[0] for u in usage):>9.1f} {sum(u[1] for u in usage):>9.1f}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
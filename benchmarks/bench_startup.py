@@ -0,0 +1,113 @@
+# benchmarks/bench_startup.py
+"""
+Cold start of the landing page: import time, time to first render, data ready.
+Use:
+    python -m benchmarks.bench_startup --rows 70000
+
+Each mode runs in a fresh interpreter with Streamlit already imported (as
+in a server process before its first session), an empty snapshot cache,
+and the CSV served from a local HTTP server through MAROOF_STORES_URL.
+Times are measured from the start of the page's own work:
+
+    before   the page's previous imports (pandas, numpy, plotly.express,
+             dataset, refresh), then the blocking REGISTRY load, then
+             the page itself
+    after    the page as it is: its imports, then the page, with the
+             load running in startup.preload_stores()' thread
+
+"import" is the page's top-level imports, "first render" the end of the
+first script run (AppTest), "data ready" the moment a snapshot is
+published (the dashboard no longer waits on it).
+"""
+from __future__ import annotations
+import argparse
+import ast
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_ingest import _serve
+from benchmarks.synthetic import make_stores
+
+HOME = Path(__file__).resolve().parents[1] / "الصفحة الرئيسة.py"
+LEGACY_IMPORTS = ["theme", "pandas", "numpy", "plotly.express", "dataset", "refresh", "perf"]
+READY_TIMEOUT_S = 300
+
+
+def _page_imports() -> list[str]:
+    tree = ast.parse(HOME.read_text(encoding="utf-8"))
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names.append(node.module)
+    return names
+
+
+def _child(mode: str) -> None:
+    import streamlit  # noqa: F401  (loaded by the server before any script runs)
+
+    t0 = time.perf_counter()
+    for name in (LEGACY_IMPORTS if mode == "before" else _page_imports()):
+        importlib.import_module(name)
+    imported = time.perf_counter()
+    if mode == "before":
+        from dataset import REGISTRY
+        REGISTRY.get()
+    # the test harness imports pandas itself: keep that out of the page's time
+    t = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness = time.perf_counter() - t
+    at = AppTest.from_file(str(HOME), default_timeout=READY_TIMEOUT_S).run()
+    rendered = time.perf_counter() - harness
+    assert not at.exception, [e.value for e in at.exception]
+
+    from dataset import REGISTRY
+    while REGISTRY.peek() is None and time.perf_counter() - t0 < READY_TIMEOUT_S:
+        time.sleep(0.01)
+    ready = time.perf_counter() - harness
+    print(json.dumps({
+        "import_ms": round((imported - t0) * 1000, 1),
+        "render_ms": round((rendered - t0) * 1000, 1),
+        "ready_ms": round((ready - t0) * 1000, 1),
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=70_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base_url = _serve(tmp)
+        make_stores(args.rows).to_csv(Path(tmp, "stores.csv"), index=False)
+        best = {}
+        for _ in range(args.repeat):
+            for mode in ("before", "after"):
+                env = dict(os.environ, MAROOF_CACHE_DIR=tempfile.mkdtemp(dir=tmp),
+                           MAROOF_STORES_URL=f"{base_url}/stores.csv")
+                out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", mode],
+                                     env=env, capture_output=True, text=True, check=True)
+                res = json.loads(out.stdout.strip().splitlines()[-1])
+                best[mode] = {k: min(v, best.get(mode, {}).get(k, v)) for k, v in res.items()}
+        server.shutdown()
+
+    print(f"{'mode':>7} {'import ms':>10} {'first render ms':>16} {'data ready ms':>14}")
+    for mode, res in best.items():
+        print(f"{mode:>7} {res['import_ms']:>10,.0f} {res['render_ms']:>16,.0f} {res['ready_ms']:>14,.0f}")
+    assert best["after"]["render_ms"] < best["before"]["render_ms"], best
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_theme.py
+"""
+Bytes sent to the browser per rerun: theme CSS inlined vs a static <link>.
+Use:
+    python -m benchmarks.bench_theme --rows 70000
+
+Both pages run under streamlit.testing's AppTest against a synthetic
+dataset (a first run, then a rerun). Every ForwardMsg of a run is
+serialised and summed ("rerun bytes"); "theme bytes" is the part carrying
+the theme element. Modes:
+
+    before   the old inject(): the unminified stylesheet inlined in a
+             <style> block on every rerun
+    inline   theme.inject() without static serving: minified, inlined
+    link     theme.inject() with server.enableStaticServing: a <link> to
+             static/theme.<hash>.css (fetched once by the browser; its
+             size is listed separately)
+"""
+from __future__ import annotations
+import argparse
+import textwrap
+from pathlib import Path
+from streamlit import config
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+import refresh
+import theme
+from benchmarks.synthetic import make_compact_stores
+from dataset import REGISTRY
+
+ROOT = Path(__file__).resolve().parents[1]
+PAGES = {
+    "home": (ROOT / "الصفحة الرئيسة.py", None),
+    "dashboard": (ROOT / "pages" / "1_📊 منصة التحليل.py", ("min_rating", 4.2)),
+}
+
+
+def _legacy_html(extra_css: str, static_serving: bool) -> str:
+    css = f"@import url('{theme.GOOGLE_FONTS_URL}');\n\n{theme.THEME_CSS}{extra_css}"
+    return f"\n        <style>\n{textwrap.indent(css, ' ' * 8)}        </style>\n        "
+
+
+def _is_theme(msg) -> bool:
+    body = msg.delta.new_element.markdown.body
+    return body.startswith(("<link", "<style", "\n        <style>"))
+
+
+def _measure(path: Path, slider, runs: list) -> list[tuple[int, int]]:
+    at = AppTest.from_file(str(path), default_timeout=300)
+    runs.clear()
+    at.run()
+    if slider:
+        at.slider(key=slider[0]).set_value(slider[1]).run()
+    else:
+        at.run()
+    assert not at.exception, [e.value for e in at.exception]
+    return [(sum(m.ByteSize() for m in msgs), sum(m.ByteSize() for m in msgs if _is_theme(m)))
+            for msgs in runs]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=70_000)
+    args = parser.parse_args()
+
+    df = make_compact_stores(args.rows)
+    REGISTRY.publish(df, "bench")
+    # same version on every check: the refresher never reads or swaps
+    refresh._REFRESHER = refresh.StoresRefresher(loader=lambda known: (None, "bench")).start()
+
+    runs: list = []
+    original_run = LocalScriptRunner.run
+
+    def recording_run(self, *a, **kw):
+        tree = original_run(self, *a, **kw)
+        runs.append(list(self.forward_msgs()))
+        return tree
+
+    LocalScriptRunner.run = recording_run
+    current_html = theme._theme_html
+    results = {}
+    try:
+        for mode in ("before", "inline", "link"):
+            theme._theme_html = _legacy_html if mode == "before" else current_html
+            config.set_option("server.enableStaticServing", mode == "link")
+            for page, (path, slider) in PAGES.items():
+                results[page, mode] = _measure(path, slider, runs)
+    finally:
+        LocalScriptRunner.run = original_run
+        theme._theme_html = current_html
+
+    print(f"{'page':>10} {'mode':>7} {'run':>6} {'rerun bytes':>12} {'theme bytes':>12}")
+    for (page, mode), sizes in results.items():
+        for label, (total, themed) in zip(("first", "rerun"), sizes):
+            print(f"{page:>10} {mode:>7} {label:>6} {total:>12,} {themed:>12,}")
+    for page in PAGES:
+        saved = results[page, "before"][1][1] - results[page, "link"][1][1]
+        print(f"{page}: {saved:,} bytes less per rerun with the static stylesheet")
+        assert results[page, "link"][1][1] < 200, results[page, "link"]
+    for css in sorted((ROOT / "static").glob("theme.*.css")):
+        print(f"static/{css.name}: {css.stat().st_size:,} bytes (fetched once, cached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/synthetic.py
+"""
+Synthetic stores data with the same columns as the Maroof CSV.
+Use:
+    from benchmarks.synthetic import make_stores, make_compact_stores
+    df = make_stores(70_000)                 # raw columns, as read_csv sees them
+    df = make_compact_stores(10_000_000)     # loader dtypes, built chunk by chunk
+
+The shape follows the real dataset: Arabic store names and descriptions
+of varied length (some past the 200-character hover cut), review counts
+with a heavy Zipf tail, ratings in 0-5 leaning towards 4-5, and a long
+tail of free-text other_type_name values (a few of them blank).
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+BUSINESS_TYPES = ["ملابس", "عطور", "إلكترونيات", "أخرى", "هدايا", "مطاعم", "مستلزمات منزلية"]
+TYPE_WEIGHTS = [0.2, 0.12, 0.12, 0.3, 0.1, 0.08, 0.08]
+
+NAME_PREFIXES = ["متجر", "مؤسسة", "بيت", "عالم", "دار", "ركن", "لمسة", "أسواق"]
+WORDS = [
+    "الأناقة", "الورد", "العود", "الهدايا", "التقنية", "المنزل", "الجمال", "الرياض",
+    "جدة", "الخليج", "النخبة", "الفخامة", "السعادة", "الأمل", "الريف", "البحر",
+    "الذهب", "القهوة", "الحلويات", "الأطفال", "الرياضة", "الكتب", "الزهور", "العناية",
+]
+DESCRIPTION_PHRASES = [
+    "نوفر لكم أفضل المنتجات بأسعار منافسة",
+    "شحن سريع لجميع مناطق المملكة",
+    "منتجات أصلية ومضمونة",
+    "خدمة عملاء على مدار الساعة",
+    "تشكيلة واسعة تناسب جميع الأذواق",
+    "الدفع عند الاستلام متاح",
+    "عروض وخصومات أسبوعية",
+    "جودة عالية وتغليف أنيق",
+]
+OTHER_TYPES = 20_000          # distinct free-text types (Zipf-distributed)
+BLANK_OTHER_TYPES = ["", " ", "  "]
+BLANK_SHARE = 0.005
+DESCRIPTION_POOL = 4_096      # phrase combinations, made unique per store
+COMPACT_CHUNK_ROWS = 250_000
+
+
+def _pick(rng: np.random.Generator, words: list[str], n: int) -> np.ndarray:
+    return np.asarray(words, dtype=object)[rng.integers(0, len(words), n)]
+
+
+def make_stores(n: int, *, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """
+    Return n synthetic store rows with skewed review counts.
+
+    *start* offsets the store numbers, so chunks generated with different
+    seeds and starts concatenate into one frame with unique names.
+    """
+    rng = np.random.default_rng(seed)
+    business_type = rng.choice(BUSINESS_TYPES, n, p=TYPE_WEIGHTS)
+    # long tail: a few free-text types are common, most appear a handful of times
+    others = np.array([f"نشاط {i}" for i in range(OTHER_TYPES)], dtype=object)
+    other_type = others[(rng.zipf(1.3, n) - 1) % OTHER_TYPES]
+    blank = rng.random(n) < BLANK_SHARE
+    other_type[blank] = _pick(rng, BLANK_OTHER_TYPES, int(blank.sum()))
+    other_type = np.where(business_type == "أخرى", other_type, None)
+
+    ids = np.arange(start, start + n).astype(str).astype(object)
+    name = _pick(rng, NAME_PREFIXES, n) + " " + _pick(rng, WORDS, n) + " " + ids
+
+    # 1 to 8 phrases after the store name: ~40 to ~300 characters
+    pool = np.array([
+        "، ".join(_pick(rng, DESCRIPTION_PHRASES, k)) for k in rng.integers(1, 9, DESCRIPTION_POOL)
+    ], dtype=object)
+    description = name + " - " + pool[rng.integers(0, DESCRIPTION_POOL, n)]
+    description = np.where(rng.random(n) < 0.3, None, description)
+
+    # most stores sit at 4-5, with a thin tail down to 0
+    rating = np.round(np.clip(5 - rng.gamma(1.2, 0.5, n), 0, 5), 1)
+    rating[rng.random(n) < 0.02] = np.nan
+    total_reviews = np.minimum(rng.zipf(1.6, n) - 1, 250_000)
+
+    return pd.DataFrame({
+        "name_ar": name,
+        "business_type_ar": business_type,
+        "other_type_name": other_type,
+        "description": description,
+        "rating": rating,
+        "total_reviews": total_reviews,
+    })
+
+
+def make_compact_stores(n: int, *, seed: int = 0, chunk_rows: int = COMPACT_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    n synthetic rows as dataset.read_stores_csv returns them (same dtypes,
+    contiguous Arrow strings), generated *chunk_rows* at a time so 10M
+    rows never exist as Python string objects all at once.
+
+    compact_stores()' choices are known here (names and descriptions are
+    unique, free-text types repeat), so they are applied directly: its
+    whole-column nunique() needs about twice the frame's memory.
+    """
+    from dataset import ARROW_STRING, _apply_schema, _concat_chunks, _contiguous
+
+    def chunk(i: int, start: int) -> pd.DataFrame:
+        df = _apply_schema(make_stores(min(chunk_rows, n - start), seed=seed + i, start=start))
+        df["other_type_name"] = df["other_type_name"].astype("category")
+        return df
+
+    df = _concat_chunks([chunk(i, start) for i, start in enumerate(range(0, n, chunk_rows))])
+    df["total_reviews"] = pd.to_numeric(df["total_reviews"], downcast="integer")
+    pool = pa.default_memory_pool()
+    for col in df.columns:
+        if df[col].dtype == ARROW_STRING:
+            pool.release_unused()  # combining briefly holds two copies of the column
+            df[col] = _contiguous(df[col])
+    pool.release_unused()
+    return df
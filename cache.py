@@ -0,0 +1,65 @@
+# cache.py
+"""
+Per-DataFrame memo storage for derived structures (indexes, aggregates).
+Use:
+    from cache import frame_cache
+    store = frame_cache(df)
+    if "key" not in store:
+        store["key"] = expensive(df)
+
+Entries live exactly as long as the frame object they were built from.
+fingerprint(df) names a frame's contents for caches that outlive it.
+Frames handed to frame_cache() are treated as immutable: mutate a copy,
+never the cached frame, or the memoised results go stale.
+"""
+from __future__ import annotations
+import hashlib
+import threading
+import weakref
+import pandas as pd
+
+_CACHES: dict[int, tuple[weakref.ref, dict]] = {}
+_LOCK = threading.RLock()  # re-entrant: weakref callbacks can fire mid-update
+
+
+def _evict(key: int, ref: weakref.ref) -> None:
+    with _LOCK:
+        # the id may already belong to a newer frame: only drop our own entry
+        entry = _CACHES.get(key)
+        if entry is not None and entry[0] is ref:
+            del _CACHES[key]
+
+
+def frame_cache(df: pd.DataFrame) -> dict:
+    """Return the memo dict attached to *df* (created on first use)."""
+    key = id(df)
+    with _LOCK:
+        entry = _CACHES.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        store: dict = {}
+        _CACHES[key] = (weakref.ref(df, lambda ref, key=key: _evict(key, ref)), store)
+        return store
+
+
+def peek_frame_cache(df: pd.DataFrame) -> dict | None:
+    """Return the memo dict of *df* if one exists, without creating it."""
+    entry = _CACHES.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    return None
+
+
+def set_fingerprint(df: pd.DataFrame, fingerprint: str) -> None:
+    """Name *df*'s contents (e.g. its dataset version) to skip hashing it."""
+    frame_cache(df)["fingerprint"] = fingerprint
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    """Content fingerprint of *df*: its set_fingerprint() name, else a hash (memoised)."""
+    store = frame_cache(df)
+    if "fingerprint" not in store:
+        digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        digest.update(repr(list(df.columns)).encode("utf-8"))
+        store["fingerprint"] = digest.hexdigest()[:16]
+    return store["fingerprint"]
@@ -0,0 +1,83 @@
+# cards.py
+"""
+HTML of the dashboard's stat cards, filled from string templates.
+Use:
+    from analysis import range_summary
+    from cards import range_cards
+    for html in range_cards(range_summary(idx, (100, 500))):
+        st.markdown(html, unsafe_allow_html=True)
+
+Cards only lay out what analysis.range_summary() computed; their look
+(colours, spacing of the store lists) lives in theme.THEME_CSS under
+.store-list / .store-item, so each listed store is one short <li>.
+Store names are HTML-escaped.
+"""
+from __future__ import annotations
+from html import escape
+from analysis import RangeSummary, StoreCard
+
+RANGE_STATS = """\
+<div class='stCard' style='border-left: 4px solid var(--dark-text-warm);'>
+<h4 class='warm-text'>📊 تحليل النطاق الحالي:</h4>
+<ul class='arabic-list'>
+<li>عدد المتاجر في النطاق: <strong>{count:,}</strong></li>
+<li>متوسط التقييم: <strong>{avg_rating:.2f}/5</strong></li>
+<li>متوسط المراجعات: <strong>{avg_reviews:.0f}</strong></li>
+<li>نسبة من إجمالي المتاجر: <strong>{share:.1f}%</strong></li>
+</ul>
+</div>"""
+
+BEST_STORES = """\
+<div class='stCard' style='border-left: 4px solid var(--dark-text-cool); margin-top: 20px;'>
+<h4 class='cool-text'>🏆 أفضل {n} متاجر في هذا النطاق:</h4>
+<ul class='arabic-list store-list'>{items}</ul>
+</div>"""
+
+OPPORTUNITY_STORES = """\
+<div class='stCard' style='border-left: 4px solid #28a745; margin-top: 20px;'>
+<h4 style='color: #28a745;'>🎯 فرص للدراسة (تقييم عالي + مراجعات قليلة):</h4>
+<ul class='arabic-list store-list'>{items}</ul>
+<p style='color: var(--dark-text-cool); font-size: 12px; margin-top: 10px;'>
+هذه المتاجر حصلت على تقييمات عالية بأقل من متوسط المراجعات، قد تكون نموذجاً جيداً للدراسة.
+</p>
+</div>"""
+
+EMPTY_RANGE = """\
+<div class='stCard' style='border-left: 4px solid var(--warm);'>
+<h4 class='warm-text'>⚠️ ملاحظة:</h4>
+<p>لا توجد متاجر في هذا النطاق من المراجعات. حاول اختيار نطاق أوسع.</p>
+</div>"""
+
+STORE_ITEM = (
+    "<li class='store-item{kind}'><strong>{name}</strong><br>"
+    "<span class='store-rating'>⭐ {rating}/5</span>&nbsp;|&nbsp;"
+    "<span class='store-reviews'>📝 {reviews:,}</span></li>"
+)
+
+
+def store_items(stores: tuple[StoreCard, ...], kind: str = "") -> str:
+    """<li> elements for *stores*; *kind* adds a modifier class (e.g. "opportunity")."""
+    modifier = f" {kind}" if kind else ""
+    return "".join(
+        STORE_ITEM.format(kind=modifier, name=escape(s.name), rating=round(s.rating, 2), reviews=s.total_reviews)
+        for s in stores
+    )
+
+
+def range_cards(summary: RangeSummary) -> list[str]:
+    """
+    The range cards in display order: statistics, best stores and
+    opportunities (each only when it has stores), or a note for an
+    empty range.
+    """
+    if summary.count == 0:
+        return [EMPTY_RANGE]
+    cards = [RANGE_STATS.format(
+        count=summary.count, avg_rating=summary.avg_rating,
+        avg_reviews=summary.avg_reviews, share=summary.share,
+    )]
+    if summary.best:
+        cards.append(BEST_STORES.format(n=len(summary.best), items=store_items(summary.best)))
+    if summary.opportunities:
+        cards.append(OPPORTUNITY_STORES.format(items=store_items(summary.opportunities, "opportunity")))
+    return cards
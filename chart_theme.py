@@ -0,0 +1,73 @@
+# chart_theme.py
+"""
+Shared Plotly look for the dashboard charts, and a one-shot figure factory.
+Use:
+    from chart_theme import make_figure
+    fig = make_figure(
+        [dict(type="bar", x=counts, y=labels, orientation="h")],
+        dict(title=dict(text="..."), height=400),
+    )
+
+The Arabic fonts and hover-label colours live once, in the registered
+Plotly template "maroof" (validated a single time at import). Streamlit's
+own theme is merged over layout.template on the client, so make_figure()
+copies the template's layout into each figure's explicit layout instead of
+attaching the template, then adds the chart's layout on top.
+
+Figures are built from plain dicts in one go.Figure() call: one validation
+pass, instead of the add_trace() / update_layout() round trips that
+re-validate and re-walk the layout tree on every call.
+"""
+from __future__ import annotations
+import plotly.graph_objects as go
+import plotly.io as pio
+
+TEMPLATE = "maroof"
+FONT_FAMILY = "Noto Sans Arabic"
+HOVER_BG = "#C9D2BA"
+HOVER_TEXT = "#202020"
+
+pio.templates[TEMPLATE] = go.layout.Template(layout=dict(
+    font=dict(family=FONT_FAMILY),
+    title=dict(font=dict(size=16, family=FONT_FAMILY)),
+    hoverlabel=dict(
+        bgcolor=HOVER_BG,
+        font=dict(color=HOVER_TEXT, family=FONT_FAMILY, size=12),
+    ),
+))
+
+_BASE_LAYOUT = pio.templates[TEMPLATE].layout.to_plotly_json()
+
+
+def merge_layout(base: dict, override: dict) -> dict:
+    """
+    *override* merged into a copy of *base*, recursing into nested dicts
+    (the same result update_layout() gives for nested-dict arguments).
+    Neither input is modified.
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_layout(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def make_figure(traces: list[dict], layout: dict, *, themed: bool = True) -> go.Figure:
+    """
+    Build a figure from trace and layout dicts in a single validation pass.
+
+    Parameters:
+    -----------
+    traces : list[dict]
+        Trace dicts, each with its "type" (e.g. "bar", "heatmap")
+    layout : dict
+        Chart layout as nested dicts (no magic-underscore keys); merged
+        over the "maroof" template's layout
+    themed : bool
+        False builds from *layout* alone
+    """
+    if themed:
+        layout = merge_layout(_BASE_LAYOUT, layout)
+    return go.Figure(dict(data=traces, layout=layout))
@@ -0,0 +1,573 @@
+# dataset.py
+"""
+Stores dataset loader with a persistent columnar cache.
+Use:
+    from dataset import get_stores
+    df = get_stores().frame
+
+The first load downloads the CSV, pins the schema and writes a Parquet
+snapshot under CACHE_DIR. Revalidation is a conditional GET on the
+server's ETag / Last-Modified (or, when the server sends neither, a
+comparison of the body's SHA-256). A 304 sends no body, and a caller that
+already holds that version (known_version) reads nothing from disk either.
+Without validators every check downloads the whole body again; it is
+hashed before parsing, so an unchanged one costs the transfer and one
+read of the file, not a parse.
+
+Downloads go through download.fetch (pooled session, retries with backoff,
+Range resume, gzip) to a file under CACHE_DIR; the body is then hashed and
+parsed in CHUNK_ROWS-row chunks, so the raw CSV bytes are never held in
+memory.
+
+Pages share one process-wide copy through get_stores(), which returns a
+versioned, read-only StoresSnapshot; refresh.py swaps in new versions
+from a background thread. With MAROOF_SHARED_STORE=1, processes
+on one host also share memory: the frame is memory-mapped from an on-disk
+column store (see load_stores_shared).
+
+Loaded frames are compact (see compact_stores): float32 ratings, the
+smallest safe integer for review counts, categorical low-cardinality text
+and Arrow-backed strings for free text.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the shared store is built unlocked
+    fcntl = None
+import numpy as np
+import pandas as pd
+import requests
+from pandas.api.types import is_integer_dtype, is_numeric_dtype, union_categoricals
+
+from cache import set_fingerprint
+from download import fetch, open_body
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get("MAROOF_CACHE_DIR", Path(__file__).parent / ".cache"))
+
+# Bump whenever SCHEMA (or the way it is applied) changes: older snapshots
+# are then rebuilt instead of being read with stale dtypes.
+SCHEMA_VERSION = 2
+SCHEMA = {
+    "rating": "float32",
+    "total_reviews": "integer",     # smallest integer type that holds the data
+    "business_type_ar": "category",
+}
+
+# other text columns become categorical when unique values <= ratio * rows,
+# otherwise Arrow-backed strings
+CATEGORY_MAX_RATIO = 0.5
+ARROW_STRING = pd.StringDtype("pyarrow")
+
+CHUNK_ROWS = 20_000      # rows per parsed CSV chunk
+CHUNK_BYTES = 1 << 16    # bytes per body read
+
+REQUIRED_COLUMNS = ("name_ar", "business_type_ar", "other_type_name", "rating", "total_reviews")
+MIN_ROWS_RATIO = 0.5     # a new version may not lose more than half the stores
+
+
+def _is_text(s: pd.Series) -> bool:
+    return s.dtype == object or isinstance(s.dtype, pd.StringDtype)
+
+
+def _apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the pinned columns to their SCHEMA dtype (missing columns are
+    skipped) and other text columns to Arrow strings. Safe per chunk:
+    decisions that need the whole column are left to compact_stores().
+    """
+    for col in df.columns:
+        dtype = SCHEMA.get(col)
+        if dtype == "integer":
+            s = pd.to_numeric(df[col], errors="coerce")
+            # integers cannot hold NaN: keep float if any value is missing
+            df[col] = s.astype("int64") if s.notna().all() else s.astype("float64")
+        elif dtype == "float32":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+        elif dtype is not None:
+            df[col] = df[col].astype(dtype)
+        elif _is_text(df[col]):
+            df[col] = df[col].astype(ARROW_STRING)
+    return df
+
+
+def _contiguous(s: pd.Series) -> pd.Series:
+    """
+    *s* with its Arrow strings in one chunk. Taking rows from a chunked
+    array concatenates every chunk first, so iloc[top-10] on a column
+    parsed in CHUNK_ROWS pieces would copy the whole column each time.
+    """
+    chunked = s.array.__arrow_array__()
+    if chunked.num_chunks <= 1:
+        return s
+    return pd.Series(pd.array(chunked.combine_chunks(), dtype=s.dtype), index=s.index, name=s.name)
+
+
+def compact_stores(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Whole-column dtype narrowing after _apply_schema: downcast review
+    counts, turn low-cardinality text into categoricals and store the
+    remaining text contiguously. Logs the memory_usage(deep=True) total
+    before and after.
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    for col in df.columns:
+        s = df[col]
+        if SCHEMA.get(col) == "integer" and is_integer_dtype(s.dtype):
+            df[col] = pd.to_numeric(s, downcast="integer")
+        elif col not in SCHEMA and _is_text(s) and s.nunique() <= CATEGORY_MAX_RATIO * len(s):
+            df[col] = s.astype("category")
+        elif s.dtype == ARROW_STRING:
+            df[col] = _contiguous(s)
+    after = int(df.memory_usage(deep=True).sum())
+    logger.info("stores frame compacted: %.1f MB -> %.1f MB (%s rows)", before / 1e6, after / 1e6, f"{len(df):,}")
+    return df
+
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only file object over an iterable of byte chunks, hashing as it reads."""
+
+    def __init__(self, chunks: Iterable[bytes], digest=None):
+        self._chunks = iter(chunks)
+        self._pending = b""
+        self.digest = digest if digest is not None else hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+            self.digest.update(self._pending)
+        n = min(len(buf), len(self._pending))
+        buf[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def _concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate parsed chunks, keeping categorical columns categorical.
+    A text column that is blank throughout a chunk parses as float64 NaN
+    there; it takes the dtype of the chunks that have values.
+    """
+    if not chunks:
+        return pd.DataFrame()
+    for col in chunks[0].columns:
+        present = [ch[col] for ch in chunks if ch[col].notna().any()]
+        if not present:
+            continue
+        if isinstance(present[0].dtype, pd.CategoricalDtype):
+            cats = union_categoricals(present).categories
+            for ch in chunks:
+                ch[col] = ch[col].cat.set_categories(cats)
+        elif present[0].dtype == ARROW_STRING:
+            for ch in chunks:
+                ch[col] = ch[col].astype(ARROW_STRING)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_stores_csv(source, *, chunksize: int = CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Parse a stores CSV chunk by chunk, applying SCHEMA to each chunk, and
+    return the compacted frame.
+
+    Parameters:
+    -----------
+    source : str | Path | binary file object
+        Local path or any readable binary stream
+    chunksize : int
+        Rows parsed per chunk
+    """
+    with pd.read_csv(source, chunksize=chunksize) as reader:
+        return compact_stores(_concat_chunks([_apply_schema(chunk) for chunk in reader]))
+
+
+def validate_stores(df: pd.DataFrame, previous_rows: int | None = None) -> None:
+    """Raise ValueError if *df* is not fit to replace a version of *previous_rows* rows."""
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"missing columns: {missing}")
+    if df.empty:
+        raise ValueError("dataset has no rows")
+    if previous_rows is not None and len(df) < MIN_ROWS_RATIO * previous_rows:
+        raise ValueError(f"row count fell from {previous_rows:,} to {len(df):,}")
+    for col in ("rating", "total_reviews"):
+        if not is_numeric_dtype(df[col]):
+            raise ValueError(f"{col} is not numeric ({df[col].dtype})")
+    rating = df["rating"].to_numpy(dtype="float64", na_value=np.nan)
+    if np.any((rating < 0) | (rating > 5)):
+        raise ValueError("rating outside [0, 5]")
+    if np.any(df["total_reviews"].to_numpy(dtype="float64", na_value=np.nan) < 0):
+        raise ValueError("negative total_reviews")
+
+
+def _paths(url: str) -> tuple[Path, Path]:
+    """Snapshot and metadata file paths for a given source URL."""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / f"stores-{key}.parquet", CACHE_DIR / f"stores-{key}.json"
+
+
+def _read_meta(meta_path: Path) -> dict:
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta_path: Path, meta: dict) -> None:
+    tmp = meta_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, meta_path)
+
+
+def _write_snapshot(df: pd.DataFrame, data_path: Path, meta_path: Path, meta: dict) -> None:
+    """Write Parquet + metadata atomically so a crash never leaves half a file."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = data_path.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, data_path)
+    _write_meta(meta_path, meta)
+
+
+def _parse_body(path: Path, stream: bool) -> tuple[pd.DataFrame, str]:
+    """Parse a downloaded body; returns (frame, sha256 of the decoded CSV)."""
+    with open_body(path) as fh:
+        if not stream:
+            raw = fh.read()
+            return compact_stores(_apply_schema(pd.read_csv(io.BytesIO(raw)))), hashlib.sha256(raw).hexdigest()
+        body = _ChunkStream(iter(lambda: fh.read(CHUNK_BYTES), b""))
+        df = read_stores_csv(io.BufferedReader(body, CHUNK_BYTES))
+        return df, body.digest.hexdigest()
+
+
+def _body_sha256(path: Path) -> str:
+    """SHA-256 of a downloaded body as decoded, i.e. the hash _parse_body reports."""
+    digest = hashlib.sha256()
+    with open_body(path) as fh:
+        for block in iter(lambda: fh.read(CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_stores_versioned(url: str, *, timeout: float = 60, stream: bool = True,
+                          revalidate: bool = True,
+                          known_version: str | None = None) -> tuple[pd.DataFrame | None, str]:
+    """
+    Return (stores DataFrame, version), served from the on-disk snapshot
+    when valid. The version is a short SHA-256 of the CSV body.
+
+    A caller already holding *known_version* gets (None, version) when
+    the source still has that version: an unchanged revalidation then
+    costs the conditional GET alone, without reading the snapshot.
+
+    Parameters:
+    -----------
+    url : str
+        CSV download URL
+    timeout : float
+        Seconds to wait for each read from the server
+    stream : bool
+        Parse the body in chunks (False reads the whole body into memory
+        first; kept for memory comparisons)
+    revalidate : bool
+        Check the snapshot against the server (False serves any valid
+        snapshot as-is, leaving revalidation to the background refresher)
+    known_version : str | None
+        Version the caller already has in memory (None: it has no frame)
+    """
+    data_path, meta_path = _paths(url)
+    body_path = data_path.with_suffix(".body")
+    meta = _read_meta(meta_path)
+    have_snapshot = data_path.exists() and meta.get("schema_version") == SCHEMA_VERSION
+
+    validators = {}
+    if have_snapshot:
+        version = meta["sha256"][:12]
+
+        def snapshot() -> tuple[pd.DataFrame | None, str]:
+            if version == known_version:
+                return None, version
+            return pd.read_parquet(data_path), version
+
+        if not revalidate:
+            return snapshot()
+        validators = meta.get("validators") or {}
+
+    # 1. conditional GET: an unchanged ETag / Last-Modified answers 304, no body
+    try:
+        res = fetch(url, body_path, etag=validators.get("etag"),
+                    last_modified=validators.get("last_modified"), timeout=timeout)
+    except requests.RequestException as exc:
+        if not have_snapshot:
+            raise
+        logger.warning("stores download failed, serving snapshot %s: %s", version, exc)
+        return snapshot()  # offline: stale beats nothing
+    if res.not_modified:
+        return snapshot()
+
+    # 2. an identical body (re-sent on every check by a server without
+    # validators) keeps the snapshot unparsed; a broken one never replaces it
+    try:
+        if have_snapshot and _body_sha256(res.path) == meta.get("sha256"):
+            meta["validators"] = res.validators
+            _write_meta(meta_path, meta)
+            return snapshot()
+        df, sha256 = _parse_body(res.path, stream)
+    finally:
+        res.path.unlink(missing_ok=True)
+    validate_stores(df, meta.get("rows") if have_snapshot else None)
+
+    _write_snapshot(df, data_path, meta_path, {
+        "schema_version": SCHEMA_VERSION,
+        "sha256": sha256,
+        "validators": res.validators,
+        "rows": len(df),
+    })
+    return df, sha256[:12]
+
+
+def load_stores_data(url: str, *, timeout: float = 60, stream: bool = True) -> pd.DataFrame:
+    """Return the stores DataFrame (see load_stores_versioned)."""
+    return load_stores_versioned(url, timeout=timeout, stream=stream)[0]
+
+
+# ---------- SHARED COLUMN STORE ----------
+# Columns stored as .npy and memory-mapped; the rest goes to one
+# uncompressed Arrow IPC file, also mapped (strings stay zero-copy).
+MMAP_COLUMNS = ("rating", "total_reviews")
+
+
+def _shared_paths(url: str) -> tuple[Path, Path]:
+    """Manifest and lock file of the shared column store for *url*."""
+    data_path, _ = _paths(url)
+    stem = data_path.stem.replace("stores-", "shared-")
+    return CACHE_DIR / f"{stem}.json", CACHE_DIR / f"{stem}.lock"
+
+
+def write_column_store(df: pd.DataFrame, directory: Path) -> None:
+    """Write *df* as a mappable column store (atomically, via rename)."""
+    import pyarrow as pa
+
+    tmp = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    mapped = [c for c in MMAP_COLUMNS if c in df.columns]
+    for col in mapped:
+        np.save(tmp / f"{col}.npy", df[col].to_numpy())
+    table = pa.Table.from_pandas(df.drop(columns=mapped), preserve_index=False)
+    with pa.OSFile(str(tmp / "columns.arrow"), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    (tmp / "columns.json").write_text(json.dumps(list(df.columns)), encoding="utf-8")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+def map_column_store(directory: Path) -> pd.DataFrame:
+    """
+    Open a column store read-only. Numeric columns are np.memmap views and
+    strings reference the mapped Arrow buffers, so processes mapping the
+    same store share those pages instead of holding private copies.
+    """
+    import pyarrow as pa
+
+    def _types(t):
+        return ARROW_STRING if pa.types.is_string(t) or pa.types.is_large_string(t) else None
+
+    table = pa.ipc.open_file(pa.memory_map(str(directory / "columns.arrow"))).read_all()
+    rest = table.to_pandas(types_mapper=_types)
+    order = json.loads((directory / "columns.json").read_text(encoding="utf-8"))
+    cols = {}
+    for col in order:
+        npy = directory / f"{col}.npy"
+        cols[col] = pd.Series(np.load(npy, mmap_mode="r"), copy=False) if npy.exists() else rest[col]
+    return pd.DataFrame(cols, copy=False)
+
+
+def publish_column_store(url: str, df: pd.DataFrame, version: str) -> Path:
+    """Write *df* as the shared store for *url*, point the manifest at it
+    and drop older versions. Call it under the host lock: files already
+    mapped stay valid until unmapped, but a store being opened would not."""
+    manifest_path, _ = _shared_paths(url)
+    stem = manifest_path.stem
+    directory = CACHE_DIR / f"{stem}-{version}"
+    write_column_store(df, directory)
+    _write_meta(manifest_path, {
+        "schema_version": SCHEMA_VERSION,
+        "version": version,
+        "directory": directory.name,
+    })
+    for old in CACHE_DIR.glob(f"{stem}-*"):
+        if old != directory and old.is_dir():
+            shutil.rmtree(old, ignore_errors=True)
+    return directory
+
+
+@contextmanager
+def _host_lock(lock_path: Path):
+    """Exclusive lock shared by every process on the host (no-op without flock)."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def load_stores_shared(url: str, *, timeout: float = 60) -> tuple[pd.DataFrame, str]:
+    """
+    Return (stores DataFrame, version) mapped from the host-wide column store.
+
+    The first process (under a file lock) loads through
+    load_stores_versioned() and writes the store; every process, the
+    writer included, then maps it read-only. Later processes never touch
+    the network: picking up new data is sync_stores_shared()'s job.
+    """
+    manifest_path, lock_path = _shared_paths(url)
+    # mapped under the lock: a concurrent publish deletes older store directories
+    with _host_lock(lock_path):
+        manifest = _read_meta(manifest_path)
+        directory = CACHE_DIR / manifest.get("directory", "-")
+        if manifest.get("schema_version") != SCHEMA_VERSION or not directory.exists():
+            df, version = load_stores_versioned(url, timeout=timeout, revalidate=False)
+            directory = publish_column_store(url, df, version)
+            del df
+        else:
+            version = manifest["version"]
+        return map_column_store(directory), version
+
+
+def sync_stores_shared(url: str, *, timeout: float = 60,
+                       known_version: str | None = None) -> tuple[pd.DataFrame | None, str]:
+    """
+    Revalidate the source and return (mapped DataFrame, version) of the
+    latest shared store, rewriting the store only if the version changed.
+    Whichever process checks first does the download; the rest just map.
+    A caller already holding *known_version* gets (None, version) while
+    it is still the latest.
+    """
+    manifest_path, lock_path = _shared_paths(url)
+    with _host_lock(lock_path):
+        manifest = _read_meta(manifest_path)
+        directory = CACHE_DIR / manifest.get("directory", "-")
+        current = manifest.get("schema_version") == SCHEMA_VERSION and directory.exists()
+        stored = manifest.get("version") if current else None
+        # the store already holds *stored*: only a new version is read and parsed
+        df, version = load_stores_versioned(url, timeout=timeout, known_version=stored)
+        if df is not None and version != stored:
+            directory = publish_column_store(url, df, version)
+        del df
+        if version == known_version:
+            return None, version
+        # mapped under the lock: a concurrent publish deletes older store directories
+        return map_column_store(directory), version
+
+
+# ---------- PROCESS-WIDE REGISTRY ----------
+GOOGLE_FILE_ID = "1CJGNXI3yp0l1rpzERVyKCU1K55DzfqIS"
+STORES_URL = os.environ.get(  # MAROOF_STORES_URL: a mirror of the same CSV
+    "MAROOF_STORES_URL",
+    f"https://drive.usercontent.google.com/download?id={GOOGLE_FILE_ID}&export=download&confirm=t",
+)
+
+def _freeze(frame: pd.DataFrame) -> None:
+    """Make the numpy buffers behind *frame* read-only (Arrow buffers already are)."""
+    # No public API reaches the arrays pandas writes into: Series.to_numpy()
+    # hands out views whose flag is their own, and a frame rebuilt from
+    # frozen copies still copies on write while any reference is alive.
+    # Hence the block manager, checked against the pandas versions
+    # requirements.txt allows (tests/test_registry.py).
+    blocks = getattr(getattr(frame, "_mgr", None), "blocks", None)
+    if blocks is None:
+        logger.warning("pandas %s: cannot freeze the published frame", pd.__version__)
+        return
+    for block in blocks:
+        arr = getattr(block.values, "_ndarray", block.values)  # Categorical: its codes
+        while isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+            arr = arr.base
+
+
+@dataclass(frozen=True)
+class StoresSnapshot:
+    """
+    One published dataset version. `frame` is shared by every session:
+    read it, filter it, copy it, but never assign into it.
+
+    Its numpy buffers are read-only, so .loc / .iloc / .at writes into the
+    numeric and categorical columns raise ValueError. Replacing a whole
+    column (frame[col] = ...) or writing an Arrow string cell is not
+    caught: it swaps the column in the shared object, for every session.
+    """
+    frame: pd.DataFrame
+    version: str
+    loaded_at: float
+
+
+class DatasetRegistry:
+    """
+    Holds the current StoresSnapshot for the whole process.
+
+    The first get() loads through *loader* (other callers wait on the same
+    load); later calls return the same snapshot object, so memory and the
+    per-frame caches (indexes, aggregates) stay shared across sessions.
+    """
+
+    def __init__(self, loader: Callable[[], tuple[pd.DataFrame, str]]):
+        self._loader = loader
+        self._snapshot: StoresSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def peek(self) -> StoresSnapshot | None:
+        """Current snapshot, or None if nothing has been loaded yet."""
+        return self._snapshot
+
+    def get(self) -> StoresSnapshot:
+        """Current snapshot, loading it on first use."""
+        snap = self._snapshot
+        if snap is not None:
+            return snap
+        with self._lock:
+            if self._snapshot is None:
+                self.publish(*self._loader())
+            return self._snapshot
+
+    def publish(self, frame: pd.DataFrame, version: str) -> StoresSnapshot:
+        """Make *frame* the current dataset (a single reference swap); it is frozen in place."""
+        _freeze(frame)
+        set_fingerprint(frame, version)  # figure caches key on it; no hashing needed
+        snap = StoresSnapshot(frame=frame, version=version, loaded_at=time.time())
+        self._snapshot = snap
+        return snap
+
+
+# MAROOF_SHARED_STORE=1: several Streamlit processes on one host map a
+# single on-disk column store instead of each holding its own copy.
+# Either way the first load serves an existing snapshot without a network
+# round trip; refresh.StoresRefresher revalidates it in the background.
+SHARED_STORE = os.environ.get("MAROOF_SHARED_STORE", "") not in ("", "0")
+REGISTRY = DatasetRegistry(
+    (lambda: load_stores_shared(STORES_URL)) if SHARED_STORE
+    else (lambda: load_stores_versioned(STORES_URL, revalidate=False))
+)
+
+
+def get_stores() -> StoresSnapshot:
+    """The process-wide stores snapshot (loaded on first call)."""
+    return REGISTRY.get()
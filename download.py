@@ -0,0 +1,209 @@
+# download.py
+"""
+Resilient HTTP download to disk: pooled, conditional, resumable, retried.
+Use:
+    from download import fetch, open_body
+    res = fetch(url, path, etag=old_etag, last_modified=old_last_modified)
+    if not res.not_modified:
+        with open_body(res.path) as fh:
+            ...
+
+fetch() sends If-None-Match / If-Modified-Since when validators are given,
+so an unchanged file costs one 304 and no body. The body is written to
+"<path>.part" first; if a transfer breaks, the next attempt (or the next
+call, even in a new process) asks for the rest with Range + If-Range and
+appends, falling back to a full transfer when the server answers 200. A
+206 that is not the missing tail discards the partial file and retries.
+Connection errors, timeouts, 429 and 5xx are retried MAX_RETRIES times with
+exponential backoff; other 4xx fail at once.
+
+Bodies are stored exactly as sent (so Range offsets stay valid); open_body()
+transparently gunzips a gzip Content-Encoding or a .gz file.
+"""
+from __future__ import annotations
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import BinaryIO
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 4          # attempts after the first
+BACKOFF_S = 0.5          # first retry delay; doubles per attempt
+BACKOFF_MAX_S = 8.0
+CONNECT_TIMEOUT_S = 10
+CHUNK_BYTES = 1 << 16
+RETRY_STATUS = {429, 500, 502, 503, 504}
+GZIP_MAGIC = b"\x1f\x8b"
+
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+
+def session() -> requests.Session:
+    """The process-wide pooled session (keep-alive connections are reused)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            # gzip only: the stored body must be decodable by open_body()
+            s.headers["Accept-Encoding"] = "gzip"
+            _SESSION = s
+        return _SESSION
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """Outcome of fetch(). *path* is None when the server answered 304."""
+    status: int                  # 200, 206 (resumed) or 304
+    path: Path | None
+    etag: str | None
+    last_modified: str | None
+    resumed_from: int = 0        # bytes kept from an earlier partial transfer
+    attempts: int = 1
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+    @property
+    def validators(self) -> dict:
+        return {"etag": self.etag, "last_modified": self.last_modified}
+
+
+class _Retryable(requests.HTTPError):
+    """A status worth retrying (429 / 5xx)."""
+
+
+def _partial(path: Path) -> tuple[Path, Path]:
+    return path.with_name(path.name + ".part"), path.with_name(path.name + ".part.json")
+
+
+def _content_range(value: str) -> tuple[int, bool] | None:
+    """(first byte, whether it runs to the end) of a "bytes a-b/total" header, None if unparsable."""
+    try:
+        unit, spec = value.split(" ", 1)
+        span, total = spec.split("/")
+        first, last = (int(n) for n in span.split("-"))
+        to_end = total != "*" and last == int(total) - 1
+    except ValueError:
+        return None
+    return (first, to_end) if unit == "bytes" else None
+
+
+def _attempt(url: str, path: Path, etag: str | None, last_modified: str | None,
+             timeout: float, http: requests.Session) -> FetchResult:
+    part, part_meta = _partial(path)
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    # resume only against the same representation (If-Range validator)
+    offset = part.stat().st_size if part.exists() else 0
+    try:
+        resume_with = json.loads(part_meta.read_text(encoding="utf-8")).get("validator")
+    except (OSError, ValueError):
+        resume_with = None
+    if offset and resume_with:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = resume_with
+    else:
+        offset = 0
+
+    with http.get(url, headers=headers, timeout=(CONNECT_TIMEOUT_S, timeout),
+                  stream=True, allow_redirects=True) as r:
+        if r.status_code == 304:
+            return FetchResult(304, None, r.headers.get("ETag") or etag,
+                               r.headers.get("Last-Modified") or last_modified)
+        if r.status_code == 416:  # stale partial: start over next attempt
+            part.unlink(missing_ok=True)
+            raise _Retryable(f"416 for {url} from byte {offset}", response=r)
+        if r.status_code in RETRY_STATUS:
+            raise _Retryable(f"{r.status_code} for {url}", response=r)
+        r.raise_for_status()
+
+        # only a 206 for exactly the missing tail may be appended; anything
+        # else is a fragment, never to be committed as the whole file
+        resumed = r.status_code == 206
+        if resumed and _content_range(r.headers.get("Content-Range", "")) != (offset, True):
+            part.unlink(missing_ok=True)
+            part_meta.unlink(missing_ok=True)
+            raise _Retryable(f"206 for {url} is not bytes {offset} to the end", response=r)
+        if not resumed:
+            offset = 0
+        new_etag, new_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        # a weak ETag cannot validate a byte range; Last-Modified can
+        validator = new_etag if new_etag and not new_etag.startswith("W/") else new_modified
+        part.parent.mkdir(parents=True, exist_ok=True)
+        part_meta.write_text(json.dumps({"validator": validator}), encoding="utf-8")
+
+        with open(part, "ab" if resumed else "wb") as fh:
+            # raw bytes: Range offsets refer to the encoded representation
+            try:
+                for chunk in r.raw.stream(CHUNK_BYTES, decode_content=False):
+                    fh.write(chunk)
+            except urllib3.exceptions.HTTPError as exc:  # raw reads are not wrapped by requests
+                raise requests.exceptions.ChunkedEncodingError(exc) from exc
+        expected = r.headers.get("Content-Length")
+        if expected is not None and part.stat().st_size - offset < int(expected):
+            raise requests.exceptions.ChunkedEncodingError(f"{url}: body ended early")
+
+    os.replace(part, path)
+    part_meta.unlink(missing_ok=True)
+    return FetchResult(r.status_code, path, new_etag, new_modified, resumed_from=offset)
+
+
+def fetch(url: str, path: Path, *, etag: str | None = None, last_modified: str | None = None,
+          timeout: float = 60, retries: int = MAX_RETRIES,
+          http: requests.Session | None = None) -> FetchResult:
+    """
+    Download *url* to *path* unless it still matches the given validators.
+
+    Parameters:
+    -----------
+    url : str
+        Source URL
+    path : Path
+        Destination; replaced atomically once the body is complete
+    etag, last_modified : str | None
+        Validators from the last successful download (conditional request)
+    timeout : float
+        Seconds to wait for each read from the server
+    retries : int
+        Extra attempts on connection errors, timeouts, 429 and 5xx
+    http : requests.Session | None
+        Session to use (defaults to the pooled process-wide one)
+    """
+    http = http or session()
+    for attempt in range(retries + 1):
+        try:
+            res = _attempt(url, Path(path), etag, last_modified, timeout, http)
+            return replace(res, attempts=attempt + 1)
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, _Retryable) as exc:
+            if attempt == retries:
+                raise
+            delay = min(BACKOFF_MAX_S, BACKOFF_S * 2 ** attempt)
+            logger.warning("download of %s failed (%s); retry %d/%d in %.1fs",
+                           url, exc, attempt + 1, retries, delay)
+            time.sleep(delay)
+
+
+def open_body(path: Path) -> BinaryIO:
+    """Open a fetched body for reading, gunzipping it if it is gzip data."""
+    with open(path, "rb") as fh:
+        magic = fh.read(2)
+    return gzip.open(path, "rb") if magic == GZIP_MAGIC else open(path, "rb")
@@ -0,0 +1,152 @@
+# figure_cache.py
+"""
+Process-wide LRU of built chart figures, shared by every session.
+Use:
+    from figure_cache import cached_figure
+    fig = cached_figure(business_mix_chart, idx, top_n=10, sort_by="Total",
+                        layout=dict(height=500))
+    st.plotly_chart(fig, use_container_width=True)
+
+The chart builders in analysis.py are pure functions of (dataset, args),
+so a figure is built once per dataset fingerprint and argument set and
+then served as-is on every rerun, in any session. *layout* is applied
+over the built figure's layout (validated once, merged as dicts, not
+via update_layout()) before caching. What comes back is a FrozenFigure:
+the validated payload only, ready for st.plotly_chart and shared by
+every caller.
+
+Entries are evicted least-recently-used once their serialised size passes
+MAX_FIGURE_BYTES. Hit/miss counters are kept per thread, like query.py's:
+reset_figure_stats() at the top of a page, figure_stats() at the end.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from cache import fingerprint
+from chart_theme import merge_layout
+from query import StoreIndex
+
+MAX_FIGURE_BYTES = int(os.environ.get("MAROOF_FIGURE_CACHE_MB", 32)) << 20
+
+class FrozenFigure(go.Figure):
+    """
+    A cached figure reduced to its validated Plotly payload.
+
+    to_dict() / to_plotly_json() return the payload computed once when the
+    figure was cached, so st.plotly_chart skips Plotly's per-call deep copy
+    and only JSON-encodes it. The Figure itself is empty: read
+    fig.payload, not fig.data / fig.layout.
+    """
+
+    def __init__(self, payload: dict):
+        super().__init__()
+        self._payload = payload
+
+    @property
+    def payload(self) -> dict:
+        return self._payload
+
+    def to_dict(self) -> dict:
+        return self._payload
+
+    def to_plotly_json(self) -> dict:
+        return self._payload
+
+    def to_json(self, *args, **kwargs) -> str:
+        kwargs.setdefault("validate", False)
+        return pio.to_json(self._payload, *args, **kwargs)
+
+
+_FIGURES: OrderedDict[str, tuple[FrozenFigure, int, float]] = OrderedDict()  # key -> (fig, bytes, build ms)
+_BYTES = 0
+_LOCK = threading.Lock()
+_STATS = threading.local()
+
+
+def _stats() -> dict:
+    if not hasattr(_STATS, "counts"):
+        _STATS.counts = {"hits": 0, "misses": 0, "saved_ms": 0.0}
+    return _STATS.counts
+
+
+def reset_figure_stats() -> None:
+    """Zero this thread's counters (call once per rerun)."""
+    _STATS.counts = {"hits": 0, "misses": 0, "saved_ms": 0.0}
+
+
+def figure_stats() -> dict:
+    """
+    This thread's hits, misses and build time avoided (saved_ms) since the
+    last reset, plus the cache's current entries and bytes.
+    """
+    with _LOCK:
+        totals = {"entries": len(_FIGURES), "bytes": _BYTES}
+    return {**_stats(), **totals}
+
+
+def _key(builder: Callable, data: pd.DataFrame | StoreIndex, args: tuple, kwargs: dict) -> str:
+    frame = data.frame if isinstance(data, StoreIndex) else data
+    # repr() keeps numpy scalars and tuples distinct enough for chart arguments
+    return json.dumps([builder.__module__, builder.__qualname__, fingerprint(frame), args, kwargs],
+                      sort_keys=True, ensure_ascii=False, default=repr)
+
+
+def cached_figure(builder: Callable[..., go.Figure], data: pd.DataFrame | StoreIndex, *args: Any,
+                  layout: dict | None = None, **kwargs: Any) -> FrozenFigure:
+    """
+    builder(data, *args, **kwargs) with *layout* applied, as a FrozenFigure,
+    from the cache when this dataset and these arguments were drawn before.
+
+    Parameters:
+    -----------
+    builder : callable
+        A pure chart builder taking the data first (see analysis.py)
+    data : pd.DataFrame | StoreIndex
+        Dataset to draw; its fingerprint is part of the key
+    layout : dict | None
+        Layout overrides for the new figure, as for update_layout()
+        (part of the key)
+    """
+    global _BYTES
+    key = _key(builder, data, args, {**kwargs, "__layout__": layout})
+    with _LOCK:
+        entry = _FIGURES.get(key)
+        if entry is not None:
+            _FIGURES.move_to_end(key)
+            counts = _stats()
+            counts["hits"] += 1
+            counts["saved_ms"] += entry[2]
+            return entry[0]
+
+    _stats()["misses"] += 1
+    t = time.perf_counter()
+    payload = builder(data, *args, **kwargs).to_dict()
+    if layout:
+        payload["layout"] = merge_layout(payload["layout"], go.Layout(layout).to_plotly_json())
+    fig = FrozenFigure(payload)
+    build_ms = (time.perf_counter() - t) * 1000
+    size = len(fig.to_json().encode())  # bytes: Arabic labels take 2 per character in UTF-8
+
+    with _LOCK:
+        if key not in _FIGURES:
+            _FIGURES[key] = (fig, size, build_ms)
+            _BYTES += size
+        while _BYTES > MAX_FIGURE_BYTES and len(_FIGURES) > 1:
+            _, (_, old_size, _) = _FIGURES.popitem(last=False)
+            _BYTES -= old_size
+    return fig
+
+
+def clear_figures() -> None:
+    """Drop every cached figure."""
+    global _BYTES
+    with _LOCK:
+        _FIGURES.clear()
+        _BYTES = 0
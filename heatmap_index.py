@@ -0,0 +1,122 @@
+# heatmap_index.py
+"""
+Pre-binned rating × total_reviews counts for instant heatmap range queries.
+Use:
+    from heatmap_index import build_heatmap_index
+    build_heatmap_index(df)        # once per dataset; memoised on df
+    fig = rating_reviews_heatmap(df, reviews_range=(100, 500))   # uses it
+
+The grid has one column per integer review count below INT_LIMIT, a
+log-spaced tail above it, and RATING_STEPS rating rows over [0, 5]. A 2-D
+prefix sum turns any re-binning into four lookups per output cell, so a
+query costs O(output bins) whatever the row count.
+
+Answers are exact whenever the requested edges fall on grid boundaries
+(any bins inside the integer region, rating bins on 0.05 steps). Queries
+that cut a tail bin return None so the caller can fall back to a scan.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from cache import frame_cache, peek_frame_cache
+
+INT_LIMIT = 20_000       # review counts below this get their own column
+TAIL_PER_DECADE = 32     # log-spaced tail columns per factor of 10
+RATING_STEPS = 100       # 0.05-wide rating rows over [0, 5]
+RATING_MAX = 5.0
+
+
+class HeatmapIndex:
+    """Fine count grid plus prefix sums over (total_reviews, rating)."""
+
+    def __init__(self, reviews: np.ndarray, ratings: np.ndarray):
+        keep = ~(np.isnan(reviews) | np.isnan(ratings))
+        reviews, ratings = reviews[keep], ratings[keep]
+        # exact integer semantics need integral, non-negative review counts
+        self.exact = bool(np.all(reviews >= 0) and np.all(reviews == np.trunc(reviews)))
+
+        top = float(reviews.max()) + 1 if reviews.size else 1.0
+        int_edges = np.arange(min(INT_LIMIT, int(top)) + 1, dtype="float64")
+        if top > INT_LIMIT:
+            decades = np.log10(top) - np.log10(INT_LIMIT)
+            tail = np.logspace(np.log10(INT_LIMIT), np.log10(top), int(np.ceil(decades * TAIL_PER_DECADE)) + 1)
+            tail = np.unique(np.ceil(tail[1:]))
+            int_edges = np.concatenate([int_edges, tail])
+        self.x_edges = int_edges
+        # i / 20 is correctly rounded, so multiples of 0.25 are exact edges
+        self.y_edges = np.arange(RATING_STEPS + 1) / (RATING_STEPS / RATING_MAX)
+
+        nx, ny = len(self.x_edges) - 1, RATING_STEPS
+        xi = np.clip(np.searchsorted(self.x_edges, reviews, side="right") - 1, 0, nx - 1)
+        yi = np.searchsorted(self.y_edges, ratings, side="right") - 1
+        yi[ratings == RATING_MAX] = ny - 1          # right edge is inclusive
+        in_y = (ratings >= 0) & (ratings <= RATING_MAX)
+
+        grid = np.bincount(xi[in_y] * ny + yi[in_y], minlength=nx * ny).reshape(nx, ny)
+        self.prefix = np.zeros((nx + 1, ny + 1), dtype=np.int64)
+        self.prefix[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+        # rows per review column regardless of rating (range filters count these)
+        self.rows_prefix = np.concatenate([[0], np.bincount(xi, minlength=nx).cumsum()])
+
+    # ------------------------------------------------------------------
+    def _x_cut(self, values: np.ndarray) -> np.ndarray | None:
+        """Grid boundary index for each integer cut value, or None if unaligned."""
+        values = np.clip(values, 0, self.x_edges[-1])
+        pos = np.searchsorted(self.x_edges, values)
+        if not np.array_equal(self.x_edges[np.minimum(pos, len(self.x_edges) - 1)], values):
+            return None
+        return pos
+
+    def count(self, lo: float, hi: float) -> int | None:
+        """Rows with lo <= total_reviews <= hi (and a rating), or None if unaligned."""
+        if not self.exact:
+            return None
+        if hi < lo:
+            return 0
+        cut = self._x_cut(np.array([np.ceil(lo), np.floor(hi) + 1]))
+        if cut is None:
+            return None
+        return int(self.rows_prefix[cut[1]] - self.rows_prefix[cut[0]])
+
+    def histogram(self, x_edges: np.ndarray, y_edges: np.ndarray,
+                  lo: float, hi: float) -> np.ndarray | None:
+        """
+        Same counts as np.histogram2d(reviews, ratings, bins=[x_edges, y_edges])
+        over rows with lo <= total_reviews <= hi, or None if unaligned.
+        """
+        if not self.exact or y_edges[0] < 0 or y_edges[-1] != RATING_MAX:
+            return None
+
+        # integer review values v fall in [ceil(e_j), ceil(e_j+1)); the last
+        # bin also takes v == its right edge, hence floor(e_last) + 1
+        x_cuts = np.ceil(x_edges)
+        x_cuts[-1] = np.floor(x_edges[-1]) + 1
+        x_cuts = np.clip(x_cuts, np.ceil(lo), np.floor(hi) + 1)
+        xc = self._x_cut(x_cuts)
+
+        yc = np.searchsorted(self.y_edges, y_edges)
+        if xc is None or not np.array_equal(self.y_edges[np.minimum(yc, RATING_STEPS)], y_edges):
+            return None
+
+        p = self.prefix
+        return (
+            p[np.ix_(xc[1:], yc[1:])] - p[np.ix_(xc[:-1], yc[1:])]
+            - p[np.ix_(xc[1:], yc[:-1])] + p[np.ix_(xc[:-1], yc[:-1])]
+        ).astype("float64")
+
+
+def build_heatmap_index(df: pd.DataFrame) -> HeatmapIndex:
+    """Build (once) and memoise the heatmap index of *df*."""
+    store = frame_cache(df)
+    if "heatmap_index" not in store:
+        store["heatmap_index"] = HeatmapIndex(
+            df["total_reviews"].to_numpy(dtype="float64", na_value=np.nan),
+            df["rating"].to_numpy(dtype="float64", na_value=np.nan),
+        )
+    return store["heatmap_index"]
+
+
+def cached_heatmap_index(df: pd.DataFrame) -> HeatmapIndex | None:
+    """The memoised index of *df*, if build_heatmap_index() was called."""
+    store = peek_frame_cache(df)
+    return store.get("heatmap_index") if store is not None else None
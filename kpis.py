@@ -0,0 +1,152 @@
+# kpis.py
+"""
+Headline metrics of a dataset version, computed once and memoised.
+Use:
+    from kpis import store_kpis
+    k = store_kpis(df)                   # built on first use; warm() builds it
+    k.stores, k.avg_rating, k.total_reviews, k.at_least(4.5)
+    k.for_type("ملابس").avg_rating       # same metrics per business_type_ar
+
+One bincount over (business type, rating band) yields the store, rated
+and threshold counts of every type at once; per-type rating and review
+sums come from weighted bincounts over the same type codes. Headline
+figures are the sums over the types, so the per-type metrics cost no
+extra pass. Percentiles are taken once over the whole dataset.
+
+Threshold counts exist for RATING_THRESHOLDS (0.1 steps over [0, 5],
+i.e. every value of the dashboard's rating slider) and compare in the
+rating column's own precision, as query.mask and StoreIndex do. Means
+skip NaN; a NaN rating is never counted as rated.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from cache import frame_cache
+from perf import timed
+
+TYPE_COLUMN = "business_type_ar"
+RATING_THRESHOLDS = tuple(i / 10 for i in range(51))   # 0.0, 0.1, ..., 5.0
+HIGH_RATING = 4.5
+PERCENTILES = (25, 50, 75, 90, 99)
+
+
+def _threshold_slot(threshold: float) -> int:
+    slot = round(threshold * 10)
+    if not 0 <= slot < len(RATING_THRESHOLDS) or abs(threshold * 10 - slot) > 1e-6:
+        raise ValueError(f"no count for rating >= {threshold}; thresholds are 0.1 steps over [0, 5]")
+    return slot
+
+
+@dataclass(frozen=True)
+class TypeKPIs:
+    """Metrics of the stores of one business type."""
+    business_type: str
+    stores: int
+    rated: int                          # stores with a rating
+    avg_rating: float                   # NaN if none is rated
+    total_reviews: int
+    avg_reviews: float
+    rating_at_least: tuple[int, ...]    # one count per RATING_THRESHOLDS
+
+    def at_least(self, threshold: float) -> int:
+        """Stores rated >= *threshold* (one of RATING_THRESHOLDS)."""
+        return self.rating_at_least[_threshold_slot(threshold)]
+
+
+@dataclass(frozen=True)
+class KPIs:
+    """Metrics of the whole dataset, with percentiles and the per-type metrics."""
+    stores: int
+    rated: int
+    avg_rating: float
+    total_reviews: int
+    avg_reviews: float
+    max_reviews: int
+    rating_at_least: tuple[int, ...]
+    rating_percentiles: tuple[float, ...]      # one per PERCENTILES
+    reviews_percentiles: tuple[float, ...]
+    by_type: tuple[TypeKPIs, ...]              # most stores first
+
+    def at_least(self, threshold: float) -> int:
+        """Stores rated >= *threshold* (one of RATING_THRESHOLDS)."""
+        return self.rating_at_least[_threshold_slot(threshold)]
+
+    def for_type(self, business_type: str) -> TypeKPIs | None:
+        """Metrics of *business_type*, or None if it has no stores."""
+        return next((t for t in self.by_type if t.business_type == business_type), None)
+
+
+def _type_codes(df: pd.DataFrame) -> tuple[np.ndarray, pd.Index]:
+    """Integer code per row and the labels; missing types get code len(labels)."""
+    types = df[TYPE_COLUMN]
+    if isinstance(types.dtype, pd.CategoricalDtype):
+        codes, labels = types.cat.codes.to_numpy(), types.cat.categories
+    else:
+        codes, labels = pd.factorize(types)
+    # widened: categorical codes can be int8, too narrow for the grid cells
+    return np.where(codes < 0, len(labels), codes.astype(np.intp)), labels
+
+
+def _mean(total: float, n: int) -> float:
+    return float(total / n) if n else float("nan")
+
+
+def _percentiles(values: np.ndarray) -> tuple[float, ...]:
+    if not values.size:
+        return (float("nan"),) * len(PERCENTILES)
+    return tuple(float(v) for v in np.percentile(values, PERCENTILES))
+
+
+@timed
+def build_kpis(df: pd.DataFrame) -> KPIs:
+    """Compute the KPIs of *df* (prefer the memoised store_kpis)."""
+    rating = df["rating"].to_numpy()
+    if rating.dtype != np.float32:  # float32 kept: thresholds compare in its precision
+        rating = df["rating"].to_numpy(dtype="float64", na_value=np.nan)
+    reviews = df["total_reviews"].to_numpy(dtype="float64", na_value=np.nan)
+    codes, labels = _type_codes(df)
+    groups = len(labels) + 1
+
+    # band b = number of thresholds <= rating (0..nb); unrated rows go to band nb + 1
+    rated = ~np.isnan(rating)
+    nb = len(RATING_THRESHOLDS)
+    bands = np.searchsorted(np.array(RATING_THRESHOLDS, dtype=rating.dtype), rating, side="right")
+    bands[~rated] = nb + 1
+    grid = np.bincount(codes * (nb + 2) + bands, minlength=groups * (nb + 2)).reshape(groups, nb + 2)
+    # at_least[:, i] = rows in bands > i, i.e. rating >= RATING_THRESHOLDS[i]
+    at_least = grid[:, :nb + 1][:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:]
+
+    present = ~np.isnan(reviews)
+    rating_sums = np.bincount(codes[rated], weights=rating[rated].astype("float64"), minlength=groups)
+    review_sums = np.bincount(codes[present], weights=reviews[present], minlength=groups)
+    review_counts = np.bincount(codes[present], minlength=groups)
+    stores = grid.sum(axis=1)
+    rated_counts = stores - grid[:, nb + 1]
+
+    def metrics(g) -> dict:
+        return dict(
+            stores=int(stores[g].sum()),
+            rated=int(rated_counts[g].sum()),
+            avg_rating=_mean(rating_sums[g].sum(), rated_counts[g].sum()),
+            total_reviews=int(review_sums[g].sum()),
+            avg_reviews=_mean(review_sums[g].sum(), review_counts[g].sum()),
+            rating_at_least=tuple(int(n) for n in np.atleast_2d(at_least[g]).sum(axis=0)),
+        )
+
+    order = np.argsort(-stores[:-1], kind="stable")
+    return KPIs(
+        **metrics(slice(None)),
+        max_reviews=int(reviews[present].max()) if present.any() else 0,
+        rating_percentiles=_percentiles(rating[rated]),
+        reviews_percentiles=_percentiles(reviews[present]),
+        by_type=tuple(TypeKPIs(str(labels[g]), **metrics(g)) for g in order if stores[g]),
+    )
+
+
+def store_kpis(df: pd.DataFrame) -> KPIs:
+    """Build (once) and memoise the KPIs of *df*."""
+    store = frame_cache(df)
+    if "kpis" not in store:
+        store["kpis"] = build_kpis(df)
+    return store["kpis"]
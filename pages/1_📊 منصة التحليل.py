@@ -1,13 +1,23 @@
 # pages/1_📊 Dashboard.py
+import logging
 import streamlit as st
 from theme import inject
-import pandas as pd
 from analysis import (
     business_mix_chart,
     create_ratings_analysis_chart,
     create_reviews_analysis_chart,
-    rating_reviews_heatmap  # إضافة الوظيفة الجديدة
+    rating_reviews_heatmap,  # إضافة الوظيفة الجديدة
+    range_summary,
 )
+from cards import range_cards
+from topk import top_k
+from heatmap_index import build_heatmap_index
+from kpis import HIGH_RATING, store_kpis
+from query import store_index, reset_query_stats, query_stats
+from figure_cache import cached_figure, reset_figure_stats, figure_stats
+from dataset import REGISTRY, get_stores
+from refresh import start_refresher
+from perf import begin_rerun, end_rerun, rerun, show_panel, span
 
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
@@ -16,37 +26,67 @@ st.set_page_config(
     layout="wide"
 )
 
-inject()
+# توقيت مراحل الصفحة: يعمل فقط مع MAROOF_PERF=1 أو ?perf=1 في الرابط
+begin_rerun("dashboard")
+
+# خط أصغر لنصوص اللوحة، يُضاف إلى ملف الثيم نفسه بدل كتلة <style> في كل تشغيل
+PAGE_CSS = """
+body, p, div, li, span, .stMarkdown, .rtl-container {
+    font-size: 13px !important;
+}
+"""
+
+with span("theme.inject"):
+    inject(PAGE_CSS)
+
+# هوامش الأعمدة الأفقية وأسماء المتاجر الطويلة (مشتركة بين الرسوم الثلاثة)
+BAR_LAYOUT = dict(
+    margin=dict(l=120, r=50, t=50, b=50),
+    yaxis=dict(
+        tickfont=dict(size=12),
+        automargin=True,
+        title_standoff=20
+    )
+)
 
 # ---------- TITLE AND DESCRIPTION ----------
 st.markdown("<h1 class='warm-text'>📊 لوحة تحليل متاجر معروف</h1>", unsafe_allow_html=True)
 st.markdown("<p class='sub-text'>تحليل بسيط لأكثر من 70,000 متجر إلكتروني لاختيار أفضل مجال في 2026</p>", unsafe_allow_html=True)
 
-# ---------- CHECK DATA ----------
-if 'df' not in st.session_state:
-    st.warning("⚠️ يرجى العودة إلى الصفحة الرئيسية أولاً لتحميل البيانات")
-    st.stop()
+# ---------- LOAD DATA ----------
+# نسخة واحدة مشتركة لكل العملية: الدخول المباشر لهذه الصفحة لا يعيد التحميل
+# التحديث يتم في الخلفية ويستبدل النسخة دفعة واحدة دون انتظار من المستخدم
+with span("load"):
+    start_refresher()
+    if REGISTRY.peek() is None:
+        with st.spinner("جاري تحميل بيانات المتاجر..."):
+            get_stores()
+    df = get_stores().frame
+reset_query_stats()
+reset_figure_stats()
 
-df = st.session_state.df
+# فهارس الترتيب تُبنى مرة واحدة لكل نسخة بيانات وتُعاد في كل تحديث
+with span("index"):
+    idx = store_index(df)
+    build_heatmap_index(df)
 
 # ---------- KEY METRICS ----------
 st.markdown("<h2 class='cool-text'>📈 المؤشرات الرئيسية</h2>", unsafe_allow_html=True)
 st.text('')
 # Create metrics using theme styling
 col1, col2, col3, col4 = st.columns(4)
-total_stores = len(df)
-avg_rating = df['rating'].mean()
-total_reviews = df['total_reviews'].sum()
-high_rated = len(df[df['rating'] >= 4.5])
+# كل المؤشرات تُحسب مرة واحدة لكل نسخة بيانات وتُقرأ هنا وفي التبويبات
+with span("metrics"):
+    kpis = store_kpis(df)
 
 with col1:
-    st.metric(label="إجمالي المتاجر", value=f"{total_stores:,}")
+    st.metric(label="إجمالي المتاجر", value=f"{kpis.stores:,}")
 with col2:
-    st.metric(label="متوسط التقييم", value=f"{avg_rating:.2f}")
+    st.metric(label="متوسط التقييم", value=f"{kpis.avg_rating:.2f}")
 with col3:
-    st.metric(label="إجمالي التقييمات", value=f"{total_reviews:,}")
+    st.metric(label="إجمالي التقييمات", value=f"{kpis.total_reviews:,}")
 with col4:
-    st.metric(label="متاجر ممتازة ≥ 4.5", value=f"{high_rated:,}")
+    st.metric(label=f"متاجر ممتازة ≥ {HIGH_RATING}", value=f"{kpis.at_least(HIGH_RATING):,}")
 
 st.divider()
 
@@ -60,8 +100,12 @@ tab1, tab2, tab3, tab4 = st.tabs([
     "🔥 كثافة التقييمات"  # علامة تبويب جديدة
 ])
 
+# كل تبويب جزء مستقل (st.fragment): تغيير إعدادات تبويب يعيد تشغيله وحده،
+# والتبويبات الأخرى تُخدم من ذاكرة الرسوم عند إعادة تشغيل الصفحة كاملة
 # ---------- Tab 1: Business Mix ----------
-with tab1:
+@st.fragment
+@rerun("dashboard.tab_mix")
+def business_mix_view():
     col_set1, col_set2 = st.columns([1, 3])
     
     with col_set1:
@@ -94,16 +138,13 @@ with tab1:
         """, unsafe_allow_html=True)
     
     with col_set2:
-        fig_mix = business_mix_chart(df, top_n=top_n_mix, sort_by=sort_by)
-        fig_mix.update_layout(
-            margin=dict(l=120, r=50, t=50, b=50),
-            yaxis=dict(
-                tickfont=dict(size=12),
-                automargin=True,
-                title_standoff=20
+        with span("tab_mix.figure"):
+            fig_mix = cached_figure(
+                business_mix_chart, idx, top_n=top_n_mix, sort_by=sort_by,
+                layout=BAR_LAYOUT,
             )
-        )
-        st.plotly_chart(fig_mix, use_container_width=True)
+        with span("tab_mix.serialise"):
+            st.plotly_chart(fig_mix, use_container_width=True)
         
         st.markdown("""
         <div class='stCard' style='border-left: 4px solid var(--dark-text-warm);'>
@@ -117,8 +158,13 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
 
+with tab1:
+    business_mix_view()
+
 # ---------- Tab 2: Ratings ----------
-with tab2:
+@st.fragment
+@rerun("dashboard.tab_rating")
+def top_rated_view():
     col_set3, col_set4 = st.columns([1, 3])
     
     with col_set3:
@@ -140,8 +186,8 @@ with tab2:
             key="rating_top_n"
         )
 
-        high_rated_count = len(df[df['rating'] >= min_rating])
-        percentage = (high_rated_count / total_stores) * 100
+        high_rated_count = kpis.at_least(min_rating)
+        percentage = (high_rated_count / kpis.stores) * 100
 
         st.markdown(f"""
         <div class='stCard'>
@@ -155,16 +201,13 @@ with tab2:
         """, unsafe_allow_html=True)
     
     with col_set4:
-        fig_rating = create_ratings_analysis_chart(df, min_rating=min_rating, top_n=top_n_rating)
-        fig_rating.update_layout(
-            margin=dict(l=120, r=50, t=50, b=50),
-            yaxis=dict(
-                tickfont=dict(size=12),
-                automargin=True,
-                title_standoff=20
+        with span("tab_rating.figure"):
+            fig_rating = cached_figure(
+                create_ratings_analysis_chart, idx, min_rating=min_rating, top_n=top_n_rating,
+                layout=BAR_LAYOUT,
             )
-        )
-        st.plotly_chart(fig_rating, use_container_width=True)
+        with span("tab_rating.serialise"):
+            st.plotly_chart(fig_rating, use_container_width=True)
         
         st.markdown("""
         <div class='stCard' style='border-left: 4px solid var(--dark-text-cool);'>
@@ -178,8 +221,13 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
 
+with tab2:
+    top_rated_view()
+
 # ---------- Tab 3: Reviews ----------
-with tab3:
+@st.fragment
+@rerun("dashboard.tab_reviews")
+def most_active_view():
     col_set5, col_set6 = st.columns([1, 3])
     
     with col_set5:
@@ -193,8 +241,8 @@ with tab3:
             key="reviews_top_n"
         )
 
-        top_store = df.sort_values('total_reviews', ascending=False).iloc[0]
-        avg_reviews = df['total_reviews'].mean()
+        top_store = top_k(df, 'total_reviews', 1).iloc[0]
+        avg_reviews = kpis.avg_reviews
 
         st.markdown(f"""
         <div class='stCard'>
@@ -202,23 +250,20 @@ with tab3:
         <ul class='arabic-list'>
         <li><strong class='warm-text'>{top_store['name_ar']}</strong></li>
         <li>{top_store['total_reviews']:,} تقييم</li>
-        <li>بمعدل {top_store['rating']}/5</li>
+        <li>بمعدل {round(float(top_store['rating']), 2)}/5</li>
         <li>متوسط السوق: <strong class='cool-text'>{avg_reviews:.0f}</strong> تقييم</li>
         </ul>
         </div>
         """, unsafe_allow_html=True)
     
     with col_set6:
-        fig_reviews = create_reviews_analysis_chart(df, top_n=top_n_reviews)
-        fig_reviews.update_layout(
-            margin=dict(l=120, r=50, t=50, b=50),
-            yaxis=dict(
-                tickfont=dict(size=12),
-                automargin=True,
-                title_standoff=20
+        with span("tab_reviews.figure"):
+            fig_reviews = cached_figure(
+                create_reviews_analysis_chart, idx, top_n=top_n_reviews,
+                layout=BAR_LAYOUT,
             )
-        )
-        st.plotly_chart(fig_reviews, use_container_width=True)
+        with span("tab_reviews.serialise"):
+            st.plotly_chart(fig_reviews, use_container_width=True)
         
         st.markdown("""
         <div class='stCard' style='border-left: 4px solid var(--dark-text-warm);'>
@@ -232,9 +277,20 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
 
+with tab3:
+    most_active_view()
+
 # ---------- Tab 4: Heatmap ----------
 # ---------- Tab 4: Heatmap ----------
-with tab4:
+def set_heatmap_range(min_val, max_val):
+    # يُستدعى قبل إعادة التشغيل، فيُرسم الجزء بالنطاق الجديد مباشرة دون st.rerun
+    st.session_state.heatmap_min_manual = min_val
+    st.session_state.heatmap_max_manual = max_val
+
+
+@st.fragment
+@rerun("dashboard.tab_heatmap")
+def heatmap_view():
     col_set7, col_set8 = st.columns([1, 3])
     
     with col_set7:
@@ -250,7 +306,7 @@ with tab4:
             st.session_state.heatmap_max_manual = 100
         
         # الحصول على الحد الأقصى الحقيقي للبيانات
-        max_reviews_in_data = int(df['total_reviews'].max())
+        max_reviews_in_data = kpis.max_reviews
         
         # إصلاح: استخدام القيمة الفعلية القصوى
         st.session_state.heatmap_max_manual = min(st.session_state.heatmap_max_manual, max_reviews_in_data)
@@ -278,10 +334,14 @@ with tab4:
         )
         
         # زر تطبيق الإدخال اليدوي
-        if st.button("تطبيق النطاق اليدوي", key="apply_manual_range", type="primary"):
-            st.session_state.heatmap_min_manual = min_reviews_manual
-            st.session_state.heatmap_max_manual = max_reviews_manual
-            st.rerun()
+        st.button(
+            "تطبيق النطاق اليدوي",
+            key="apply_manual_range",
+            type="primary",
+            on_click=lambda: set_heatmap_range(
+                st.session_state.heatmap_min_input, st.session_state.heatmap_max_input
+            )
+        )
         
         st.divider()
         
@@ -306,15 +366,14 @@ with tab4:
         # إنشاء أزرار للنطاقات السريعة مع مفاتيح فريدة
         range_counter = 0
         for range_name, (min_val, max_val) in quick_ranges.items():
-            if st.button(
+            st.button(
                 f"{range_name}",
                 key=f"quick_range_{range_counter}",
                 use_container_width=True,
-                type="secondary"
-            ):
-                st.session_state.heatmap_min_manual = min_val
-                st.session_state.heatmap_max_manual = max_val
-                st.rerun()
+                type="secondary",
+                on_click=set_heatmap_range,
+                args=(min_val, max_val)
+            )
             range_counter += 1
         
         st.divider()
@@ -366,139 +425,35 @@ with tab4:
             if current_min == min_val and current_max == max_val:
                 range_name = name.split(" (")[0]  # إزالة النص بين قوسين
         
-        fig_heatmap = rating_reviews_heatmap(
-            df, 
-            reviews_range=(current_min, current_max),
-            title=f"كثافة التقييمات مقابل المراجعات - {range_name}"
-        )
-        
-        fig_heatmap.update_layout(
-            height=500,
-            margin=dict(l=50, r=50, t=80, b=50)
-        )
-        
-        st.plotly_chart(fig_heatmap, use_container_width=True)
+        with span("tab_heatmap.figure"):
+            fig_heatmap = cached_figure(
+                rating_reviews_heatmap,
+                idx, 
+                reviews_range=(current_min, current_max),
+                title=f"كثافة التقييمات مقابل المراجعات - {range_name}",
+                layout=dict(
+                    height=500,
+                    margin=dict(l=50, r=50, t=80, b=50)
+                )
+            )
         
-        # تحليل البيانات
-        filtered_data = df[
-            (df['total_reviews'] >= current_min) & 
-            (df['total_reviews'] <= current_max)
-        ]
+        with span("tab_heatmap.serialise"):
+            st.plotly_chart(fig_heatmap, use_container_width=True)
         
-        if len(filtered_data) > 0:
-            avg_rating_in_range = filtered_data['rating'].mean()
-            total_stores_in_range = len(filtered_data)
-            avg_reviews_in_range = filtered_data['total_reviews'].mean()
-            
-            # حساب النسب المئوية
-            percentage_of_total = (total_stores_in_range / total_stores) * 100
-            
-            # العثور على أفضل متاجر في هذا النطاق
-            best_in_range = filtered_data.sort_values(['rating', 'total_reviews'], ascending=[False, False]).head(3)
-            
-            # العثور على مناطق الفرص (تقييم عالي + مراجعات قليلة)
-            opportunity_stores = filtered_data[
-                (filtered_data['rating'] >= 4.5) & 
-                (filtered_data['total_reviews'] <= avg_reviews_in_range)
-            ].head(3)
-            
-            best_stores_html = ""
-            if len(best_in_range) > 0:
-                for idx, row in best_in_range.iterrows():
-                    store_name = row['name_ar'][:30] + "..." if len(row['name_ar']) > 30 else row['name_ar']
-                    best_stores_html += f"""
-                    <li style="
-                        margin-bottom: 12px;
-                        padding: 14px 16px;
-                        background-color: #161b1c;
-                        border-left: 3px solid #2C7D8B;
-                        list-style-type: none;
-                        box-shadow: 0 6px 14px rgba(0,0,0,0.35);
-                    ">
-                        <strong style="color: #C9D2BA;">{store_name}</strong><br>
-                        <span style="color: #2C7D8B;">⭐ {row['rating']}/5</span>
-                        &nbsp;|&nbsp;
-                        <span style="color: #2A927A;">📝 {row['total_reviews']:,}</span>
-                    </li>
-                    """
-
-
-            opportunity_html = ""
-            if len(opportunity_stores) > 0:
-                for idx, row in opportunity_stores.iterrows():
-                    store_name = row['name_ar'][:30] + "..." if len(row['name_ar']) > 30 else row['name_ar']
-                    opportunity_html += f"""
-                    <li style="
-                        margin-bottom: 12px;
-                        padding: 14px 16px;
-                        background-color: #151c1b;
-                        border-left: 3px solid #2A927A;
-                        list-style-type: none;
-                        box-shadow: 0 6px 14px rgba(0,0,0,0.35);
-                    ">
-                        <strong style="color: #C9D2BA;">{store_name}</strong><br>
-                        <span style="color: #2C7D8B;">⭐ {row['rating']}/5</span>
-                        &nbsp;|&nbsp;
-                        <span style="color: #2A927A;">📝 {row['total_reviews']:,}</span>
-                    </li>
-                    """
-
-            if len(filtered_data) > 0:
-                st.markdown(f"""
-                <div class='stCard' style='border-left: 4px solid var(--dark-text-warm);'>
-                <h4 class='warm-text'>📊 تحليل النطاق الحالي:</h4>
-                <ul class='arabic-list'>
-                <li>عدد المتاجر في النطاق: <strong>{total_stores_in_range:,}</strong></li>
-                <li>متوسط التقييم: <strong>{avg_rating_in_range:.2f}/5</strong></li>
-                <li>متوسط المراجعات: <strong>{avg_reviews_in_range:.0f}</strong></li>
-                <li>نسبة من إجمالي المتاجر: <strong>{percentage_of_total:.1f}%</strong></li>
-                </ul>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if best_stores_html:
-                    st.markdown(f"""
-                    <div class='stCard' style='border-left: 4px solid var(--dark-text-cool); margin-top: 20px;'>
-                    <h4 class='cool-text'>🏆 أفضل 3 متاجر في هذا النطاق:</h4>
-                    <ul class='arabic-list' style='list-style-type: none; padding-left: 0;'>
-                    {best_stores_html}
-                    </ul>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                if opportunity_html:
-                    st.markdown(f"""
-                    <div class='stCard' style='border-left: 4px solid #28a745; margin-top: 20px;'>
-                    <h4 style='color: #28a745;'>🎯 فرص للدراسة (تقييم عالي + مراجعات قليلة):</h4>
-                    <ul class='arabic-list' style='list-style-type: none; padding-left: 0;'>
-                    {opportunity_html}
-                    </ul>
-                    <p style='color: var(--dark-text-cool); font-size: 12px; margin-top: 10px;'>
-                    هذه المتاجر حصلت على تقييمات عالية بأقل من متوسط المراجعات، قد تكون نموذجاً جيداً للدراسة.
-                    </p>
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
-                <div class='stCard' style='border-left: 4px solid var(--warm);'>
-                <h4 class='warm-text'>⚠️ ملاحظة:</h4>
-                <p>لا توجد متاجر في هذا النطاق من المراجعات. حاول اختيار نطاق أوسع.</p>
-                </div>
-                """, unsafe_allow_html=True)
+        # تحليل البيانات: إحصاءات النطاق وأفضل المتاجر والفرص في تمريرة واحدة
+        with span("tab_heatmap.filter"):
+            summary = range_summary(idx, (current_min, current_max))
+        for card in range_cards(summary):
+            st.markdown(card, unsafe_allow_html=True)
+
+with tab4:
+    heatmap_view()
 
 st.divider()
 
 # ---------- FINAL RECOMMENDATIONS ----------
 st.markdown("<h2 class='cool-text'>🎯 توصياتنا لعام 2026</h2>", unsafe_allow_html=True)
 
-st.markdown("""
-<style>
-body, p, div, li, span, .stMarkdown, .rtl-container {
-    font-size: 13px !important;
-}
-</style>
-""", unsafe_allow_html=True)
-
 # إصلاح: استخدام column واحد بشكل صحيح
 col_rec1, = st.columns(1)
 
@@ -529,9 +484,9 @@ st.markdown(f"""
 <ol class='arabic-list'>
 <li><strong>السوق ناضج لكن فيه فرص:</strong>
     <ul class='arabic-list'>
-    <li>{total_stores:,} متجر يعني تنوع وخيارات</li>
-    <li>متوسط التقييم {avg_rating:.2f}/5 يدل على جودة عامة</li>
-    <li>فقط {high_rated:,} متجر ممتاز (فرصة للتميز)</li>
+    <li>{kpis.stores:,} متجر يعني تنوع وخيارات</li>
+    <li>متوسط التقييم {kpis.avg_rating:.2f}/5 يدل على جودة عامة</li>
+    <li>فقط {kpis.at_least(HIGH_RATING):,} متجر ممتاز (فرصة للتميز)</li>
     </ul>
 </li>
 </ol>
@@ -545,4 +500,10 @@ st.markdown("""
 👨‍💻 محمد الحسني - محلل بيانات | 📧 elhasanymohamed123@gmail.com<br>
 البيانات من منصة "معروف" | التحليل لمساعدتك في اتخاذ قرار مدروس
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# ---------- QUERY STATS ----------
+logging.getLogger(__name__).debug("filter masks this rerun: %s, figures: %s", query_stats(), figure_stats())
+
+# ---------- PERF PANEL ----------
+show_panel(end_rerun())
@@ -0,0 +1,87 @@
+# parallel.py
+"""
+Optional thread-pool backend for the chunkable aggregations.
+Use:
+    MAROOF_WORKERS=4 streamlit run "الصفحة الرئيسة.py"   # unset / 1: serial, 0: one per CPU
+
+    from parallel import workers, row_chunks, run
+    n = workers(len(x))                  # 1 for small inputs or when off
+    parts = run([partial(np.histogram2d, x[c], y[c], bins=edges) for c in row_chunks(len(x), n)], n)
+
+Threads rather than processes: the kernels doing the work (numpy
+searchsorted / bincount / partition, pandas' groupby reductions) release
+the GIL, while a process pool would pickle every chunk of a
+multi-million-row frame to and from its workers.
+
+Callers split their input so that merging the partial results gives
+exactly the serial result: integer counts are summed, top-N candidates
+are re-ranked, and float sums are never split inside a group (see
+group_buckets). Inputs smaller than MIN_CHUNK_ROWS per worker are
+processed serially.
+"""
+from __future__ import annotations
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence, TypeVar
+import numpy as np
+import pandas as pd
+
+WORKERS = int(os.environ.get("MAROOF_WORKERS", 1)) or os.cpu_count() or 1
+MIN_CHUNK_ROWS = 250_000   # smaller chunks cost more in dispatch than they save
+
+T = TypeVar("T")
+
+_POOLS: dict[int, ThreadPoolExecutor] = {}
+_LOCK = threading.Lock()
+
+
+def workers(n_rows: int, requested: int | None = None) -> int:
+    """Chunks to split *n_rows* rows into: *requested* (default WORKERS), at most one per MIN_CHUNK_ROWS."""
+    wanted = WORKERS if requested is None else requested
+    return max(1, min(wanted, n_rows // MIN_CHUNK_ROWS))
+
+
+def row_chunks(n_rows: int, parts: int) -> list[slice]:
+    """*parts* contiguous slices covering range(n_rows), in order."""
+    bounds = np.linspace(0, n_rows, parts + 1).astype(np.intp)
+    return [slice(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def group_buckets(keys: pd.Series, parts: int) -> np.ndarray:
+    """
+    Bucket (0..parts-1) of every row such that each group of *keys* falls
+    in exactly one bucket; rows with a missing key get bucket *parts*.
+
+    A per-group reduction over np.flatnonzero(buckets == p) then adds the
+    same values in the same order as over the whole frame. Groups are
+    dealt largest first in a serpentine order, which keeps the buckets'
+    row counts close even when a few groups dominate.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes = keys.cat.codes.to_numpy()
+        n_groups = len(keys.cat.categories)
+    else:
+        codes, uniques = pd.factorize(keys)
+        n_groups = len(uniques)
+    sizes = np.bincount(codes + 1, minlength=n_groups + 1)[1:]
+    rank = np.empty(n_groups, dtype=np.intp)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(n_groups)
+    lap, slot = np.divmod(rank, parts)
+    # last entry: code -1 (missing) indexes it
+    table = np.append(np.where(lap % 2 == 0, slot, parts - 1 - slot), parts).astype(np.int16)
+    return table[codes]
+
+
+def _pool(size: int) -> ThreadPoolExecutor:
+    with _LOCK:
+        if size not in _POOLS:
+            _POOLS[size] = ThreadPoolExecutor(max_workers=size, thread_name_prefix="aggregate")
+        return _POOLS[size]
+
+
+def run(tasks: Sequence[Callable[[], T]], size: int) -> list[T]:
+    """Results of *tasks* in task order, computed on a pool of *size* threads (inline if 1)."""
+    if size <= 1 or len(tasks) <= 1:
+        return [task() for task in tasks]
+    return list(_pool(size).map(lambda task: task(), tasks))
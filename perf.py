@@ -0,0 +1,263 @@
+# perf.py
+"""
+Per-rerun timing spans for the dashboard pages and analysis.py.
+Use:
+    from perf import begin_rerun, end_rerun, span, timed
+    begin_rerun("dashboard")             # top of the page script
+    with span("load"):
+        df = get_stores().frame
+    ...
+    timings = end_rerun()                # bottom of the page; None when off
+
+    @timed                               # an analysis function: "analysis.<name>"
+    def business_mix_chart(...): ...
+
+    @st.fragment
+    @rerun("dashboard.tab_mix")          # a fragment: a span inside a full
+    def business_mix_view(): ...         # rerun, its own rerun when run alone
+
+Off by default. MAROOF_PERF=1 turns it on for the whole process; ?perf=1
+in the page URL turns it on for that session and shows the sidebar panel
+(show_panel). While off, no rerun is open on the thread: span() returns
+one shared no-op context and @timed wrappers call straight through, a
+thread-local lookup per call.
+
+Spans are kept per thread, i.e. per Streamlit script run (like
+query.py's counters). They nest, times are inclusive, and a name entered
+several times in one rerun is summed with its call count. end_rerun()
+returns a RerunTimings record and exports it: one JSON line on this
+module's logger, and, when MAROOF_PERF_PROM names a file, process-wide
+counters rewritten there in the Prometheus text format.
+"""
+from __future__ import annotations
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("MAROOF_PERF", "") not in ("", "0")
+PROM_PATH = os.environ.get("MAROOF_PERF_PROM") or None
+QUERY_PARAM = "perf"
+
+_LOCAL = threading.local()
+_NOOP = contextlib.nullcontext()
+_PROM_LOCK = threading.Lock()
+_PROM: dict[tuple, list] = {}   # (metric, page, span) -> [calls, seconds]
+
+
+@dataclass(frozen=True)
+class SpanTiming:
+    name: str
+    calls: int
+    ms: float
+    depth: int      # nesting level where the span was first entered
+
+
+@dataclass(frozen=True)
+class RerunTimings:
+    """One script run's spans, in the order they were first entered."""
+    page: str
+    started_at: float       # epoch seconds
+    total_ms: float
+    spans: tuple[SpanTiming, ...]
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "event": "rerun",
+            "page": self.page,
+            "started_at": round(self.started_at, 3),
+            "total_ms": round(self.total_ms, 2),
+            "spans": {s.name: {"calls": s.calls, "ms": round(s.ms, 2)} for s in self.spans},
+        }, ensure_ascii=False)
+
+
+class _Rerun:
+    __slots__ = ("page", "started_at", "t0", "spans", "depth")
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: dict[str, list] = {}    # name -> [calls, seconds, depth]
+        self.depth = 0
+
+
+class _Span:
+    __slots__ = ("run", "name", "t0")
+
+    def __init__(self, run: _Rerun, name: str):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        run = self.run
+        if self.name not in run.spans:  # entered before its children, so listed first
+            run.spans[self.name] = [0, 0.0, run.depth]
+        run.depth += 1
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.t0
+        self.run.depth -= 1
+        entry = self.run.spans[self.name]
+        entry[0] += 1
+        entry[1] += elapsed
+
+
+def requested() -> bool:
+    """True when MAROOF_PERF is set or this session's URL carries ?perf=1."""
+    if ENABLED:
+        return True
+    # imported here: analysis.py and the refresher import this module without Streamlit
+    import streamlit as st
+    return st.query_params.get(QUERY_PARAM) == "1"
+
+
+def begin_rerun(page: str, enabled: bool | None = None) -> None:
+    """
+    Open this thread's rerun, replacing any left open by a run that
+    stopped early. *enabled* defaults to requested(); False only closes.
+    """
+    if enabled is None:
+        enabled = requested()
+    _LOCAL.run = _Rerun(page) if enabled else None
+
+
+def end_rerun() -> RerunTimings | None:
+    """Close this thread's rerun and export it; None if none was open."""
+    run = getattr(_LOCAL, "run", None)
+    if run is None:
+        return None
+    _LOCAL.run = None
+    timings = RerunTimings(
+        page=run.page,
+        started_at=run.started_at,
+        total_ms=(time.perf_counter() - run.t0) * 1000,
+        spans=tuple(SpanTiming(name, calls, s * 1000, depth)
+                    for name, (calls, s, depth) in run.spans.items()),
+    )
+    logger.info(timings.to_json())
+    if PROM_PATH:
+        _export_prometheus(timings, Path(PROM_PATH))
+    return timings
+
+
+def span(name: str):
+    """Context manager timing its block as *name* in this thread's rerun."""
+    run = getattr(_LOCAL, "run", None)
+    if run is None:
+        return _NOOP
+    return _Span(run, name)
+
+
+def timed(fn: Callable | None = None, *, name: str | None = None):
+    """
+    Decorator: each call is a span named "<module>.<function>" (or *name*).
+    Usable bare (@timed) or with arguments (@timed(name="...")).
+    """
+    if fn is None:
+        return lambda f: timed(f, name=name)
+    label = name or f"{fn.__module__}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        run = getattr(_LOCAL, "run", None)
+        if run is None:
+            return fn(*args, **kwargs)
+        with _Span(run, label):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def rerun(name: str):
+    """
+    Decorator for st.fragment functions. Inside a full rerun the call is a
+    span; when Streamlit reruns the fragment alone it is a rerun of its own,
+    named *name*, opened and exported around the call.
+    """
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = getattr(_LOCAL, "run", None)
+            if run is not None:
+                with _Span(run, name):
+                    return fn(*args, **kwargs)
+            if not requested():
+                return fn(*args, **kwargs)
+            begin_rerun(name, enabled=True)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end_rerun()
+        return wrapper
+    return decorate
+
+
+_METRICS = (  # prefix, count unit, description
+    ("maroof_rerun", "reruns", "Page script reruns"),
+    ("maroof_span", "calls", "Timed spans"),
+)
+
+
+def _labels(page: str, name: str | None) -> str:
+    def quote(value: str) -> str:
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+    return "{page=" + quote(page) + ("" if name is None else ",span=" + quote(name)) + "}"
+
+
+def _prometheus_text() -> str:
+    lines = []
+    for prefix, unit, what in _METRICS:
+        series = [(_labels(page, name), calls, seconds)
+                  for (metric, page, name), (calls, seconds) in _PROM.items() if metric == prefix]
+        lines += [f"# HELP {prefix}_seconds_total {what}: total time.",
+                  f"# TYPE {prefix}_seconds_total counter"]
+        lines += [f"{prefix}_seconds_total{labels} {seconds:.6f}" for labels, _, seconds in series]
+        lines += [f"# HELP {prefix}_{unit}_total {what}: count.",
+                  f"# TYPE {prefix}_{unit}_total counter"]
+        lines += [f"{prefix}_{unit}_total{labels} {calls}" for labels, calls, _ in series]
+    return "\n".join(lines) + "\n"
+
+
+def _export_prometheus(timings: RerunTimings, path: Path) -> None:
+    """Add *timings* to the process-wide counters and rewrite *path* atomically."""
+    with _PROM_LOCK:
+        samples = [("maroof_rerun", None, 1, timings.total_ms)]
+        samples += [("maroof_span", s.name, s.calls, s.ms) for s in timings.spans]
+        for metric, name, calls, ms in samples:
+            entry = _PROM.setdefault((metric, timings.page, name), [0, 0.0])
+            entry[0] += calls
+            entry[1] += ms / 1000
+        text = _prometheus_text()
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("could not write %s: %s", path, exc)
+
+
+def show_panel(timings: RerunTimings | None) -> None:
+    """
+    The debug panel: this rerun's spans in a sidebar expander. Drawn only
+    for sessions opened with ?perf=1, so it stays hidden otherwise.
+    """
+    if timings is None:
+        return
+    import streamlit as st
+    if st.query_params.get(QUERY_PARAM) != "1":
+        return
+    rows = "\n".join(
+        f"| {'&nbsp;' * 4 * s.depth}{s.name} | {s.calls} | {s.ms:,.1f} |" for s in timings.spans
+    )
+    with st.sidebar.expander(f"⏱️ {timings.page}: {timings.total_ms:,.0f} ms"):
+        st.markdown(f"| span | calls | ms |\n|:--|--:|--:|\n{rows}")
@@ -0,0 +1,214 @@
+# query.py
+"""
+Memoised row filters shared by charts and stats cards.
+Use:
+    from query import count, rows
+    n = count(df, ("rating", ">=", 4.5))
+    sub = rows(df, ("total_reviews", "between", (100, 500)))
+
+A condition is (column, op, value) with op one of ">=", "<=", "between"
+(value is (lo, hi), inclusive) or "notna" (value ignored). Each condition
+and each combination is evaluated once per dataset and parameter, then
+served from a small per-frame LRU. NaN never matches a comparison.
+
+Hit/miss counters are kept per thread, i.e. per Streamlit script run:
+call reset_query_stats() at the top of a page and query_stats() at the end.
+
+StoreIndex (see below) answers pure counts, means and range selections on
+rating / total_reviews in O(log n) from sorted columns instead.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple
+import numpy as np
+import pandas as pd
+from cache import frame_cache
+from topk import build_sorted_index
+
+Condition = Tuple[str, str, Any]
+
+MAX_MASKS = 64           # cached masks per frame (each is len(df) bytes)
+
+_OPS = {
+    ">=": lambda x, v: x >= v,
+    "<=": lambda x, v: x <= v,
+    "between": lambda x, v: (x >= v[0]) & (x <= v[1]),
+    "notna": lambda x, v: ~np.isnan(x),
+}
+
+_LOCK = threading.Lock()
+_STATS = threading.local()
+
+
+def _stats() -> dict:
+    if not hasattr(_STATS, "counts"):
+        _STATS.counts = {"hits": 0, "misses": 0}
+    return _STATS.counts
+
+
+def reset_query_stats() -> None:
+    """Zero this thread's hit/miss counters (call once per rerun)."""
+    _STATS.counts = {"hits": 0, "misses": 0}
+
+
+def query_stats() -> dict:
+    """This thread's counters since the last reset: {'hits': n, 'misses': n}."""
+    return dict(_stats())
+
+
+def _key(conds: tuple[Condition, ...]) -> tuple:
+    norm = []
+    for col, op, value in conds:
+        if op not in _OPS:
+            raise ValueError(f"unknown op {op!r}; expected one of {sorted(_OPS)}")
+        if op == "notna":
+            value = None
+        elif op == "between":
+            value = (float(value[0]), float(value[1]))
+        else:
+            value = float(value)
+        norm.append((col, op, value))
+    return tuple(sorted(norm))
+
+
+def _values(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Column as a float array, keeping float32 as float32.
+
+    Thresholds are then compared in the column's own precision (a float32
+    4.7 must still satisfy rating >= 4.7), as pandas comparisons do.
+    """
+    s = df[col]
+    if s.dtype == np.float32:
+        return s.to_numpy()
+    return s.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _evaluate(df: pd.DataFrame, key: tuple) -> np.ndarray:
+    if not key:
+        return np.ones(len(df), dtype=bool)
+    if len(key) == 1:
+        col, op, value = key[0]
+        x = _values(df, col)
+        cast = x.dtype.type
+        value = None if value is None else \
+            tuple(map(cast, value)) if isinstance(value, tuple) else cast(value)
+        return _OPS[op](x, value)
+    # combinations reuse (and populate) the single-condition masks
+    return np.logical_and.reduce([mask(df, cond) for cond in key])
+
+
+def mask(df: pd.DataFrame, *conds: Condition) -> np.ndarray:
+    """Read-only boolean mask of rows matching all *conds* (memoised)."""
+    key = _key(conds)
+    store = frame_cache(df)
+    with _LOCK:
+        masks = store.setdefault("masks", OrderedDict())
+        m = masks.get(key)
+        if m is not None:
+            masks.move_to_end(key)
+            _stats()["hits"] += 1
+            return m
+
+    _stats()["misses"] += 1
+    m = _evaluate(df, key)
+    m.flags.writeable = False
+    with _LOCK:
+        masks[key] = m
+        while len(masks) > MAX_MASKS:
+            masks.popitem(last=False)
+    return m
+
+
+def count(df: pd.DataFrame, *conds: Condition) -> int:
+    """Number of rows matching all *conds*."""
+    return int(np.count_nonzero(mask(df, *conds)))
+
+
+def rows(df: pd.DataFrame, *conds: Condition) -> pd.DataFrame:
+    """Rows of *df* matching all *conds*."""
+    return df[mask(df, *conds)]
+
+
+class StoreIndex:
+    """
+    Sorted views of numeric columns answering threshold and range queries
+    with np.searchsorted, without materialising subsets.
+
+    Use:
+        idx = store_index(df)
+        idx.count("rating", lo=4.5)                      # rating >= 4.5
+        idx.count("total_reviews", 100, 500)             # 100 <= reviews <= 500
+        idx.mean("total_reviews", 100, 500, of="rating")
+        fig = rating_reviews_heatmap(idx, reviews_range=(100, 500))
+
+    Counts are O(log n); means use prefix sums built lazily per
+    (column, of) pair and are O(log n) afterwards. NaN keys never match.
+    The chart builders in analysis.py accept an index wherever they take df.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: tuple[str, ...] = ("rating", "total_reviews")):
+        self.frame = df
+        self._order: dict[str, np.ndarray] = {}
+        self._keys: dict[str, np.ndarray] = {}
+        self._prefix: dict[tuple[str, str], tuple[np.ndarray, np.ndarray]] = {}
+        for col in columns:
+            # shares topk's memoised order: value descending, position ascending
+            order = build_sorted_index(df, col)
+            self._order[col] = order
+            # negated so the keys ascend, as searchsorted requires
+            self._keys[col] = -_values(df, col)[order]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _span(self, column: str, lo: float, hi: float) -> tuple[int, int]:
+        """Slice of the sorted order holding lo <= value <= hi."""
+        keys = self._keys[column]
+        cast = keys.dtype.type  # compare in the column's precision
+        a = np.searchsorted(keys, cast(-hi), side="left") if hi != np.inf else 0
+        b = np.searchsorted(keys, cast(-lo), side="right") if lo != -np.inf else len(keys)
+        return int(a), int(max(a, b))
+
+    def _prefixes(self, column: str, of: str) -> tuple[np.ndarray, np.ndarray]:
+        key = (column, of)
+        if key not in self._prefix:
+            vals = self.frame[of].to_numpy(dtype="float64", na_value=np.nan)[self._order[column]]
+            present = ~np.isnan(vals)
+            self._prefix[key] = (
+                np.concatenate([[0.0], np.cumsum(np.where(present, vals, 0.0))]),
+                np.concatenate([[0], np.cumsum(present)]),
+            )
+        return self._prefix[key]
+
+    def positions(self, column: str, lo: float = -np.inf, hi: float = np.inf) -> np.ndarray:
+        """Row positions with lo <= column <= hi, largest value first."""
+        a, b = self._span(column, lo, hi)
+        return self._order[column][a:b]
+
+    def rows(self, column: str, lo: float = -np.inf, hi: float = np.inf) -> pd.DataFrame:
+        """Rows with lo <= column <= hi, in original row order."""
+        return self.frame.iloc[np.sort(self.positions(column, lo, hi))]
+
+    def count(self, column: str, lo: float = -np.inf, hi: float = np.inf, *, of: str | None = None) -> int:
+        """Rows with lo <= column <= hi (and, if given, a non-NaN *of*)."""
+        a, b = self._span(column, lo, hi)
+        if of is None:
+            return b - a
+        _, counts = self._prefixes(column, of)
+        return int(counts[b] - counts[a])
+
+    def mean(self, column: str, lo: float = -np.inf, hi: float = np.inf, *, of: str) -> float:
+        """Mean of *of* (NaN skipped) over rows with lo <= column <= hi."""
+        a, b = self._span(column, lo, hi)
+        sums, counts = self._prefixes(column, of)
+        n = counts[b] - counts[a]
+        return float((sums[b] - sums[a]) / n) if n else float("nan")
+
+
+def store_index(df: pd.DataFrame) -> StoreIndex:
+    """Build (once) and memoise the StoreIndex of *df*."""
+    store = frame_cache(df)
+    if "store_index" not in store:
+        store["store_index"] = StoreIndex(df)
+    return store["store_index"]
@@ -0,0 +1,181 @@
+# refresh.py
+"""
+Background refresh of the stores dataset with an atomic hot-swap.
+Use:
+    from refresh import start_refresher, refresh_status
+    start_refresher()            # once per process (idempotent)
+    refresh_status().version     # also .duration_s, .checked_at, .last_error
+
+A daemon thread revalidates the source every REFRESH_SECONDS with a
+conditional GET through download.fetch: an unchanged ETag / Last-Modified
+answers 304 with no body, and since the loader is told which version is
+already published, nothing is read from disk either. A server without
+validators re-sends the whole body on every check; it is hashed and only
+parsed if it changed. A new version is validated (dataset.validate_stores)
+and its derived structures (StoreIndex, heatmap index, business-mix cube,
+KPIs) are built on the thread; only then is it published to the registry
+in a single reference swap. Requests keep reading the previous snapshot the
+whole time, and a failed refresh leaves it in place.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable
+import pandas as pd
+
+from dataset import (
+    REGISTRY, SHARED_STORE, STORES_URL, DatasetRegistry,
+    load_stores_versioned, sync_stores_shared, validate_stores,
+)
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(os.environ.get("MAROOF_REFRESH_SECONDS", 15 * 60))
+
+
+@dataclass(frozen=True)
+class RefreshStatus:
+    """What the refresher last did. Times are epoch seconds."""
+    version: str | None = None      # version currently published
+    state: str = "idle"             # "idle" | "refreshing" | "failed"
+    checked_at: float | None = None     # end of the last attempt
+    duration_s: float | None = None     # length of the last attempt
+    published_at: float | None = None   # when that version was published
+    last_error: str | None = None
+    checks: int = 0
+    swaps: int = 0
+
+
+def warm(df: pd.DataFrame) -> None:
+    """Build the memoised structures the dashboard reads on every rerun."""
+    # imported here: analysis pulls in plotly, which the refresher never draws with
+    from analysis import business_mix_cube
+    from heatmap_index import build_heatmap_index
+    from kpis import store_kpis
+    from query import store_index
+
+    store_index(df)
+    build_heatmap_index(df)
+    store_kpis(df)
+    business_mix_cube(df)
+
+
+def _latest(known_version: str | None) -> tuple[pd.DataFrame | None, str]:
+    if SHARED_STORE:
+        return sync_stores_shared(STORES_URL, known_version=known_version)
+    return load_stores_versioned(STORES_URL, known_version=known_version)
+
+
+class StoresRefresher:
+    """
+    Periodically reloads the dataset and publishes new versions to *registry*.
+
+    refresh() runs one check synchronously (the thread calls it, tests can
+    too); start() launches the daemon thread, which first waits for the
+    initial load, warms it, then refreshes immediately and every *interval*.
+
+    *loader* is called with the published version (None before the first
+    load) and may return (None, version) when that version is still the
+    latest, so an unchanged check never reads the data.
+    """
+
+    def __init__(self, registry: DatasetRegistry = REGISTRY,
+                 loader: Callable[[str | None], tuple[pd.DataFrame | None, str]] = _latest,
+                 interval: float = REFRESH_SECONDS):
+        self.registry = registry
+        self.loader = loader
+        self.interval = interval
+        self._status = RefreshStatus()
+        self._lock = threading.Lock()      # one refresh at a time
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def status(self) -> RefreshStatus:
+        """Snapshot of the refresher's state (cheap; safe from any thread)."""
+        snap = self.registry.peek()
+        if snap is None:
+            return self._status
+        return replace(self._status, version=snap.version, published_at=snap.loaded_at)
+
+    def refresh(self) -> RefreshStatus:
+        """Check for a new version now; publish it if valid. Never raises."""
+        with self._lock:
+            self._status = replace(self._status, state="refreshing")
+            t = time.perf_counter()
+            try:
+                current = self.registry.peek()
+                df, version = self.loader(current.version if current is not None else None)
+                swapped = df is not None and (current is None or version != current.version)
+                if swapped:
+                    validate_stores(df, len(current.frame) if current is not None else None)
+                    warm(df)
+                    self.registry.publish(df, version)
+                del df
+            # the thread must survive any loader failure (network, parse, disk)
+            except Exception as exc:
+                logger.warning("stores refresh failed: %s", exc)
+                self._status = replace(
+                    self._status, state="failed", last_error=f"{type(exc).__name__}: {exc}",
+                    checked_at=time.time(), duration_s=time.perf_counter() - t,
+                    checks=self._status.checks + 1,
+                )
+                return self.status()
+
+            self._status = replace(
+                self._status, state="idle", last_error=None,
+                checked_at=time.time(), duration_s=time.perf_counter() - t,
+                checks=self._status.checks + 1,
+                swaps=self._status.swaps + swapped,
+            )
+            if swapped:
+                logger.info("stores version %s published in %.2fs", version, self._status.duration_s)
+            return self.status()
+
+    def start(self) -> StoresRefresher:
+        """Start the background thread (no-op if already running)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stores-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Ask the thread to exit and wait up to *timeout* seconds for it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            warm(self.registry.get().frame)
+        except Exception as exc:  # no snapshot yet: the first refresh loads one
+            logger.warning("initial stores load failed: %s", exc)
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+
+_REFRESHER: StoresRefresher | None = None
+_START_LOCK = threading.Lock()
+
+
+def start_refresher() -> StoresRefresher:
+    """The process-wide refresher, started on first call."""
+    global _REFRESHER
+    with _START_LOCK:
+        if _REFRESHER is None:
+            _REFRESHER = StoresRefresher().start()
+        return _REFRESHER
+
+
+def refresh_status() -> RefreshStatus:
+    """Status of the process-wide refresher (idle defaults if not started)."""
+    if _REFRESHER is None:
+        snap = REGISTRY.peek()
+        if snap is None:
+            return RefreshStatus()
+        return RefreshStatus(version=snap.version, published_at=snap.loaded_at)
+    return _REFRESHER.status()
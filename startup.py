@@ -0,0 +1,46 @@
+# startup.py
+"""
+Cold start of the landing page: draw first, load the dataset behind it.
+Use:
+    from startup import preload_stores
+    preload_stores()        # returns at once; idempotent
+
+The landing page draws no charts, so its script imports neither pandas,
+plotly nor requests. preload_stores() starts one daemon thread that
+imports the data modules and starts the refresher, whose thread then
+loads the first snapshot and warms it (StoreIndex, heatmap index,
+business-mix cube; this imports analysis and plotly). All of that
+happens while the user reads the page. The dashboard usually finds the
+data published when it opens; if not, its get_stores() waits on the same
+load instead of starting another one.
+
+Keep this module free of heavy imports: it is imported by the landing
+page on every cold start.
+"""
+from __future__ import annotations
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_THREAD: threading.Thread | None = None
+_LOCK = threading.Lock()
+
+
+def _preload() -> None:
+    try:
+        from refresh import start_refresher
+        start_refresher()
+    # a failed import must not kill the page: the dashboard loads on demand
+    except Exception as exc:
+        logger.warning("stores preload failed: %s", exc)
+
+
+def preload_stores() -> threading.Thread:
+    """Start the background import and first load (once per process)."""
+    global _THREAD
+    with _LOCK:
+        if _THREAD is None:
+            _THREAD = threading.Thread(target=_preload, name="stores-preload", daemon=True)
+            _THREAD.start()
+        return _THREAD
@@ -0,0 +1,113 @@
+# tests/conftest.py
+"""
+Shared fixtures: a local HTTP stand-in for the stores CSV host and a
+private cache directory.
+Use:
+    python -m pytest -q
+
+The stand-in serves `body` with a strong ETag and Last-Modified (unless
+`validators` is False) and honours If-None-Match, Range and If-Range.
+Scenarios are switched on per test through its attributes:
+
+    fail        answer 503 to the next N requests
+    drop        cut the next full response after fraction F of the body
+    bad_range   answer a Range request with a 206 starting at byte 0
+"""
+from __future__ import annotations
+import email.utils
+import hashlib
+import http.server
+import sys
+import threading
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import dataset   # noqa: E402  (needs the path above)
+import download  # noqa: E402
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        srv: StandIn = self.server
+        with srv.lock:
+            srv.requests.append(dict(self.headers))
+            failing = srv.fail > 0
+            srv.fail -= failing
+            dropping, srv.drop = srv.drop, None
+        if failing:
+            return self._send(503, {}, b"")
+
+        body = srv.body
+        headers = {"Accept-Ranges": "bytes"}
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if srv.validators:
+            headers.update({"ETag": etag, "Last-Modified": srv.modified})
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers, b"")
+
+        rng = self.headers.get("Range")
+        if rng and srv.validators and self.headers.get("If-Range") in (etag, srv.modified):
+            start = 0 if srv.bad_range else int(rng.split("=")[1].rstrip("-"))
+            end = len(body) - 1 if not srv.bad_range else len(body) // 2
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            return self._send(206, headers, body[start:end + 1])
+        if dropping is not None:
+            return self._send(200, headers, body, cut=int(len(body) * dropping))
+        self._send(200, headers, body)
+
+    def _send(self, status: int, headers: dict, body: bytes, cut: int | None = None) -> None:
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body if cut is None else body[:cut])
+        if cut is not None:
+            self.close_connection = True
+
+
+class StandIn(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.requests: list[dict] = []
+        self.validators = True
+        self.fail = 0
+        self.drop: float | None = None
+        self.bad_range = False
+        self.set_body(b"")
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/stores.csv"
+
+    def set_body(self, body: bytes) -> None:
+        """Serve *body* from now on, with a new Last-Modified."""
+        self.body = body
+        self.modified = email.utils.formatdate(usegmt=True)
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Snapshots and shared stores under the test's own directory, retries without delay."""
+    monkeypatch.setattr(dataset, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(download, "BACKOFF_S", 0)
+    return tmp_path / "cache"
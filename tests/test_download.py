@@ -0,0 +1,64 @@
+import gzip
+import pytest
+import requests
+
+from download import fetch, open_body
+
+BODY = b"name_ar,rating\n" + b"".join(b"store %d,4.5\n" % i for i in range(20_000))
+
+
+@pytest.fixture
+def served(stand_in):
+    stand_in.set_body(BODY)
+    return stand_in
+
+
+def _read(path) -> bytes:
+    with open_body(path) as fh:
+        return fh.read()
+
+
+def test_unchanged_file_is_not_transferred(tmp_path, served):
+    first = fetch(served.url, tmp_path / "body")
+    again = fetch(served.url, tmp_path / "body", **first.validators)
+    assert (first.status, again.status) == (200, 304)
+    assert again.path is None and again.etag == first.etag
+
+
+def test_broken_transfer_resumes_with_range(tmp_path, served):
+    served.drop = 0.4
+    res = fetch(served.url, tmp_path / "body")
+    assert res.status == 206 and res.attempts == 2
+    assert 0 < res.resumed_from < len(BODY)
+    assert _read(res.path) == BODY
+
+
+def test_mismatched_partial_content_is_never_committed(tmp_path, served):
+    served.drop = 0.4
+    served.bad_range = True    # every Range request gets bytes 0..len/2
+    res = fetch(served.url, tmp_path / "body")
+    assert res.status == 200 and res.attempts == 3   # cut, bad 206, full retry without Range
+    assert "Range" not in served.requests[-1]
+    assert _read(res.path) == BODY
+    assert not (tmp_path / "body.part").exists()
+
+
+def test_transient_failures_are_retried(tmp_path, served):
+    served.fail = 2
+    res = fetch(served.url, tmp_path / "body")
+    assert res.attempts == 3 and _read(res.path) == BODY
+
+
+def test_persistent_failure_raises_and_keeps_old_body(tmp_path, served):
+    (tmp_path / "body").write_bytes(b"old")
+    served.fail = 99
+    with pytest.raises(requests.HTTPError):
+        fetch(served.url, tmp_path / "body", retries=2)
+    assert len(served.requests) == 3
+    assert (tmp_path / "body").read_bytes() == b"old"
+
+
+def test_gzip_file_is_decoded(tmp_path, served):
+    served.set_body(gzip.compress(BODY))
+    res = fetch(served.url, tmp_path / "body")
+    assert _read(res.path) == BODY
@@ -0,0 +1,46 @@
+import io
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_stores
+from dataset import read_stores_csv
+from download import fetch, open_body
+
+
+@pytest.fixture
+def csv_bytes() -> bytes:
+    # sorted by type: blank types form whole chunks, and other_type_name
+    # (filled for "أخرى" only) is blank in every chunk after the first
+    df = make_stores(3000).sort_values("business_type_ar", ignore_index=True)
+    df.loc[:1499, "business_type_ar"] = None
+    df.loc[:499, "name_ar"] = None
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def test_chunked_parse_matches_whole_file(csv_bytes):
+    whole = read_stores_csv(io.BytesIO(csv_bytes), chunksize=10**6)
+    chunked = read_stores_csv(io.BytesIO(csv_bytes), chunksize=500)
+    pd.testing.assert_frame_equal(chunked, whole)
+
+
+def test_all_blank_chunks_keep_column_dtypes(csv_bytes):
+    df = read_stores_csv(io.BytesIO(csv_bytes), chunksize=500)
+    assert isinstance(df["business_type_ar"].dtype, pd.CategoricalDtype)
+    assert df["business_type_ar"].isna().sum() == 1500
+    assert isinstance(df["other_type_name"].dtype, pd.CategoricalDtype)
+    assert df["name_ar"].dtype == pd.StringDtype("pyarrow")
+
+
+def test_parse_from_file(tmp_path, csv_bytes):
+    path = tmp_path / "stores.csv"
+    path.write_bytes(csv_bytes)
+    pd.testing.assert_frame_equal(read_stores_csv(path, chunksize=700),
+                                  read_stores_csv(io.BytesIO(csv_bytes)))
+
+
+def test_parse_from_http_body(tmp_path, stand_in, csv_bytes):
+    stand_in.set_body(csv_bytes)
+    res = fetch(stand_in.url, tmp_path / "body")
+    with open_body(res.path) as fh:
+        pd.testing.assert_frame_equal(read_stores_csv(fh, chunksize=500),
+                                      read_stores_csv(io.BytesIO(csv_bytes)))
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import parallel
+from benchmarks.synthetic import make_compact_stores
+from topk import top_k_among
+
+WORKERS = 3
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # a few thousand rows are enough to split across the pool
+    monkeypatch.setattr(parallel, "MIN_CHUNK_ROWS", 500)
+
+
+@pytest.fixture(scope="module")
+def stores() -> pd.DataFrame:
+    df = make_compact_stores(6000, seed=7)
+    # categories without any store must not show up in either path
+    unused = ["نشاط بلا متاجر"]
+    df["other_type_name"] = df["other_type_name"].cat.add_categories(unused)
+    df["business_type_ar"] = df["business_type_ar"].cat.add_categories(unused)
+    return df
+
+
+def test_business_mix_matches_serial(stores):
+    serial = analysis._build_business_mix(stores, workers=1)
+    pd.testing.assert_frame_equal(analysis._build_business_mix(stores, workers=WORKERS), serial)
+    assert "نشاط بلا متاجر" not in set(serial["Type"])
+    assert (serial["Total"] > 0).all()
+
+
+def test_histogram_matches_serial(stores):
+    x = stores["total_reviews"].to_numpy(dtype="float64")
+    y = stores["rating"].to_numpy(dtype="float64", na_value=np.nan)
+    keep = ~np.isnan(y) & (x <= 1000)
+    edges = np.linspace(0, 1000, 101), np.linspace(0, 5, 21)
+    np.testing.assert_array_equal(analysis._histogram2d(x[keep], y[keep], *edges, workers=WORKERS),
+                                  analysis._histogram2d(x[keep], y[keep], *edges, workers=1))
+
+
+def test_top_k_matches_serial(stores):
+    keys = [stores[c].to_numpy(dtype="float64", na_value=np.nan) for c in ("rating", "total_reviews")]
+    np.testing.assert_array_equal(top_k_among(keys, 10, WORKERS), top_k_among(keys, 10, 1))
+
+
+def test_group_buckets_keep_groups_whole(stores):
+    buckets = parallel.group_buckets(stores["other_type_name"], WORKERS)
+    per_group = pd.Series(buckets).groupby(stores["other_type_name"].to_numpy(), dropna=False).nunique()
+    assert (per_group == 1).all()
@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+import dataset
+from benchmarks.synthetic import make_stores
+from dataset import DatasetRegistry, load_stores_versioned, sync_stores_shared
+from refresh import StoresRefresher
+
+
+def _csv(seed: int, rows: int = 2000) -> bytes:
+    return make_stores(rows, seed=seed).to_csv(index=False).encode("utf-8")
+
+
+@pytest.fixture
+def reads(monkeypatch) -> dict:
+    """Counts of body parses and snapshot reads."""
+    counts = {"parse": 0, "parquet": 0}
+    parse, read_parquet = dataset._parse_body, pd.read_parquet
+
+    def counting_parse(*args, **kwargs):
+        counts["parse"] += 1
+        return parse(*args, **kwargs)
+
+    def counting_read(*args, **kwargs):
+        counts["parquet"] += 1
+        return read_parquet(*args, **kwargs)
+
+    monkeypatch.setattr(dataset, "_parse_body", counting_parse)
+    monkeypatch.setattr(pd, "read_parquet", counting_read)
+    return counts
+
+
+@pytest.fixture
+def refresher(stand_in) -> StoresRefresher:
+    stand_in.set_body(_csv(seed=0))
+    registry = DatasetRegistry(lambda: load_stores_versioned(stand_in.url))
+    return StoresRefresher(registry, lambda known: load_stores_versioned(stand_in.url, known_version=known))
+
+
+def test_first_refresh_publishes(refresher):
+    status = refresher.refresh()
+    assert status.state == "idle" and status.swaps == 1
+    assert status.version == refresher.registry.peek().version
+    assert len(refresher.registry.peek().frame) == 2000
+
+
+def test_unchanged_source_answers_304_and_reads_nothing(refresher, stand_in, reads):
+    first = refresher.refresh()
+    frame = refresher.registry.peek().frame
+    reads.update(parse=0, parquet=0)
+    status = refresher.refresh()
+    assert "If-None-Match" in stand_in.requests[-1]
+    assert reads == {"parse": 0, "parquet": 0}
+    assert (status.version, status.swaps, status.checks) == (first.version, 1, 2)
+    assert refresher.registry.peek().frame is frame
+
+
+def test_changed_source_is_swapped_in(refresher, stand_in):
+    first = refresher.refresh()
+    old = refresher.registry.peek()
+    stand_in.set_body(_csv(seed=1, rows=2500))
+    status = refresher.refresh()
+    assert status.swaps == 2 and status.version != first.version
+    assert len(refresher.registry.peek().frame) == 2500
+    assert len(old.frame) == 2000     # sessions holding the old snapshot keep it
+
+
+def test_invalid_source_keeps_published_version(refresher, stand_in):
+    first = refresher.refresh()
+    stand_in.set_body(b"name_ar,rating\nx,4.5\n")
+    status = refresher.refresh()
+    assert status.state == "failed" and "missing columns" in status.last_error
+    assert status.version == first.version and status.swaps == 1
+
+
+def test_unreachable_source_serves_snapshot(refresher, stand_in):
+    first = refresher.refresh()
+    stand_in.fail = 99
+    df, version = load_stores_versioned(stand_in.url, timeout=5)
+    assert version == first.version and len(df) == 2000
+
+
+def test_without_validators_unchanged_body_is_not_parsed(refresher, stand_in, reads):
+    stand_in.validators = False
+    first = refresher.refresh()
+    assert reads["parse"] == 1
+    status = refresher.refresh()
+    assert "If-None-Match" not in stand_in.requests[-1]     # nothing to revalidate with
+    assert reads == {"parse": 1, "parquet": 0}
+    assert status.version == first.version and status.swaps == 1
+
+    stand_in.set_body(_csv(seed=1))
+    assert refresher.refresh().swaps == 2 and reads["parse"] == 2
+
+
+def test_shared_store_unchanged_source_maps_nothing(stand_in, reads):
+    stand_in.set_body(_csv(seed=0))
+    df, version = sync_stores_shared(stand_in.url)
+    assert len(df) == 2000
+    assert sync_stores_shared(stand_in.url, known_version=version) == (None, version)
+    assert reads == {"parse": 1, "parquet": 0}
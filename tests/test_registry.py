@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_compact_stores
+from cache import frame_cache
+from dataset import DatasetRegistry, map_column_store, write_column_store
+
+
+@pytest.fixture(params=["heap", "mapped"])
+def published(request, tmp_path):
+    df = make_compact_stores(2000)
+    if request.param == "mapped":
+        write_column_store(df, tmp_path / "store")
+        df = map_column_store(tmp_path / "store")
+    frame_cache(df)["marker"] = True
+    return df, DatasetRegistry(lambda: (df, "v1")).get()
+
+
+@pytest.mark.parametrize("column", ["rating", "total_reviews", "business_type_ar"])
+def test_published_frame_rejects_cell_writes(published, column):
+    _, snap = published
+    frame = snap.frame
+    before = frame[column].copy()
+    with pytest.raises(ValueError, match="read-only"):
+        frame.loc[0, column] = frame[column].iloc[1]
+    with pytest.raises(ValueError, match="read-only"):
+        frame.iloc[:5, frame.columns.get_loc(column)] = frame[column].iloc[1]
+    pd.testing.assert_series_equal(frame[column], before)
+
+
+def test_publish_keeps_frame_identity(published):
+    df, snap = published
+    assert snap.frame is df and frame_cache(snap.frame)["marker"]
+
+
+def test_derived_frames_stay_writable(published):
+    _, snap = published
+    frame = snap.frame
+    rated = frame[frame["rating"].notna()]
+    first = rated.index[0]
+    rated.loc[first, "rating"] = 0.0
+    copied = frame.copy()
+    copied.loc[first, "total_reviews"] = -1
+    assigned = frame.assign(score=np.arange(len(frame)))
+    assigned.loc[first, "score"] = -1
+    assert frame.loc[first, "rating"] != 0.0 and frame.loc[first, "total_reviews"] >= 0
@@ -0,0 +1,40 @@
+import os
+import time
+import pytest
+
+import theme
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    monkeypatch.setattr(theme, "STATIC_DIR", tmp_path)
+    monkeypatch.setattr(theme, "_pruned", False)
+    monkeypatch.setattr(theme, "_LINKS", {})
+    monkeypatch.setattr(theme.st, "get_option", lambda name: True)
+    sent = []
+    monkeypatch.setattr(theme.st, "markdown", lambda body, **kw: sent.append(body))
+    theme._theme_html.cache_clear()
+    yield tmp_path, sent
+    theme._theme_html.cache_clear()
+
+
+def test_stylesheet_deleted_by_another_process_is_rewritten(static):
+    directory, sent = static
+    theme.inject()
+    (css,) = directory.glob("theme.*.css")
+    css.unlink()                      # e.g. pruned by a server started later
+    theme.inject()
+    assert sent[0] == sent[1] and css.name in sent[1]
+    assert css.exists()
+
+
+def test_only_long_untouched_stylesheets_are_pruned(static):
+    directory, _ = static
+    old, recent = directory / "theme.000000000000.css", directory / "theme.111111111111.css"
+    old.write_text("a{}")
+    recent.write_text("b{}")
+    stale = time.time() - (theme.STATIC_MAX_AGE_DAYS + 1) * 86400
+    os.utime(old, (stale, stale))
+    os.utime(recent, (time.time() - 86400,) * 2)   # another process's, from yesterday
+    theme.inject()
+    assert not old.exists() and recent.exists()
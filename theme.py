@@ -1,469 +1,630 @@
+# theme.py
+"""
+Dashboard CSS, built once per process and served as a static file.
+Use:
+    from theme import inject
+    inject()                  # right after st.set_page_config()
+    inject(PAGE_CSS)          # the theme plus a page's own rules
+
+THEME_CSS (plus a page's extra rules) is minified and written to
+static/theme.<hash>.css the first time a page asks for it; with
+server.enableStaticServing on (.streamlit/config.toml), every rerun then
+sends only a <link> tag to that URL, which the browser fetches once and
+caches: the hash changes whenever the CSS does. Streamlit drops elements a
+rerun does not re-send, so the tag itself is re-sent on each rerun, but
+it is ~100 bytes instead of the whole stylesheet. Without static serving
+(or with a read-only checkout) the minified CSS is inlined instead.
+
+Noto Sans Arabic (OFL) comes from static/fonts/NotoSansArabic-<Weight>.woff2
+(Light, Regular, Medium, SemiBold, Bold) with font-display: swap when
+those files are there, so the dashboard renders offline and without a
+render-blocking request to Google Fonts; until they are added the
+stylesheet imports the font from Google Fonts. Where neither loads, text
+falls back to the platform's Arabic UI fonts (Segoe UI, Tahoma, Geeza Pro).
+
+Stylesheets are regenerated on demand and ignored by git. Each process
+touches the ones it links to and, once at startup, deletes those nobody
+has touched for STATIC_MAX_AGE_DAYS; should another server on the host
+delete a file anyway, inject() notices and writes it again.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import logging
+import os
+import re
+import time
+from pathlib import Path
 import streamlit as st
 
-def inject():
-    st.markdown(
-        """
-        <style>
-        /* IMPORT ARABIC FONT */
-        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+Arabic:wght@300;400;500;600;700&display=swap');
-        
-        /* CSS VARIABLES - Dark Theme Only with Specified Accent Colors */
-        :root {
-            --dark-bg: #1a1a1a;
-            --dark-bg-gradient: linear-gradient(135deg, #1a1a1a 0%, #222222 100%);
-            --dark-card: #242424;
-            --dark-card-border: #3a3a3a;
-            --dark-text-primary: #e8e6e3;
-            --dark-text-secondary: #b0a9a2;
-            --dark-text-warm: #2C7D8B;  /* Specified accent color 1 */
-            --dark-text-cool: #2A927A;  /* Specified accent color 2 */
-            --dark-accent: #2C7D8B;     /* Primary accent - specified */
-            --dark-accent-hover: #2A927A; /* Secondary accent - specified */
-            --dark-sidebar: #1e1e1e;
-            --dark-metric-bg: #242424;
-            --dark-input-bg: #242424;
-            --dark-slider-track: #3a3a3a;
-            --dark-table-header: #2a2a2a;
-            --dark-table-hover: #2f2f2f;
-            --dark-scrollbar-track: #2a2a2a;
-            --dark-scrollbar-thumb: #3a3a3a;
-            --dark-tab-inactive: #2a2a2a;
-            /* Hover colors for tooltips */
-            --hover-bg: #C9D2BA;
-            --hover-text: #202020;
-        }
-
-        /* ARABIC RTL SUPPORT */
-        * { 
-            font-family: 'Noto Sans Arabic', 'Segoe UI', system-ui, sans-serif !important;
-            text-align: right;
-            direction: rtl;
-        }
-        
-        /* Exclude plots and charts from RTL */
-        .stPlotlyChart *,
-        .js-plotly-plot *,
-        .plotly *,
-        .stPlotlyChart,
-        [class*="plotly"] *,
-        [class*="hover"] *,
-        .modebar,
-        .modebar-container {
-            text-align: left !important;
-            direction: ltr !important;
-            font-family: 'Roboto', sans-serif !important;
-        }
-        
-        /* ROOT RESET */
-        .stApp { 
-            background: var(--dark-bg-gradient);
-        }
-
-        /* TYPOGRAPHY - Arabic optimized - Smaller font sizes */
-        html, body, [class*="css"] { 
-            font-weight: 400;
-            line-height: 1.6;
-            letter-spacing: -0.01em;
-            font-size: 13px; /* Reduced from 14px */
-        }
-
-        /* Headers - Smaller sizes */
-        h1 {
-            font-size: 1.6rem; /* Reduced from 2rem */
-            font-weight: 700;
-            color: var(--dark-text-primary);
-            border-right: 4px solid var(--dark-text-warm);
-            padding-right: 12px;
-            margin-top: 1.2em;
-            margin-bottom: 0.8em;
-        }
-        
-        h2 {
-            font-size: 1.3rem; /* Reduced from 1.5rem */
-            font-weight: 600;
-            color: var(--dark-text-secondary);
-            border-bottom: 1px solid var(--dark-card-border);
-            padding-bottom: 6px;
-            margin-top: 1em;
-            margin-bottom: 0.6em;
-        }
-        
-        h3 {
-            font-size: 1.1rem; /* Reduced from 1.2rem */
-            font-weight: 500;
-            color: var(--dark-text-secondary);
-            margin-top: 0.8em;
-            margin-bottom: 0.5em;
-        }
-        
-        h4 {
-            font-size: 1rem; /* Reduced from 1.1rem */
-            font-weight: 500;
-            color: var(--dark-text-secondary);
-            margin-top: 0.7em;
-            margin-bottom: 0.4em;
-        }
-
-        /* TEXT COLORS */
-        .main-text { 
-            color: var(--dark-text-primary);
-            font-weight: 500;
-        }
-        
-        .sub-text  { 
-            color: var(--dark-text-secondary);
-            font-weight: 300;
-        }
-        
-        .warm-text {
-            color: var(--dark-text-warm);
-            font-weight: 600;
-        }
-        
-        .cool-text {
-            color: var(--dark-text-cool);
-            font-weight: 500;
-        }
-
-        /* CARDS & CONTAINERS */
-        .stCard {
-            background-color: var(--dark-card);
-            border: 1px solid var(--dark-card-border);
-            padding: 14px; /* Reduced from 16px */
-            margin: 6px 0; /* Reduced from 8px */
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        
-        /* METRIC CARDS */
-        div[data-testid="stMetric"] {
-            background-color: var(--dark-metric-bg);
-            border: 1px solid var(--dark-card-border);
-            padding: 10px; /* Reduced from 12px */
-            text-align: center;
-        }
-        
-        div[data-testid="stMetric"] > div {
-            color: var(--dark-text-primary) !important;
-            font-size: 1em; /* Reduced from 1.1em */
-        }
-        
-        div[data-testid="stMetricLabel"] {
-            color: var(--dark-text-secondary) !important;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        /* BUTTONS */
-        .stButton > button {
-            background-color: var(--dark-accent);
-            color: #ffffff;
-            border: none;
-            font-weight: 600;
-            padding: 8px 20px; /* Reduced from 10x24 */
-            font-size: 0.8em; /* Reduced from 0.9em */
-            border-radius: 4px;
-            margin: 3px; /* Reduced from 4px */
-        }
-        
-        .stButton > button:hover {
-            background-color: var(--dark-accent-hover);
-            color: #ffffff;
-            box-shadow: 0 3px 10px rgba(44, 125, 139, 0.3); /* Reduced shadow */
-        }
-
-        /* INPUT WIDGETS */
-        .stTextInput > div > div > input,
-        .stNumberInput > div > div > input,
-        .stSelectbox > div > div > div {
-            background-color: var(--dark-input-bg);
-            color: var(--dark-text-primary);
-            border: 1px solid var(--dark-card-border);
-            text-align: right;
-            padding-right: 10px; /* Reduced from 12px */
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        /* SLIDERS */
-        .stSlider > div > div > div {
-            background-color: var(--dark-slider-track);
-        }
-        
-        .stSlider > div > div > div > div {
-            background-color: var(--dark-text-warm);
-        }
-
-        /* CHECKBOXES & RADIO - RTL */
-        .stCheckbox > label,
-        .stRadio > label {
-            color: var(--dark-text-secondary);
-            flex-direction: row-reverse;
-            justify-content: flex-end;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        .stCheckbox > label > div:first-child,
-        .stRadio > label > div:first-child {
-            background-color: var(--dark-input-bg);
-            border-color: var(--dark-card-border);
-            margin-left: 8px; /* Reduced from 10px */
-            margin-right: 0;
-        }
-
-        /* DATA TABLES */
-        .dataframe {
-            background-color: var(--dark-card) !important;
-            color: var(--dark-text-primary) !important;
-            text-align: right;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        .dataframe th {
-            background-color: var(--dark-table-header) !important;
-            color: var(--dark-text-warm) !important;
-            font-weight: 600;
-            border-bottom: 2px solid var(--dark-card-border) !important;
-            text-align: right !important;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        .dataframe td {
-            border-bottom: 1px solid var(--dark-card-border) !important;
-            text-align: right !important;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        .dataframe tr:hover {
-            background-color: var(--dark-table-hover) !important;
-        }
-
-        /* SIDEBAR */
-        section[data-testid="stSidebar"] {
-            background-color: var(--dark-sidebar);
-            border-left: 1px solid var(--dark-card-border);
-            border-right: none;
-        }
-        
-        /* SIDEBAR NAVIGATION */
-        section[data-testid="stSidebar"] div[role="radiogroup"] label {
-            color: var(--dark-text-secondary);
-            padding: 8px 16px 8px 12px; /* Reduced from 10x18x10x14 */
-            margin: 2px 0; /* Reduced from 3px */
-            border-right: 3px solid transparent;
-            border-left: none;
-            text-align: right;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        section[data-testid="stSidebar"] div[role="radiogroup"] label:hover {
-            background-color: var(--dark-table-header);
-            border-right-color: var(--dark-text-warm);
-            color: var(--dark-text-primary);
-            padding-right: 18px; /* Reduced from 20px */
-        }
-        
-        section[data-testid="stSidebar"] div[role="radiogroup"] label[data-baseweb="radio"][aria-checked="true"] {
-            background-color: var(--dark-table-header);
-            border-right: 3px solid var(--dark-text-warm);
-            border-left: none;
-            color: var(--dark-text-primary);
-            padding-right: 18px; /* Reduced from 20px */
-        }
-
-        /* TABS */
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 2px;
-            background-color: var(--dark-card);
-            padding: 3px; /* Reduced from 4px */
-        }
-        
-        .stTabs [data-baseweb="tab"] {
-            background-color: var(--dark-tab-inactive);
-            color: var(--dark-text-secondary);
-            padding: 6px 14px; /* Reduced from 8x16 */
-            text-align: center;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        .stTabs [aria-selected="true"] {
-            background-color: var(--dark-text-warm) !important;
-            color: var(--dark-bg) !important;
-            font-weight: 600;
-        }
-
-        /* PROGRESS BARS */
-        .stProgress > div > div > div {
-            background-color: var(--dark-text-warm);
-        }
-
-        /* SCROLLBARS */
-        ::-webkit-scrollbar {
-            width: 5px; /* Reduced from 6px */
-            height: 5px;
-        }
-        
-        ::-webkit-scrollbar-track {
-            background: var(--dark-scrollbar-track);
-        }
-        
-        ::-webkit-scrollbar-thumb {
-            background: var(--dark-scrollbar-thumb);
-        }
-        
-        ::-webkit-scrollbar-thumb:hover {
-            background: var(--dark-text-warm);
-        }
-
-        /* SELECTION */
-        ::selection {
-            background-color: rgba(44, 125, 139, 0.3);
-            color: var(--dark-text-primary);
-        }
-
-        /* PLOT COMPATIBILITY - LTR for plots only */
-        .stPlotlyChart,
-        .stPlotlyChart > div,
-        .stPlotlyChart svg,
-        .stPlotlyChart .js-plotly-plot,
-        .stPlotlyChart .plot-container,
-        .stPlotlyChart .main-svg,
-        .stPlotlyChart .bg {
-            background-color: transparent !important;
-            background: transparent !important;
-            text-align: left !important;
-            direction: ltr !important;
-        }
-        
-        /* Ensure plot containers don't inherit RTL */
-        div[data-testid="stPlotlyChart"],
-        .stPlotlyChart {
-            background: transparent !important;
-            padding: 0 !important;
-            margin: 0 !important;
-            border: none !important;
-        }
-
-        /* SMOOTH PAGE TRANSITIONS */
-        .stApp {
-            animation: pageLoad 0.5s ease-out;
-        }
-        
-        @keyframes pageLoad {
-            from {
-                opacity: 0;
-            }
-            to {
-                opacity: 1;
-            }
-        }
-
-        /* SPECIFIC FIXES FOR ARABIC TYPOGRAPHY */
-        .rtl-container {
-            text-align: right;
-            direction: rtl;
-            font-family: 'Noto Sans Arabic', sans-serif;
-        }
-        
-        .ltr-container {
-            text-align: left;
-            direction: ltr;
-            font-family: 'Roboto', sans-serif;
-        }
-        
-        /* Arabic list styling */
-        ol.arabic-list, ul.arabic-list {
-            padding-right: 18px; /* Reduced from 20px */
-            padding-left: 0;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        li {
-            margin-right: 6px; /* Reduced from 8px */
-            margin-left: 0;
-            margin-bottom: 3px; /* Reduced from 4px */
-        }
-        
-        /* Arabic form controls */
-        .stTextArea textarea {
-            text-align: right;
-            direction: rtl;
-            font-size: 0.8em; /* Reduced from 0.9em */
-        }
-        
-        /* Fix for number inputs in RTL */
-        .stNumberInput input {
-            text-align: right;
-            direction: ltr; /* Numbers should be LTR */
-        }
-
-        /* Paragraph text */
-        p {
-            font-size: 0.8em; /* Reduced from 0.9em */
-            line-height: 1.6;
-            margin-bottom: 0.6em; /* Reduced from 0.8em */
-        }
-        
-        /* Strong text */
-        strong {
-            color: var(--dark-text-warm);
-            font-weight: 600;
-        }
-        
-        /* Links */
-        a {
-            color: var(--dark-text-cool);
-            text-decoration: none;
-        }
-        
-        a:hover {
-            color: var(--dark-text-warm);
-            text-decoration: underline;
-        }
-
-        /* REMOVE THEME SWITCHER */
-        .theme-switch {
-            display: none !important;
-        }
-        
-        /* Custom hover tooltip styling */
-        .hoverlayer .hovertext {
-            background-color: var(--hover-bg) !important;
-            color: var(--hover-text) !important;
-            font-family: 'Noto Sans Arabic', sans-serif !important;
-            text-align: right !important;
-            direction: rtl !important;
-            border: 1px solid var(--dark-card-border) !important;
-            border-radius: 4px !important;
-            padding: 8px !important;
-            font-size: 0.8em !important;
-        }
-        
-        .hoverlayer .hovertext text {
-            fill: var(--hover-text) !important;
-            font-family: 'Noto Sans Arabic', sans-serif !important;
-        }
-        /*=========================================================================*/
-        /* Hide sidebar expand/collapse keyboard hints */
-        section[data-testid="stSidebar"] > div:first-child > div:first-child > div:first-child {
-            display: none !important;
-        }
-
-        /* Remove ghost transparency effects on sidebar */
-        section[data-testid="stSidebar"] > div {
-            opacity: 1 !important;
-            background-color: var(--dark-sidebar) !important;
-        }
-
-        /* Fix sidebar header icons */
-        section[data-testid="stSidebar"] button[data-testid="baseButton-header"] {
-            background-color: transparent !important;
-            border: none !important;
-            color: var(--dark-text-primary) !important;
-        }
-
-        /* Remove any floating action buttons that might cause ghost effects */
-        section[data-testid="stSidebar"] > div > div > div[style*="position: absolute"] {
-            display: none !important;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).with_name("static")   # served at app/static/
+STATIC_URL = "app/static"
+FONT_DIR = STATIC_DIR / "fonts"
+FONT_WEIGHTS = {300: "Light", 400: "Regular", 500: "Medium", 600: "SemiBold", 700: "Bold"}
+GOOGLE_FONTS_URL = (
+    "https://fonts.googleapis.com/css2?family=Noto+Sans+Arabic:wght@300;400;500;600;700&display=swap"
+)
+
+STATIC_MAX_AGE_DAYS = 30   # far beyond any server process's lifetime
+
+_LINKS: dict[str, Path] = {}   # <link> tag -> the stylesheet file it points to
+_pruned = False
+
+THEME_CSS = """\
+/* CSS VARIABLES - Dark Theme Only with Specified Accent Colors */
+:root {
+    --dark-bg: #1a1a1a;
+    --dark-bg-gradient: linear-gradient(135deg, #1a1a1a 0%, #222222 100%);
+    --dark-card: #242424;
+    --dark-card-border: #3a3a3a;
+    --dark-text-primary: #e8e6e3;
+    --dark-text-secondary: #b0a9a2;
+    --dark-text-warm: #2C7D8B;  /* Specified accent color 1 */
+    --dark-text-cool: #2A927A;  /* Specified accent color 2 */
+    --dark-accent: #2C7D8B;     /* Primary accent - specified */
+    --dark-accent-hover: #2A927A; /* Secondary accent - specified */
+    --dark-sidebar: #1e1e1e;
+    --dark-metric-bg: #242424;
+    --dark-input-bg: #242424;
+    --dark-slider-track: #3a3a3a;
+    --dark-table-header: #2a2a2a;
+    --dark-table-hover: #2f2f2f;
+    --dark-scrollbar-track: #2a2a2a;
+    --dark-scrollbar-thumb: #3a3a3a;
+    --dark-tab-inactive: #2a2a2a;
+    /* Hover colors for tooltips */
+    --hover-bg: #C9D2BA;
+    --hover-text: #202020;
+}
+
+/* ARABIC RTL SUPPORT */
+* { 
+    font-family: 'Noto Sans Arabic', 'Segoe UI', Tahoma, 'Geeza Pro', system-ui, sans-serif !important;
+    text-align: right;
+    direction: rtl;
+}
+
+/* Exclude plots and charts from RTL */
+.stPlotlyChart *,
+.js-plotly-plot *,
+.plotly *,
+.stPlotlyChart,
+[class*="plotly"] *,
+[class*="hover"] *,
+.modebar,
+.modebar-container {
+    text-align: left !important;
+    direction: ltr !important;
+    font-family: 'Roboto', sans-serif !important;
+}
+
+/* ROOT RESET */
+.stApp { 
+    background: var(--dark-bg-gradient);
+}
+
+/* TYPOGRAPHY - Arabic optimized - Smaller font sizes */
+html, body, [class*="css"] { 
+    font-weight: 400;
+    line-height: 1.6;
+    letter-spacing: -0.01em;
+    font-size: 13px; /* Reduced from 14px */
+}
+
+/* Headers - Smaller sizes */
+h1 {
+    font-size: 1.6rem; /* Reduced from 2rem */
+    font-weight: 700;
+    color: var(--dark-text-primary);
+    border-right: 4px solid var(--dark-text-warm);
+    padding-right: 12px;
+    margin-top: 1.2em;
+    margin-bottom: 0.8em;
+}
+
+h2 {
+    font-size: 1.3rem; /* Reduced from 1.5rem */
+    font-weight: 600;
+    color: var(--dark-text-secondary);
+    border-bottom: 1px solid var(--dark-card-border);
+    padding-bottom: 6px;
+    margin-top: 1em;
+    margin-bottom: 0.6em;
+}
+
+h3 {
+    font-size: 1.1rem; /* Reduced from 1.2rem */
+    font-weight: 500;
+    color: var(--dark-text-secondary);
+    margin-top: 0.8em;
+    margin-bottom: 0.5em;
+}
+
+h4 {
+    font-size: 1rem; /* Reduced from 1.1rem */
+    font-weight: 500;
+    color: var(--dark-text-secondary);
+    margin-top: 0.7em;
+    margin-bottom: 0.4em;
+}
+
+/* TEXT COLORS */
+.main-text { 
+    color: var(--dark-text-primary);
+    font-weight: 500;
+}
+
+.sub-text  { 
+    color: var(--dark-text-secondary);
+    font-weight: 300;
+}
+
+.warm-text {
+    color: var(--dark-text-warm);
+    font-weight: 600;
+}
+
+.cool-text {
+    color: var(--dark-text-cool);
+    font-weight: 500;
+}
+
+/* CARDS & CONTAINERS */
+.stCard {
+    background-color: var(--dark-card);
+    border: 1px solid var(--dark-card-border);
+    padding: 14px; /* Reduced from 16px */
+    margin: 6px 0; /* Reduced from 8px */
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+
+/* METRIC CARDS */
+div[data-testid="stMetric"] {
+    background-color: var(--dark-metric-bg);
+    border: 1px solid var(--dark-card-border);
+    padding: 10px; /* Reduced from 12px */
+    text-align: center;
+}
+
+div[data-testid="stMetric"] > div {
+    color: var(--dark-text-primary) !important;
+    font-size: 1em; /* Reduced from 1.1em */
+}
+
+div[data-testid="stMetricLabel"] {
+    color: var(--dark-text-secondary) !important;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+/* BUTTONS */
+.stButton > button {
+    background-color: var(--dark-accent);
+    color: #ffffff;
+    border: none;
+    font-weight: 600;
+    padding: 8px 20px; /* Reduced from 10x24 */
+    font-size: 0.8em; /* Reduced from 0.9em */
+    border-radius: 4px;
+    margin: 3px; /* Reduced from 4px */
+}
+
+.stButton > button:hover {
+    background-color: var(--dark-accent-hover);
+    color: #ffffff;
+    box-shadow: 0 3px 10px rgba(44, 125, 139, 0.3); /* Reduced shadow */
+}
+
+/* INPUT WIDGETS */
+.stTextInput > div > div > input,
+.stNumberInput > div > div > input,
+.stSelectbox > div > div > div {
+    background-color: var(--dark-input-bg);
+    color: var(--dark-text-primary);
+    border: 1px solid var(--dark-card-border);
+    text-align: right;
+    padding-right: 10px; /* Reduced from 12px */
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+/* SLIDERS */
+.stSlider > div > div > div {
+    background-color: var(--dark-slider-track);
+}
+
+.stSlider > div > div > div > div {
+    background-color: var(--dark-text-warm);
+}
+
+/* CHECKBOXES & RADIO - RTL */
+.stCheckbox > label,
+.stRadio > label {
+    color: var(--dark-text-secondary);
+    flex-direction: row-reverse;
+    justify-content: flex-end;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+.stCheckbox > label > div:first-child,
+.stRadio > label > div:first-child {
+    background-color: var(--dark-input-bg);
+    border-color: var(--dark-card-border);
+    margin-left: 8px; /* Reduced from 10px */
+    margin-right: 0;
+}
+
+/* DATA TABLES */
+.dataframe {
+    background-color: var(--dark-card) !important;
+    color: var(--dark-text-primary) !important;
+    text-align: right;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+.dataframe th {
+    background-color: var(--dark-table-header) !important;
+    color: var(--dark-text-warm) !important;
+    font-weight: 600;
+    border-bottom: 2px solid var(--dark-card-border) !important;
+    text-align: right !important;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+.dataframe td {
+    border-bottom: 1px solid var(--dark-card-border) !important;
+    text-align: right !important;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+.dataframe tr:hover {
+    background-color: var(--dark-table-hover) !important;
+}
+
+/* SIDEBAR */
+section[data-testid="stSidebar"] {
+    background-color: var(--dark-sidebar);
+    border-left: 1px solid var(--dark-card-border);
+    border-right: none;
+}
+
+/* SIDEBAR NAVIGATION */
+section[data-testid="stSidebar"] div[role="radiogroup"] label {
+    color: var(--dark-text-secondary);
+    padding: 8px 16px 8px 12px; /* Reduced from 10x18x10x14 */
+    margin: 2px 0; /* Reduced from 3px */
+    border-right: 3px solid transparent;
+    border-left: none;
+    text-align: right;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+section[data-testid="stSidebar"] div[role="radiogroup"] label:hover {
+    background-color: var(--dark-table-header);
+    border-right-color: var(--dark-text-warm);
+    color: var(--dark-text-primary);
+    padding-right: 18px; /* Reduced from 20px */
+}
+
+section[data-testid="stSidebar"] div[role="radiogroup"] label[data-baseweb="radio"][aria-checked="true"] {
+    background-color: var(--dark-table-header);
+    border-right: 3px solid var(--dark-text-warm);
+    border-left: none;
+    color: var(--dark-text-primary);
+    padding-right: 18px; /* Reduced from 20px */
+}
+
+/* TABS */
+.stTabs [data-baseweb="tab-list"] {
+    gap: 2px;
+    background-color: var(--dark-card);
+    padding: 3px; /* Reduced from 4px */
+}
+
+.stTabs [data-baseweb="tab"] {
+    background-color: var(--dark-tab-inactive);
+    color: var(--dark-text-secondary);
+    padding: 6px 14px; /* Reduced from 8x16 */
+    text-align: center;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+.stTabs [aria-selected="true"] {
+    background-color: var(--dark-text-warm) !important;
+    color: var(--dark-bg) !important;
+    font-weight: 600;
+}
+
+/* PROGRESS BARS */
+.stProgress > div > div > div {
+    background-color: var(--dark-text-warm);
+}
+
+/* SCROLLBARS */
+::-webkit-scrollbar {
+    width: 5px; /* Reduced from 6px */
+    height: 5px;
+}
+
+::-webkit-scrollbar-track {
+    background: var(--dark-scrollbar-track);
+}
+
+::-webkit-scrollbar-thumb {
+    background: var(--dark-scrollbar-thumb);
+}
+
+::-webkit-scrollbar-thumb:hover {
+    background: var(--dark-text-warm);
+}
+
+/* SELECTION */
+::selection {
+    background-color: rgba(44, 125, 139, 0.3);
+    color: var(--dark-text-primary);
+}
+
+/* PLOT COMPATIBILITY - LTR for plots only */
+.stPlotlyChart,
+.stPlotlyChart > div,
+.stPlotlyChart svg,
+.stPlotlyChart .js-plotly-plot,
+.stPlotlyChart .plot-container,
+.stPlotlyChart .main-svg,
+.stPlotlyChart .bg {
+    background-color: transparent !important;
+    background: transparent !important;
+    text-align: left !important;
+    direction: ltr !important;
+}
+
+/* Ensure plot containers don't inherit RTL */
+div[data-testid="stPlotlyChart"],
+.stPlotlyChart {
+    background: transparent !important;
+    padding: 0 !important;
+    margin: 0 !important;
+    border: none !important;
+}
+
+/* SMOOTH PAGE TRANSITIONS */
+.stApp {
+    animation: pageLoad 0.5s ease-out;
+}
+
+@keyframes pageLoad {
+    from {
+        opacity: 0;
+    }
+    to {
+        opacity: 1;
+    }
+}
+
+/* SPECIFIC FIXES FOR ARABIC TYPOGRAPHY */
+.rtl-container {
+    text-align: right;
+    direction: rtl;
+    font-family: 'Noto Sans Arabic', 'Segoe UI', Tahoma, 'Geeza Pro', system-ui, sans-serif;
+}
+
+.ltr-container {
+    text-align: left;
+    direction: ltr;
+    font-family: 'Roboto', sans-serif;
+}
+
+/* Arabic list styling */
+ol.arabic-list, ul.arabic-list {
+    padding-right: 18px; /* Reduced from 20px */
+    padding-left: 0;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+li {
+    margin-right: 6px; /* Reduced from 8px */
+    margin-left: 0;
+    margin-bottom: 3px; /* Reduced from 4px */
+}
+
+/* Arabic form controls */
+.stTextArea textarea {
+    text-align: right;
+    direction: rtl;
+    font-size: 0.8em; /* Reduced from 0.9em */
+}
+
+/* Fix for number inputs in RTL */
+.stNumberInput input {
+    text-align: right;
+    direction: ltr; /* Numbers should be LTR */
+}
+
+/* Paragraph text */
+p {
+    font-size: 0.8em; /* Reduced from 0.9em */
+    line-height: 1.6;
+    margin-bottom: 0.6em; /* Reduced from 0.8em */
+}
+
+/* Strong text */
+strong {
+    color: var(--dark-text-warm);
+    font-weight: 600;
+}
+
+/* Links */
+a {
+    color: var(--dark-text-cool);
+    text-decoration: none;
+}
+
+a:hover {
+    color: var(--dark-text-warm);
+    text-decoration: underline;
+}
+
+/* REMOVE THEME SWITCHER */
+.theme-switch {
+    display: none !important;
+}
+
+/* Custom hover tooltip styling */
+.hoverlayer .hovertext {
+    background-color: var(--hover-bg) !important;
+    color: var(--hover-text) !important;
+    font-family: 'Noto Sans Arabic', 'Segoe UI', Tahoma, 'Geeza Pro', system-ui, sans-serif !important;
+    text-align: right !important;
+    direction: rtl !important;
+    border: 1px solid var(--dark-card-border) !important;
+    border-radius: 4px !important;
+    padding: 8px !important;
+    font-size: 0.8em !important;
+}
+
+.hoverlayer .hovertext text {
+    fill: var(--hover-text) !important;
+    font-family: 'Noto Sans Arabic', 'Segoe UI', Tahoma, 'Geeza Pro', system-ui, sans-serif !important;
+}
+/*=========================================================================*/
+/* Hide sidebar expand/collapse keyboard hints */
+section[data-testid="stSidebar"] > div:first-child > div:first-child > div:first-child {
+    display: none !important;
+}
+
+/* Remove ghost transparency effects on sidebar */
+section[data-testid="stSidebar"] > div {
+    opacity: 1 !important;
+    background-color: var(--dark-sidebar) !important;
+}
+
+/* Fix sidebar header icons */
+section[data-testid="stSidebar"] button[data-testid="baseButton-header"] {
+    background-color: transparent !important;
+    border: none !important;
+    color: var(--dark-text-primary) !important;
+}
+
+/* Remove any floating action buttons that might cause ghost effects */
+section[data-testid="stSidebar"] > div > div > div[style*="position: absolute"] {
+    display: none !important;
+}
+
+/* Store lists in the stat cards (cards.py) */
+.store-list {
+    list-style-type: none;
+    padding-left: 0;
+}
+.store-item {
+    margin-bottom: 12px;
+    padding: 14px 16px;
+    background-color: #161b1c;
+    border-left: 3px solid #2C7D8B;
+    list-style-type: none;
+    box-shadow: 0 6px 14px rgba(0,0,0,0.35);
+}
+.store-item.opportunity {
+    background-color: #151c1b;
+    border-left-color: #2A927A;
+}
+.store-item strong { color: #C9D2BA; }
+.store-rating { color: #2C7D8B; }
+.store-reviews { color: #2A927A; }
+"""
+
+# quoted strings are kept as-is: attribute selectors like [style*="position: absolute"]
+_STRING_OR_COMMENT = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.S)
+_STRING = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')")
+
+
+def minify_css(css: str) -> str:
+    """*css* without comments and with the whitespace it does not need."""
+    css = _STRING_OR_COMMENT.sub(lambda m: m.group(1) or "", css)
+    parts = _STRING.split(css)
+    for k in range(0, len(parts), 2):   # even parts are outside strings
+        text = re.sub(r"\s+", " ", parts[k])
+        text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+        parts[k] = re.sub(r":\s+", ":", text).replace(";}", "}")
+    return "".join(parts).strip()
+
+
+def _font_css(local: bool) -> str:
+    faces = [(weight, f"NotoSansArabic-{name}.woff2") for weight, name in FONT_WEIGHTS.items()]
+    faces = [(weight, name) for weight, name in faces if local and (FONT_DIR / name).exists()]
+    if not faces:
+        return f"@import url('{GOOGLE_FONTS_URL}');"
+    # relative to the stylesheet, i.e. app/static/fonts/
+    return "".join(
+        "@font-face{font-family:'Noto Sans Arabic';font-style:normal;"
+        f"font-weight:{weight};font-display:swap;src:url('fonts/{name}') format('woff2')}}"
+        for weight, name in faces
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet(extra_css: str = "", *, local_fonts: bool = True) -> str:
+    """The minified theme, then *extra_css* (a page's own rules override the theme's)."""
+    return _font_css(local_fonts) + minify_css(THEME_CSS + extra_css)
+
+
+def _prune_static() -> None:
+    """Delete theme.*.css files nobody has touched for STATIC_MAX_AGE_DAYS."""
+    # age only: other server processes on this host may link to any newer file
+    cutoff = time.time() - STATIC_MAX_AGE_DAYS * 86400
+    for old in STATIC_DIR.glob("theme.*.css"):
+        try:
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+        except OSError:
+            pass
+
+
+def _write_static(css: str) -> str | None:
+    """Write *css* to static/theme.<hash>.css once; its URL, or None if not writable."""
+    global _pruned
+    name = f"theme.{hashlib.sha256(css.encode()).hexdigest()[:12]}.css"
+    path = STATIC_DIR / name
+    try:
+        if path.exists():
+            path.touch()  # in use again: restarts its age
+        else:
+            tmp = path.with_name(name + ".tmp")
+            STATIC_DIR.mkdir(exist_ok=True)
+            tmp.write_text(css, encoding="utf-8")
+            os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("could not write %s, inlining the theme CSS: %s", path, exc)
+        return None
+    if not _pruned:
+        _pruned = True
+        _prune_static()
+    return f"{STATIC_URL}/{name}"
+
+
+@functools.lru_cache(maxsize=None)
+def _theme_html(extra_css: str, static_serving: bool) -> str:
+    if static_serving:
+        href = _write_static(stylesheet(extra_css))
+        if href is not None:
+            html = f'<link rel="stylesheet" href="{href}">'
+            _LINKS[html] = STATIC_DIR / href.rsplit("/", 1)[1]
+            return html
+    return f"<style>{stylesheet(extra_css, local_fonts=False)}</style>"
+
+
+def inject(extra_css: str = "") -> None:
+    """
+    Apply the dashboard theme to the page (once per rerun).
+
+    Parameters:
+    -----------
+    extra_css : str
+        Page-specific rules, appended after the theme
+    """
+    static_serving = bool(st.get_option("server.enableStaticServing"))
+    html = _theme_html(extra_css, static_serving)
+    linked = _LINKS.get(html)
+    if linked is not None and not linked.exists():  # deleted behind this process's back
+        _theme_html.cache_clear()
+        html = _theme_html(extra_css, static_serving)
+    st.markdown(html, unsafe_allow_html=True)
@@ -0,0 +1,109 @@
+# topk.py
+"""
+Top-N row selection without full sorts.
+Use:
+    from topk import top_k, build_sorted_index
+    best = top_k(df, "total_reviews", 10)            # O(n) partial selection
+    build_sorted_index(df, "total_reviews")          # optional, once per dataset
+    best = top_k(df, "total_reviews", 10)            # now O(k) from the index
+    top_k_among([rating, reviews], 3)                # same rules on plain arrays
+
+Rows come back largest first. Ties are broken by original row position
+(earlier rows win), and rows whose key is NaN are never selected.
+"""
+from __future__ import annotations
+from functools import partial
+from typing import Sequence
+import numpy as np
+import pandas as pd
+import parallel
+from cache import frame_cache, peek_frame_cache
+
+
+def _keys(df: pd.DataFrame, by: str | Sequence[str]) -> tuple[tuple[str, ...], list[np.ndarray]]:
+    cols = (by,) if isinstance(by, str) else tuple(by)
+    values = [df[c].to_numpy(dtype="float64", na_value=np.nan) for c in cols]
+    return cols, values
+
+
+def _order(positions: np.ndarray, values: list[np.ndarray]) -> np.ndarray:
+    """Sort *positions* by keys descending, then by position ascending."""
+    # lexsort sorts by the last key first; NaN secondary keys sort last
+    keys = [positions] + [np.nan_to_num(-v[positions], nan=np.inf) for v in reversed(values)]
+    return positions[np.lexsort(keys)]
+
+
+def build_sorted_index(df: pd.DataFrame, by: str | Sequence[str]) -> np.ndarray:
+    """
+    Precompute (and memoise on *df*) the full descending order for *by*.
+
+    Later top_k() calls on the same frame and key slice this order instead
+    of selecting again.
+    """
+    cols, values = _keys(df, by)
+    store = frame_cache(df)
+    key = ("sorted_index", cols)
+    if key not in store:
+        positions = np.flatnonzero(~np.isnan(values[0]))
+        store[key] = _order(positions, values)
+    return store[key]
+
+
+def top_k_positions(df: pd.DataFrame, by: str | Sequence[str], k: int) -> np.ndarray:
+    """Row positions of the top-*k* rows of *df* by *by*, largest first."""
+    cols = (by,) if isinstance(by, str) else tuple(by)
+    store = peek_frame_cache(df)
+    order = store.get(("sorted_index", cols)) if store is not None else None
+    if order is not None:
+        return order[:max(k, 0)]
+
+    _, values = _keys(df, cols)
+    return top_k_among(values, k)
+
+
+def top_k_among(values: list[np.ndarray], k: int, workers: int | None = None) -> np.ndarray:
+    """
+    Indices of the top-*k* entries of parallel float key arrays, largest
+    first, with top_k()'s rules: later arrays break ties in earlier ones,
+    then the lower index wins; a NaN first key is never selected.
+
+    With several *workers* (default parallel.WORKERS) each chunk of rows
+    yields its own top-*k* candidates on the thread pool; every overall
+    winner is among its chunk's, so ranking the candidates again (in
+    index order, for the tie rule) gives the serial answer.
+    """
+    n = parallel.workers(len(values[0]), workers)
+    if n > 1 and k > 0:
+        def candidates(chunk: slice) -> np.ndarray:
+            return top_k_among([v[chunk] for v in values], k, 1) + chunk.start
+
+        found = parallel.run([partial(candidates, c) for c in parallel.row_chunks(len(values[0]), n)], n)
+        found = np.sort(np.concatenate(found))
+        return found[top_k_among([v[found] for v in values], k, 1)]
+
+    primary = values[0]
+    valid = np.flatnonzero(~np.isnan(primary))
+    if k <= 0 or valid.size == 0:
+        return valid[:0]
+    if k < valid.size:
+        # k-th largest primary value; keep every row tied with it so the
+        # final ordering (secondary keys, position) decides among them
+        kth = np.partition(primary[valid], valid.size - k)[valid.size - k]
+        valid = valid[primary[valid] >= kth]
+    return _order(valid, values)[:k]
+
+
+def top_k(df: pd.DataFrame, by: str | Sequence[str], k: int) -> pd.DataFrame:
+    """
+    Return the *k* rows of *df* with the largest *by*, largest first.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Source frame (any index)
+    by : str | sequence of str
+        Sort key column(s); later columns break ties in earlier ones
+    k : int
+        Number of rows to keep
+    """
+    return df.iloc[top_k_positions(df, by, k)]
@@ -1,11 +1,9 @@
 # main.py
+# الصفحة لا ترسم أي رسوم: لا pandas ولا plotly هنا، فتظهر فوراً عند التشغيل البارد
 from theme import inject
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import requests
-import io
+from perf import begin_rerun, end_rerun, show_panel, span
+from startup import preload_stores
 
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
@@ -15,28 +13,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# توقيت مراحل الصفحة: يعمل فقط مع MAROOF_PERF=1 أو ?perf=1 في الرابط
+begin_rerun("home")
+
 # ---------- GLOBAL THEME ----------
-inject()
-st.markdown("""
-<style>
+PAGE_CSS = """
 /* إزالة أيقونة السهم عند hover على sidebar */
 .css-1d391kg { 
     display: none !important; 
 }
-</style>
-""", unsafe_allow_html=True)
-
-# ---------- GLOBAL DATA ----------
-GOOGLE_FILE_ID = "1CJGNXI3yp0l1rpzERVyKCU1K55DzfqIS"
-URL = f"https://drive.usercontent.google.com/download?id={GOOGLE_FILE_ID}&export=download&confirm=t"
-
-@st.cache_data(show_spinner=False)
-def get_stores_data() -> pd.DataFrame:
-    """Download the CSV once and return a DataFrame."""
-    r = requests.get(URL, timeout=60)
-    r.raise_for_status()
-    return pd.read_csv(io.BytesIO(r.content)) 
+"""
 
+with span("theme.inject"):
+    inject(PAGE_CSS)
 
 # ---------- MAIN PAGE ----------
 # ---------- MAIN PAGE ----------
@@ -115,11 +104,13 @@ def main():
 
 # ---------- LOAD DATA & RUN ----------
 if __name__ == "__main__":
-    # تحميل البيانات مرة واحدة وتخزينها في session state
-    if 'df' not in st.session_state:
-        with st.spinner("جاري تحميل بيانات المتاجر..."):
-            df = get_stores_data()
-            st.session_state.df = df
+    # تحميل البيانات مرة واحدة لكل العملية (مشتركة بين كل الجلسات) في الخلفية:
+    # الصفحة تُعرض دون انتظار، والبيانات تكون غالباً جاهزة عند فتح لوحة التحليل
+    with span("load"):
+        preload_stores()
 
     # تشغيل الصفحة الرئيسية
-    main()
+    with span("render"):
+        main()
+
+    show_panel(end_rerun())